@@ -0,0 +1,322 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import user_inputs
+import game_objects
+import game_file
+import collisions
+
+
+def timeIt(function, number, repeats=5):
+    """
+    Times a function and returns the best rate out of a few repeats
+
+    Parameters
+    ----------
+    function : function
+        the function to time, which is called with no arguments
+    number : int
+        the number of calls in each repeat
+    repeats : int
+        the number of repeats
+
+    Returns
+    -------
+    The most calls per second managed in one repeat
+    """
+
+    best = float('inf')
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        for call in range(number):
+            function()
+        best = min(best, time.perf_counter() - start)
+
+    return number / best
+
+
+def launchedParticle():
+    """
+    Returns a particle that has been launched from the middle of the window
+    """
+
+    particle = game_objects.Particle(user_inputs.wScreen / 2, user_inputs.hScreen / 2, 10)
+    particle.coeff_rest = 0.7
+    particle.findInitVel((user_inputs.wScreen / 2 + 150, user_inputs.hScreen / 2 - 200))
+    particle.findPath(particle.x, particle.y, 0.5)
+    return particle
+
+
+def benchParticle(results):
+    """
+    Measures Particle.findPath and Particle.bounce
+    """
+
+    particle = launchedParticle()
+    x, y = particle.x, particle.y
+
+    results['particle.findPath'] = {'value': timeIt(lambda: particle.findPath(x, y, 0.5), 20000), 'unit': 'calls/s'}
+    results['particle.bounce'] = {'value': timeIt(lambda: particle.bounce('vertical'), 20000), 'unit': 'calls/s'}
+
+
+def benchTrail(results):
+    """
+    Measures Trail.update and Trail.plot on a full trail
+    """
+
+    trail = game_objects.Trail()
+    for i in range(trail.length):
+        trail.update((i % user_inputs.wScreen, i % user_inputs.hScreen))
+
+    results['trail.update'] = {'value': timeIt(lambda: trail.update((1.0, 2.0)), 20000), 'unit': 'calls/s'}
+
+    def plotFull():
+        trail.update((1.0, 2.0))
+        trail.plot()
+        trail.update((3.0, 4.0))
+
+    results['trail.plot'] = {'value': timeIt(plotFull, 500), 'unit': 'calls/s'}
+
+
+def benchSprites(results):
+    """
+    Measures drawing the particle, a velocity arrow and every point from the sprite cache
+    """
+
+    particle = launchedParticle()
+    particle.radius = 25
+    arrow = particle.velx_arrow
+    arrow.start, arrow.end = (particle.x, particle.y), (particle.x + 120, particle.y - 40)
+    points = game_objects.PointField(1000)
+
+    results['particle.create'] = {'value': timeIt(particle.create, 20000), 'unit': 'calls/s'}
+    results['arrow.draw'] = {'value': timeIt(arrow.draw, 20000), 'unit': 'calls/s'}
+    results['pointField.draw[1000]'] = {'value': timeIt(points.draw, 200), 'unit': 'calls/s'}
+
+
+def benchCollisions(results, counts=(10, 100, 1000, 10000)):
+    """
+    Measures checking a particle against every point and obstacle one by one, against the points' grid, the
+    PointField and the obstacles' broad phase, for more and more of them
+    """
+
+    particle = launchedParticle()
+    coords, rad = (particle.x, particle.y), particle.radius
+    end = (coords[0] + 15, coords[1] + 10)
+
+    for count in counts:
+        field = game_objects.PointField(count)
+        points = list(field)
+        obstacles = [game_objects.Obstacle(rad) for i in range(count)]
+        broad_phase = collisions.ObstacleBroadPhase(obstacles)
+        number = max(1, 20000 // count)
+
+        def allPoints():
+            for point in points:
+                point.collides(coords, rad)
+
+        def allObstacles():
+            for obstacle in obstacles:
+                obstacle.checkCollision(coords, rad)
+
+        def broadPhaseObstacles():
+            for obstacle in broad_phase.query(coords, rad):
+                obstacle.checkCollision(coords, rad)
+
+        def gridPoints():
+            field.grid.locateSwept(coords, end, rad)
+
+        def fieldPoints():
+            field.collidesSwept(coords, end, rad)
+            field.collected[:] = False
+
+        results[f'point.collides[{count}]'] = {'value': timeIt(allPoints, number), 'unit': 'sweeps/s'}
+        results[f'obstacle.checkCollision[{count}]'] = {'value': timeIt(allObstacles, number), 'unit': 'sweeps/s'}
+        results[f'obstacleBroadPhase.query[{count}]'] = {'value': timeIt(broadPhaseObstacles, 2000), 'unit': 'sweeps/s'}
+        results[f'obstacleBroadPhase.culled[{count}]'] = {
+            'value': broad_phase.pairs_culled / (broad_phase.pairs_tested + broad_phase.pairs_culled), 'unit': 'fraction'}
+        results[f'pointGrid.locateSwept[{count}]'] = {'value': timeIt(gridPoints, 2000), 'unit': 'sweeps/s'}
+        results[f'pointField.collidesSwept[{count}]'] = {'value': timeIt(fieldPoints, 2000), 'unit': 'sweeps/s'}
+
+
+def benchPhysics(results, ticks=2000):
+    """
+    Measures a physics tick of the game, checking for collisions every tick and solving for them exactly
+    """
+
+    for name, event_driven in (('polling', False), ('event_driven', True)):
+        game = game_file.Game(fps=0, event_driven=event_driven, seed=0)
+        game.newLevel()
+        game.applySettings(False, False, True, False, 0.8, 10, 9.81)
+        game.startRun()
+
+        def tick():
+            if not game.particle.projected:
+                game.launches = 10
+                game.launch((user_inputs.wScreen / 2 + 150, user_inputs.hScreen / 2 - 200))
+            game.physicsStep()
+
+        results[f'game.physicsStep[{name}]'] = {'value': 1000 / timeIt(tick, ticks, repeats=3), 'unit': 'ms/tick',
+                                                'lower_is_better': True}
+
+
+def benchRedraw(results, frames=200):
+    """
+    Measures the time Game.redrawWindow takes for a typical frame mid-launch, on its own and after a physics tick
+    """
+
+    game = game_file.Game()
+    game.launches = 10
+    game.points = game_objects.PointField(10)
+    game.obstacles = [game_objects.Obstacle(10), game_objects.Obstacle(10), game_objects.MovingObstacle(10)]
+    game.applySettings(True, True, True, False, 0.7, 10, 9.81)
+
+    particle = game.particle
+    for i in range(particle.trail.length):
+        particle.trail.update((i % user_inputs.wScreen, i % user_inputs.hScreen))
+    game.launch((user_inputs.wScreen / 2 + 150, user_inputs.hScreen / 2 - 200))
+
+    def frame():
+        game.physicsStep()
+        game.redrawWindow()
+
+    results['game.redrawWindow'] = {'value': 1000 / timeIt(game.redrawWindow, frames, repeats=3), 'unit': 'ms/frame',
+                                    'lower_is_better': True}
+    results['game.frame'] = {'value': 1000 / timeIt(frame, frames, repeats=3), 'unit': 'ms/frame', 'lower_is_better': True}
+
+
+def benchBalls(results, count=500, frames=100):
+    """
+    Measures the time a physics tick and a draw take with hundreds of balls in the air at once
+    """
+
+    balls = game_objects.Balls(count + 1, reserved=1)
+    balls.batch.coeff_rest[:] = 0.7
+    points = game_objects.PointField(10)
+    obstacles = [(300, 400, 500), (900, 1000, 450)]
+    window = user_inputs.display.window
+
+    def launch():
+        balls.clear()
+        balls.spray(user_inputs.wScreen / 2, user_inputs.hScreen / 2, 30, 40, count, spread=2.0)
+
+    def step():
+        if len(balls) < count:
+            launch()
+        balls.step(0.05, user_inputs.wScreen, user_inputs.hScreen, obstacles)
+        balls.collect(points)
+        points.collected[:] = False
+
+    launch()
+    results[f'balls.step[{count}]'] = {'value': 1000 / timeIt(step, frames), 'unit': 'ms/tick', 'lower_is_better': True}
+    results[f'balls.draw[{count}]'] = {'value': 1000 / timeIt(lambda: balls.draw(window, 0.5), frames), 'unit': 'ms/frame',
+                                       'lower_is_better': True}
+
+
+def runAll():
+    """
+    Runs every benchmark of the physics, collision and drawing hot paths, with the levels placed from a fixed seed
+
+    Returns
+    -------
+    A dictionary with the results and some information about the machine they were run on
+    """
+
+    game_objects.rng.seed(0)
+    user_inputs.display.window
+
+    results = {}
+    for bench in (benchParticle, benchTrail, benchSprites, benchCollisions, benchPhysics, benchRedraw, benchBalls):
+        bench(results)
+
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'video_driver': os.environ.get('SDL_VIDEODRIVER'),
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """
+    Finds the benchmarks that are slower than the baseline by more than the tolerance
+
+    Parameters
+    ----------
+    current : dict
+        the results just measured
+    baseline : dict
+        the stored results to compare against
+    tolerance : float
+        the fraction a benchmark can get slower by before it counts as a regression
+
+    Returns
+    -------
+    regressions : list
+        a list of (name, baseline value, current value, fractional change) tuples
+    """
+
+    regressions = []
+
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+
+        if result.get('lower_is_better'):
+            change = result['value'] / old['value'] - 1
+        else:
+            change = old['value'] / result['value'] - 1
+
+        if change > tolerance:
+            regressions.append((name, old['value'], result['value'], change))
+
+    return regressions
+
+
+def main(argv=None):
+    """
+    Runs the benchmarks from the command line
+
+    The results are printed and written to bench_results.json. With `--compare old_results.json` anything
+    that got slower than the stored baseline is also flagged, and the exit code is 1 if something did.
+    Everything runs under the SDL dummy video driver, so no window is opened.
+    """
+
+    parser = argparse.ArgumentParser(description='Benchmark the simulation hot paths.')
+    parser.add_argument('--output', default='bench_results.json', help='where to write the results as JSON')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON results to check for regressions against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='how much slower (as a fraction) a benchmark can get before it is flagged')
+    args = parser.parse_args(argv)
+
+    current = runAll()
+
+    with open(args.output, 'w') as file:
+        json.dump(current, file, indent=2)
+
+    for name, result in current['results'].items():
+        print(f"{name:40} {result['value']:14.2f} {result['unit']}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+        regressions = compare(current, baseline, args.tolerance)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.2f} -> {new:.2f} ({change:+.0%} slower)")
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
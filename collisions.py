@@ -0,0 +1,424 @@
+import math
+import numpy as np
+
+
+class PointGrid(object):
+    """
+    A class to represent a uniform grid (spatial hash) of collectable points.
+
+    ...
+
+    Every point is stored in the grid cell that holds its coordinates, so only the points in the cells
+    near the particle have to be tested, however many points there are in total. Points are filed by
+    their row in a PointField, which keeps the grid up to date as its points are respawned.
+
+    Attributes
+    ----------
+    cell_size : float
+        the width and height of each grid cell
+    cells : dict
+        the rows in each cell, keyed by the cell's (column, row), with the coordinates each was filed at
+    locations : dict
+        the cell each row is stored in, keyed by the row
+
+
+    Methods
+    -------
+    cellOf(x, y):
+        returns the cell that holds the given coordinates
+    insert(row, coords):
+        adds a point to the grid
+    remove(row):
+        removes a point from the grid
+    move(row, coords):
+        files a point that has moved under its new coordinates
+    clear():
+        removes every point from the grid
+    copy():
+        returns a separate grid with the same points
+    locateSwept(start, end, rad):
+        returns the points that could be hit along the line the particle moved along, with their coordinates
+    locateBoxes(min_x, min_y, max_x, max_y):
+        returns every (box, point) pair where the point is filed in a cell the box overlaps
+    """
+
+    def __init__(self, cell_size=50):
+        """
+        Initialises all the attributes of the PointGrid class
+
+        Parameters
+        ----------
+        cell_size : float
+            the width and height of each grid cell
+        """
+
+        self.cell_size = cell_size
+        self.cells = {}
+        self.locations = {}
+        self._sorted = None
+
+    def __len__(self):
+        return len(self.locations)
+
+    def cellOf(self, x, y):
+        """
+        Returns the cell that holds the given coordinates
+
+        Parameters
+        ----------
+        x,y : float
+            the coordinates
+
+        Returns
+        -------
+        A tuple with the cell's column and row
+        """
+
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def insert(self, row, coords):
+        """
+        Adds a point to the grid
+
+        Parameters
+        ----------
+        row : int
+            the point's row in its PointField
+        coords : tuple
+            the coordinates to file the point at
+        """
+
+        cell = self.cellOf(*coords)
+        # dicts are used instead of sets so points always come out in the order they went in
+        self.cells.setdefault(cell, {})[row] = coords
+        self.locations[row] = cell
+        self._sorted = None
+
+    def remove(self, row):
+        """
+        Removes a point from the grid
+
+        Parameters
+        ----------
+        row : int
+            the point's row in its PointField
+        """
+
+        cell = self.locations.pop(row)
+        self._sorted = None
+        contents = self.cells[cell]
+        del contents[row]
+        if not contents:
+            del self.cells[cell]
+
+    def move(self, row, coords):
+        """
+        Files a point that has moved under its new coordinates (it is added if it isn't in the grid yet)
+
+        Parameters
+        ----------
+        row : int
+            the point's row in its PointField
+        coords : tuple
+            the point's new coordinates
+        """
+
+        if row in self.locations:
+            self.remove(row)
+        self.insert(row, coords)
+
+    def clear(self):
+        """
+        Removes every point from the grid
+        """
+
+        self.cells.clear()
+        self.locations.clear()
+        self._sorted = None
+
+    def copy(self):
+        """
+        Returns a separate grid with the same points, so either can be changed without affecting the other
+
+        Returns
+        -------
+        grid : PointGrid
+        """
+
+        grid = PointGrid(self.cell_size)
+        grid.cells = {cell: dict(contents) for cell, contents in self.cells.items()}
+        grid.locations = dict(self.locations)
+        return grid
+
+    def _collect(self, min_x, min_y, max_x, max_y, found):
+        """
+        Adds the points in every cell that overlaps the given box to found
+        """
+
+        min_col, min_row = self.cellOf(min_x, min_y)
+        max_col, max_row = self.cellOf(max_x, max_y)
+
+        for col in range(min_col, max_col + 1):
+            for row in range(min_row, max_row + 1):
+                contents = self.cells.get((col, row))
+                if contents:
+                    found.update(contents)
+
+    def locateSwept(self, start, end, rad):
+        """
+        Returns the points that could be hit along the line the particle moved along between two steps
+
+        Long lines are split into pieces no longer than a cell, so only the cells near the line are
+        looked at rather than its whole bounding box.
+
+        Parameters
+        ----------
+        start : tuple
+            the coordinates of the particle at the previous step
+        end : tuple
+            the current coordinates of the particle
+        rad : float
+            the radius of the particle
+
+        Returns
+        -------
+        A dictionary of the coordinates each candidate point was filed at, keyed by its row (they still need to
+        be checked with sweptHit)
+        """
+
+        found = {}
+        pieces = max(1, math.ceil(math.dist(start, end) / self.cell_size))
+        step_x = (end[0] - start[0]) / pieces
+        step_y = (end[1] - start[1]) / pieces
+
+        for piece in range(pieces):
+            x1, y1 = start[0] + step_x * piece, start[1] + step_y * piece
+            x2, y2 = x1 + step_x, y1 + step_y
+            self._collect(min(x1, x2) - rad, min(y1, y2) - rad, max(x1, x2) + rad, max(y1, y2) + rad, found)
+
+        return found
+
+
+    @staticmethod
+    def _code(col, row):
+        """
+        Packs a cell's column and row into one integer, so cells can be sorted and searched for as an array
+        """
+
+        return np.left_shift(np.asarray(col, dtype=np.int64), 32) + (np.asarray(row, dtype=np.int64) + 2 ** 31)
+
+    def _sortedCells(self):
+        """
+        Returns the code of every point's cell in order, with the points in the same order
+
+        The arrays are only built again after points have been added, removed or moved.
+        """
+
+        if self._sorted is None:
+            points = np.fromiter(self.locations, dtype=np.int64, count=len(self.locations))
+            cells = np.array(list(self.locations.values()), dtype=np.int64).reshape(-1, 2)
+            codes = self._code(cells[:, 0], cells[:, 1])
+            # a stable sort keeps the points in each cell in the order they went in, like the cells dictionary
+            order = np.argsort(codes, kind='stable')
+            self._sorted = codes[order], points[order]
+
+        return self._sorted
+
+    def locateBoxes(self, min_x, min_y, max_x, max_y):
+        """
+        Returns every (box, point) pair where the point is filed in a cell the box overlaps, for many boxes at once
+
+        Parameters
+        ----------
+        min_x,min_y,max_x,max_y : ndarray
+            the edges of each box
+
+        Returns
+        -------
+        boxes : ndarray
+            the position of the box in each pair, in the arrays given
+        rows : ndarray
+            the row of the point in each pair
+        """
+
+        codes, points = self._sortedCells()
+        min_col, min_row = np.floor_divide(min_x, self.cell_size).astype(np.int64), np.floor_divide(min_y, self.cell_size).astype(np.int64)
+        cols = np.floor_divide(max_x, self.cell_size).astype(np.int64) - min_col + 1
+        rows = np.floor_divide(max_y, self.cell_size).astype(np.int64) - min_row + 1
+
+        # every cell each box overlaps, found by counting through the box's columns and rows
+        counts = cols * rows
+        boxes = np.repeat(np.arange(counts.size), counts)
+        steps = np.arange(boxes.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = self._code(min_col[boxes] + steps // rows[boxes], min_row[boxes] + steps % rows[boxes])
+
+        start = np.searchsorted(codes, cells, side='left')
+        counts = np.searchsorted(codes, cells, side='right') - start
+        found = np.repeat(np.arange(cells.size), counts)
+        steps = np.arange(found.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        return boxes[found], points[start[found] + steps]
+
+
+class ObstacleBroadPhase(object):
+    """
+    A class to represent a sweep-and-prune broad phase for obstacles.
+
+    ...
+
+    Obstacles are kept sorted by the left edge of their shape, so only the (particle, obstacle) pairs whose
+    x intervals overlap are handed on to ParticleBatch.hitObstacles. Obstacles that don't move are sorted
+    once; MovingObstacle instances are re-sorted by update() after they move and merged back in with them.
+
+    Attributes
+    ----------
+    obstacles : list
+        all the obstacles, in the order they were given
+    bounds : ndarray
+        an (n, 3) array of the left, right and top of each obstacle, in the same order as the obstacles list
+    static : ndarray
+        the positions in the obstacles list of the obstacles that don't move, sorted by their left edge
+    moving : ndarray
+        the positions of the obstacles that move, sorted by their left edge when update() was last called
+    order : ndarray
+        the positions of every obstacle, sorted by their left edge when update() was last called
+    lefts : ndarray
+        the left edges of the obstacles, in the same order
+    max_width : float
+        the width of the widest obstacle
+    pairs_tested : int
+        the number of (particle, obstacle) pairs handed on to the narrow phase
+    pairs_culled : int
+        the number of (particle, obstacle) pairs the broad phase ruled out
+
+
+    Methods
+    -------
+    update():
+        reads the moving obstacles' new bounds and re-sorts them
+    pairs(x, radius):
+        returns every (particle, obstacle) pair that could be colliding
+    query(coords, rad):
+        returns the obstacles a single particle could be hitting
+    resetCounters():
+        sets pairs_tested and pairs_culled back to zero
+    """
+
+    def __init__(self, obstacles, moving=lambda obstacle: hasattr(obstacle, 'update')):
+        """
+        Initialises all the attributes of the ObstacleBroadPhase class
+
+        Parameters
+        ----------
+        obstacles : list
+            the Obstacle and MovingObstacle instances to sort
+        moving : function
+            returns whether an obstacle moves (defaults to checking for an update method)
+        """
+
+        self.obstacles = list(obstacles)
+        self.bounds = np.array([self._bounds(obstacle) for obstacle in self.obstacles], dtype=float).reshape(-1, 3)
+
+        moves = np.array([bool(moving(obstacle)) for obstacle in self.obstacles], dtype=bool)
+        static = np.flatnonzero(~moves)
+        self.static = static[np.argsort(self.bounds[static, 0], kind='stable')]
+        self.moving = np.flatnonzero(moves)
+        self.order = self.static
+        self.lefts = self.bounds[self.order, 0]
+        self.max_width = float((self.bounds[:, 1] - self.bounds[:, 0]).max(initial=0))
+
+        self.pairs_tested = 0
+        self.pairs_culled = 0
+
+        self.update()
+
+    def __len__(self):
+        return len(self.obstacles)
+
+    @staticmethod
+    def _bounds(obstacle):
+        return obstacle.shape.left, obstacle.shape.right, obstacle.shape.top
+
+    def update(self):
+        """
+        Reads the moving obstacles' new bounds and re-sorts them, after they have moved
+        """
+
+        if not self.moving.size:
+            return
+
+        self.bounds[self.moving] = [self._bounds(self.obstacles[index]) for index in self.moving.tolist()]
+        if self.moving.size > 1:
+            self.moving = self.moving[np.argsort(self.bounds[self.moving, 0], kind='stable')]
+        self.order = self.moving
+        if self.static.size:
+            # a stable sort of two runs that are each sorted already merges them in linear time
+            order = np.concatenate((self.static, self.moving))
+            self.order = order[np.argsort(self.bounds[order, 0], kind='stable')]
+        self.lefts = self.bounds[self.order, 0]
+
+    def pairs(self, x, radius):
+        """
+        Returns every (particle, obstacle) pair that could be colliding
+
+        Parameters
+        ----------
+        x : ndarray
+            the x coordinates of the particles
+        radius : ndarray
+            the radius of each particle
+
+        Returns
+        -------
+        bodies : ndarray
+            the position of the particle in each pair, in the arrays given
+        found : ndarray
+            the position of the obstacle in each pair, in the obstacles list (and the rows of bounds)
+        """
+
+        x, radius = np.atleast_1d(x), np.atleast_1d(radius)
+        start = np.searchsorted(self.lefts, x - radius - self.max_width, side='left')
+        end = np.searchsorted(self.lefts, x + radius, side='right')
+
+        if x.size == 1:
+            found = self.order[start[0]:end[0]]
+            bodies = np.zeros(found.size, dtype=int)
+        else:
+            counts = end - start
+            bodies = np.repeat(np.arange(x.size), counts)
+            # the position of each pair within its particle's run of the sorted obstacles
+            offsets = np.arange(bodies.size) - np.repeat(np.cumsum(counts) - counts, counts)
+            found = self.order[start[bodies] + offsets]
+
+        keep = self.bounds[found, 1] + radius[bodies] >= x[bodies]
+        bodies, found = bodies[keep], found[keep]
+
+        self.pairs_tested += found.size
+        self.pairs_culled += x.size * len(self.obstacles) - found.size
+        return bodies, found
+
+    def query(self, coords, rad):
+        """
+        Returns the obstacles a single particle could be hitting
+
+        Parameters
+        ----------
+        coords : tuple
+            the coordinates of the particle
+        rad : float
+            the radius of the particle
+
+        Returns
+        -------
+        A list of the candidate obstacles, in the same order as the obstacles list
+        """
+
+        found = self.pairs(coords[0], rad)[1]
+        return [self.obstacles[index] for index in np.sort(found).tolist()]
+
+    def resetCounters(self):
+        """
+        Sets pairs_tested and pairs_culled back to zero
+        """
+
+        self.pairs_tested = 0
+        self.pairs_culled = 0
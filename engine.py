@@ -0,0 +1,1005 @@
+import numpy as np
+from collections import OrderedDict
+
+
+def launchVelocity(x, y, mouse_pos):
+    """
+    Finds the initial x and y components of the velocity for a launch aimed at the given mouse position
+
+    Parameters
+    ----------
+    x,y : float
+        the coordinates of the particle
+    mouse_pos : tuple
+        the coordinates of the cursor
+
+    Returns
+    -------
+    uX,uY : float
+        the initial x and y components of the velocity
+    """
+
+    line_length = mouse_pos[0] - x
+    line_height = y - mouse_pos[1]
+
+    return line_length / 5, line_height / 5
+
+
+class ParticleBatch(object):
+    """
+    A class to represent a batch of particles whose state is stored as NumPy arrays.
+
+    ...
+
+    Each particle is one row of the arrays, so the same SUVAT and bounce equations can be applied
+    to every particle at once. This class doesn't use pygame, so it can be used for headless runs.
+
+    Attributes
+    ----------
+    size : int
+        the number of particles (rows) in the batch
+    x,y : ndarray
+        x and y coordinates of each particle
+    uX,uY : ndarray
+        initial x and y components of each particle's velocity
+    vX,vY : ndarray
+        final x and y components of each particle's velocity
+    vel : ndarray
+        the overall velocity of each particle
+    radius : ndarray
+        radius of each particle
+    coeff_rest : ndarray
+        coefficient of restitution between each particle and the walls
+    acc : ndarray
+        acceleration of each particle
+    drag : ndarray
+        the quadratic air resistance coefficient of each particle
+    integrator : Integrator
+        moves the particles along their paths in move() (None uses the SUVAT equations in findPath)
+    initX,initY : ndarray
+        the coordinates each particle's current path started from (set at launch and after every bounce)
+    t : ndarray
+        the time elapsed in each particle's current path
+    path_number : ndarray
+        the number of paths each particle has started (launch and bounce each start one), so anything worked
+        out for a path can be kept until it changes
+    moved_to : ndarray
+        the time into its current path each particle was last moved to by move() (integrators step on from there)
+    bounces : ndarray
+        the number of times each particle has bounced vertically
+    displayed_bounces : ndarray
+        each particle's total number of bounces
+    max_bounces : ndarray
+        the number of times each particle will bounce before its velocity approximates zero
+    projected : ndarray
+        boolean values for whether each particle is mid-projection or not
+
+
+    Methods
+    -------
+    launch(uX, uY, rows):
+        sets the initial velocities of the given particles and starts projecting them
+    findBounces(rows):
+        calculates the number of times each particle will bounce before its velocity approximates zero
+    findPath(initX, initY, t, rows):
+        calculates the new coordinates of the given particles using SUVAT equations
+    move(initX, initY, t, rows):
+        moves the given particles along their paths with the batch's integrator
+    bounce(bounce_type, rows):
+        finds the velocity and coordinates of the given particles after they bounce
+    settle(rows):
+        stops the given particles, resting where their last path started
+    hitObstacles(obstacles, rows):
+        bounces the given particles off any obstacle they are inside
+    step(dt, width, height, obstacles, rows):
+        moves the projected particles on by one time step, bouncing them off the obstacles and walls
+    """
+
+    def __init__(self, size, radius=10, coeff_rest=0.0, acc=-9.81, drag=0.0, integrator=None):
+        """
+        Initialises all the attributes of the ParticleBatch class
+
+        Parameters
+        ----------
+        size : int
+            the number of particles in the batch
+        radius : float
+            initial radius of every particle
+        coeff_rest : float
+            initial coefficient of restitution of every particle
+        acc : float
+            initial acceleration of every particle
+        drag : float
+            initial air resistance coefficient of every particle
+        integrator : Integrator
+            moves the particles along their paths (defaults to the SUVAT equations)
+        """
+
+        self.size = size
+        self.x = np.zeros(size)
+        self.y = np.zeros(size)
+        self.uX = np.zeros(size)
+        self.uY = np.zeros(size)
+        self.vX = np.zeros(size)
+        self.vY = np.zeros(size)
+        self.vel = np.zeros(size)
+        self.radius = np.full(size, radius, dtype=float)
+        self.coeff_rest = np.full(size, coeff_rest, dtype=float)
+        self.acc = np.full(size, acc, dtype=float)
+        self.drag = np.full(size, drag, dtype=float)
+        self.integrator = integrator
+
+        self.initX = np.zeros(size)
+        self.initY = np.zeros(size)
+        self.t = np.zeros(size)
+        self.path_number = np.zeros(size, dtype=int)
+        self.moved_to = np.zeros(size)
+        self.bounces = np.zeros(size, dtype=int)
+        self.displayed_bounces = np.zeros(size, dtype=int)
+        self.max_bounces = np.zeros(size)
+        self.projected = np.zeros(size, dtype=bool)
+
+    def launch(self, uX, uY, rows=slice(None)):
+        """
+        Sets the initial velocities of the given particles and starts projecting them from where they are
+
+        Parameters
+        ----------
+        uX,uY : float or ndarray
+            initial x and y components of the velocity
+        rows : int, slice or ndarray
+            the particles to launch (defaults to the whole batch)
+        """
+
+        self.uX[rows] = uX
+        self.uY[rows] = uY
+        self.initX[rows] = self.x[rows]
+        self.initY[rows] = self.y[rows]
+        self.t[rows] = 0
+        self.path_number[rows] += 1
+        self.moved_to[rows] = 0
+        self.bounces[rows] = 0
+        self.displayed_bounces[rows] = 0
+        self.max_bounces[rows] = self.findBounces(rows)
+        self.projected[rows] = True
+
+    def findBounces(self, rows=slice(None)):
+        """
+        Calculates the number of times each particle will bounce before its velocity approximates zero
+
+        Parameters
+        ----------
+        rows : int, slice or ndarray
+            the particles to calculate the bounces for (defaults to the whole batch)
+
+        Returns
+        -------
+        bounce_num : ndarray
+            the maximum number of times each particle will bounce
+        """
+
+        uY = np.abs(np.atleast_1d(self.uY[rows]))
+        coeff_rest = np.atleast_1d(self.coeff_rest[rows])
+        bounce_num = np.ones(uY.shape)
+
+        # same as math.log(1 / abs(uY), coeff_rest), only worked out where the log is defined
+        valid = coeff_rest > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bounce_num[valid] = np.log(1 / uY[valid]) / np.log(coeff_rest[valid])
+
+        return bounce_num if np.ndim(self.uY[rows]) else bounce_num[0]
+
+    def findPath(self, initX, initY, t, rows=slice(None)):
+        """
+        Calculates the new coordinates of the given particles using SUVAT equations
+
+        Parameters
+        ----------
+        initX,initY : float or ndarray
+            the coordinates the particles' current paths started from
+        t : float or ndarray
+            the time elapsed in the particles' current paths
+        rows : int, slice or ndarray
+            the particles to move (defaults to the whole batch)
+        """
+
+        t = np.asarray(t, dtype=float)
+        uX, uY, acc = self.uX[rows], self.uY[rows], self.acc[rows]
+
+        sX = uX * t
+        sY = (uY * t) + (acc / 2 * (t ** 2))
+
+        # at t = 0 the final y velocity is left as it was, exactly like Particle.findPath always has
+        self.vX[rows] = uX
+        self.vY[rows] = np.where(t == 0, self.vY[rows], uY + acc * t)
+        self.x[rows] = initX + sX
+        self.y[rows] = initY - sY
+
+        self.vel[rows] = np.hypot(self.vX[rows], self.vY[rows])
+
+    def move(self, initX, initY, t, rows=slice(None)):
+        """
+        Moves the given particles along their paths with the batch's integrator
+
+        Parameters
+        ----------
+        initX,initY : float or ndarray
+            the coordinates the particles' current paths started from
+        t : float or ndarray
+            the time elapsed in the particles' current paths
+        rows : int, slice or ndarray
+            the particles to move (defaults to the whole batch)
+        """
+
+        if self.integrator is None:
+            self.findPath(initX, initY, t, rows)
+            self.moved_to[rows] = t
+        else:
+            self.integrator.advance(self, initX, initY, t, rows)
+
+    def bounce(self, bounce_type, rows=slice(None)):
+        """
+        Finds the velocity and coordinates of the given particles after they bounce
+
+        Parameters
+        ----------
+        bounce_type : str
+            value that specifies if the bounce is horizontal or vertical so the right velocity components are changed
+        rows : int, slice or ndarray
+            the particles that are bouncing (defaults to the whole batch)
+
+        Returns
+        -------
+        x,y : ndarray
+            new x and y coordinates of the particles
+        """
+
+        vX, vY = self.vX[rows], self.vY[rows]
+        coeff_rest, radius = self.coeff_rest[rows], self.radius[rows]
+
+        x_sign = np.where(vX > 0, -1, 1)
+        y_sign = np.where(vY > 0, -1, 1)
+        self.path_number[rows] += 1
+
+        if bounce_type == 'horizontal':
+            self.uY[rows] = coeff_rest * vY
+            self.uX[rows] = -coeff_rest * vX
+            return self.x[rows] + x_sign * radius, self.y[rows]
+
+        elif bounce_type == 'vertical':
+            self.uY[rows] = -coeff_rest * vY
+            self.uX[rows] = coeff_rest * vX
+            return self.x[rows], self.y[rows] - y_sign * radius
+
+    def settle(self, rows):
+        """
+        Stops the given particles, resting where their last path started
+
+        Parameters
+        ----------
+        rows : int, ndarray
+            the particles to stop
+        """
+
+        self.projected[rows] = False
+        self.vel[rows] = 0.0
+        self.y[rows] = self.initY[rows] + self.radius[rows] - 1
+        self.x[rows] = self.initX[rows]
+
+    def hitObstacles(self, obstacles, rows):
+        """
+        Bounces the given particles off any obstacle they are inside, restarting their paths from where they bounced
+
+        Parameters
+        ----------
+        obstacles : ndarray or ObstacleBroadPhase
+            an (n, 3) array of the left, right and top of each obstacle, or a broad phase that hands over
+            only the (particle, obstacle) pairs that could be colliding
+        rows : ndarray
+            the particles to test
+
+        Returns
+        -------
+        hits : ndarray
+            the rows of the particles that bounced
+        """
+
+        if hasattr(obstacles, 'pairs'):
+            x, y, radius = self.x[rows], self.y[rows], self.radius[rows]
+            bodies, found = obstacles.pairs(x, radius)
+            left, right, top = obstacles.bounds[found].T
+            x, y, radius = x[bodies], y[bodies], radius[bodies]
+            # the same test as Obstacle.checkCollision, against the candidate pairs only
+            inside = (left - radius <= x) & (x <= right + radius) & (y > top)
+            hit = np.zeros(rows.size, dtype=bool)
+            hit[bodies[inside]] = True
+            hits = rows[hit]
+        else:
+            left, right, top = np.reshape(obstacles, (-1, 3)).T
+            x, y, radius = self.x[rows, None], self.y[rows, None], self.radius[rows, None]
+            # the same test as Obstacle.checkCollision, against every obstacle at once
+            inside = (left - radius <= x) & (x <= right + radius) & (y > top)
+            hits = rows[inside.any(axis=1)]
+        if hits.size:
+            self.initX[hits], self.initY[hits] = self.bounce('horizontal', hits)
+            self.t[hits] = 0
+            self.displayed_bounces[hits] += 1
+        return hits
+
+    def step(self, dt, width, height, obstacles=None, rows=None, profiler=None):
+        """
+        Moves the projected particles on by one time step, bouncing them off the obstacles and walls
+
+        This follows the same order as the main loop in Game.run: obstacles and then walls are checked
+        at the old position, a bounce restarts the particle's path from where it bounced, and a particle
+        stops once it has bounced vertically max_bounces times.
+
+        Parameters
+        ----------
+        dt : float
+            the length of the time step
+        width,height : int
+            the size of the area the particles bounce around in
+        obstacles : ndarray or ObstacleBroadPhase
+            an (n, 3) array of the left, right and top of each obstacle, or a broad phase over them (optional)
+        rows : ndarray
+            the particles to step (defaults to the whole batch)
+        profiler : FrameProfiler
+            times the obstacle checks as the collision phase (optional)
+
+        Returns
+        -------
+        bounced : ndarray
+            boolean values for whether each particle bounced during this step
+        """
+
+        bounced = np.zeros(self.size, dtype=bool)
+
+        projected = self.projected
+        if rows is not None:
+            projected = np.zeros(self.size, dtype=bool)
+            projected[rows] = self.projected[rows]
+
+        finished = projected & (self.bounces >= self.max_bounces)
+        if finished.any():
+            self.settle(finished)
+
+        moving = np.flatnonzero(projected & ~finished)
+        if not moving.size:
+            return bounced
+
+        self.t[moving] += dt
+
+        if obstacles is not None and len(obstacles):
+            if profiler is not None:
+                profiler.push('collision')
+            bounced[self.hitObstacles(obstacles, moving)] = True
+            if profiler is not None:
+                profiler.pop()
+
+        radius = self.radius[moving]
+        x = self.x[moving]
+        hits = moving[(x <= radius) | (x >= width - radius)]
+        if hits.size:
+            self.initX[hits], self.initY[hits] = self.bounce('horizontal', hits)
+            self.t[hits] = 0
+            self.displayed_bounces[hits] += 1
+            bounced[hits] = True
+
+        y = self.y[moving]
+        hits = moving[(y <= radius) | (y >= height - radius)]
+        if hits.size:
+            self.initX[hits], self.initY[hits] = self.bounce('vertical', hits)
+            self.t[hits] = 0
+            self.displayed_bounces[hits] += 1
+            self.bounces[hits] += 1
+            bounced[hits] = True
+
+        self.move(self.initX[moving], self.initY[moving], self.t[moving], moving)
+
+        return bounced
+
+
+EPSILON = 1e-9
+
+
+def quadraticRoots(a, b, c):
+    """
+    Finds the real roots of a t^2 + b t + c = 0 for arrays of coefficients
+
+    Parameters
+    ----------
+    a,b,c : float or ndarray
+        the coefficients (a can be zero, in which case the equation is solved as a straight line)
+
+    Returns
+    -------
+    low,high : ndarray
+        the smaller and larger root (both nan where there are no real roots, equal where there is only one)
+    """
+
+    a, b, c = (np.asarray(coeff, dtype=float) for coeff in (a, b, c))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # the square root of a negative discriminant is nan, which carries through to both roots
+        root_disc = np.sqrt(b * b - 4 * a * c)
+        first = (-b - root_disc) / (2 * a)
+        second = (-b + root_disc) / (2 * a)
+        low, high = np.minimum(first, second), np.maximum(first, second)
+
+        linear = a == 0
+        if linear.any():
+            line_root = np.where(b != 0, -c / b, np.nan)
+            low, high = np.where(linear, line_root, low), np.where(linear, line_root, high)
+
+    return low, high
+
+
+def firstRoot(a, b, c):
+    """
+    Finds the earliest time after now that solves a t^2 + b t + c = 0
+
+    Parameters
+    ----------
+    a,b,c : float or ndarray
+        the coefficients
+
+    Returns
+    -------
+    An array with the smallest root greater than zero (inf where there isn't one)
+    """
+
+    low, high = quadraticRoots(a, b, c)
+    return np.where(low > EPSILON, low, np.where(high > EPSILON, high, np.inf))
+
+
+def timeOfImpact(initX, initY, uX, uY, acc, radius, width, height, obstacles=None):
+    """
+    Works out exactly when particles on SUVAT paths will next hit a wall, the floor/ceiling or an obstacle
+
+    The hit tests are the same as the ones in Game.run, only solved for the time they first become true
+    rather than checked every step. Obstacles count as hit when the particle's centre enters the area
+    Obstacle.checkCollision tests for (its x interval widened by the radius, below its top).
+
+    Parameters
+    ----------
+    initX,initY : float or ndarray
+        the coordinates the particles' current paths started from
+    uX,uY : float or ndarray
+        the initial x and y components of the particles' velocities
+    acc : float or ndarray
+        the acceleration of the particles
+    radius : float or ndarray
+        the radius of the particles
+    width,height : int
+        the size of the area the particles bounce around in
+    obstacles : ndarray
+        an (n, 3) array of the left, right and top of each obstacle that doesn't move (optional)
+
+    Returns
+    -------
+    t_x : ndarray
+        time until the next horizontal bounce (walls and obstacles), inf if there isn't one
+    t_y : ndarray
+        time until the next vertical bounce (floor and ceiling), inf if there isn't one
+    """
+
+    initX, initY, uX, uY, acc, radius = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (initX, initY, uX, uY, acc, radius)))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wall = np.where(uX > 0, width - radius, radius)
+        t_x = np.where(uX != 0, (wall - initX) / uX, np.inf)
+    t_x = np.where(t_x > EPSILON, t_x, np.inf)
+
+    obstacles = None if obstacles is None or not len(obstacles) else np.reshape(np.asarray(obstacles, dtype=float), (-1, 3))
+
+    # y is measured downwards, so y(t) = initY - (uY t + acc/2 t^2); the heights of the ceiling, the floor
+    # and the top of every obstacle are all solved for in one go, along a last axis
+    heights = [(radius - initY)[..., None], (height - radius - initY)[..., None]]
+    if obstacles is not None:
+        heights.append(obstacles[:, 2] - initY[..., None])
+    low, high = quadraticRoots(acc[..., None] / 2, uY[..., None], np.concatenate(heights, axis=-1))
+
+    # the same as firstRoot for the ceiling and the floor
+    first = np.where(low[..., :2] > EPSILON, low[..., :2], np.where(high[..., :2] > EPSILON, high[..., :2], np.inf))
+    t_y = first.min(axis=-1)
+
+    if obstacles is not None:
+        # every obstacle is tested at once along the last axis, and the earliest hit is kept
+        left, right, top = obstacles.T
+        initX, initY, uX, uY, acc, radius = (value[..., None] for value in (initX, initY, uX, uY, acc, radius))
+
+        band_low, band_high = left - radius, right + radius
+        outside = ~((band_low <= initX) & (initX <= band_high) & (initY > top))
+
+        # through one of the sides
+        with np.errstate(divide='ignore', invalid='ignore'):
+            side = np.where(uX > 0, band_low, band_high)
+            t_side = np.where(uX != 0, (side - initX) / uX, np.nan)
+            y_side = initY - (uY * t_side + acc / 2 * t_side ** 2)
+            t_side = np.where((t_side > EPSILON) & (y_side > top), t_side, np.inf)
+
+        # down through the top
+        t_top = np.full(t_side.shape, np.inf)
+        for root in (low[..., 2:], high[..., 2:]):
+            x_top = initX + uX * root
+            falling = -uY - acc * root > 0
+            with np.errstate(invalid='ignore'):
+                hit = (root > EPSILON) & falling & (band_low <= x_top) & (x_top <= band_high)
+            t_top = np.where(hit, np.minimum(t_top, root), t_top)
+
+        t_obstacle = np.where(outside, np.minimum(t_side, t_top), np.inf).min(axis=-1)
+        t_x = np.minimum(t_x, t_obstacle)
+
+    return t_x, t_y
+
+
+class EventStepper(object):
+    """
+    A class to represent an event-driven stepper for a ParticleBatch.
+
+    ...
+
+    Instead of moving the particles on by a small time step and checking for collisions, the time of the
+    next collision is solved for exactly and each particle jumps straight to it. Positions in between are
+    only worked out when something asks for them with positions(). When it is run alongside a fixed
+    timestep with step(), each path's collision times are only solved for once and then kept until the
+    path changes, so most ticks just move the particles along their paths.
+
+    Attributes
+    ----------
+    batch : ParticleBatch
+        the particles being simulated
+    width,height : int
+        the size of the area the particles bounce around in
+    obstacles : ndarray
+        an (n, 3) array of the left, right and top of each obstacle that doesn't move (or None)
+    elapsed : ndarray
+        the total time each particle has been projected for
+    t_next : ndarray
+        the time into each particle's current path at which its next collision happens
+    impacts : ndarray
+        an (n, 2) array of the times of the next horizontal and vertical bounce kept for each particle's path
+    solved_path : ndarray
+        the path number (see ParticleBatch.path_number) each particle's kept impacts are for
+    events : int
+        the total number of collisions jumped to
+
+
+    Methods
+    -------
+    nextImpact(rows):
+        works out when the given particles will next collide and which way they will bounce
+    advance():
+        jumps every projected particle to its next collision and bounces it
+    step(dt, rows, obstacles, max_events):
+        moves the given particles on by a time step, bouncing at the exact time of every collision on the way
+    run(max_events):
+        keeps jumping from collision to collision until every particle has stopped
+    positions(t):
+        returns where every particle is a time t into its current path, without changing anything
+    """
+
+    def __init__(self, batch, width, height, obstacles=None):
+        """
+        Initialises all the attributes of the EventStepper class
+
+        Parameters
+        ----------
+        batch : ParticleBatch
+            the particles to simulate (they should already have been launched)
+        width,height : int
+            the size of the area the particles bounce around in
+        obstacles : ndarray
+            an (n, 3) array of the left, right and top of each obstacle that doesn't move (optional)
+        """
+
+        self.batch = batch
+        self.width = width
+        self.height = height
+        self.obstacles = obstacles
+        self.elapsed = np.zeros(batch.size)
+        self.t_next = np.full(batch.size, np.inf)
+        self.impacts = np.full((batch.size, 2), np.inf)
+        self.solved_path = np.full(batch.size, -1)
+        self.events = 0
+
+    def nextImpact(self, rows):
+        """
+        Works out when the given particles will next collide and which way they will bounce
+
+        Parameters
+        ----------
+        rows : ndarray
+            the indices of the particles
+
+        Returns
+        -------
+        t_x,t_y : ndarray
+            the time until each particle's next horizontal and vertical bounce
+        """
+
+        b = self.batch
+        return timeOfImpact(b.initX[rows], b.initY[rows], b.uX[rows], b.uY[rows], b.acc[rows], b.radius[rows],
+                            self.width, self.height, self.obstacles)
+
+    def _keptImpacts(self, rows):
+        """
+        Returns the same as nextImpact, only solving for the particles whose paths have changed since they were last solved for
+        """
+
+        paths = self.batch.path_number[rows]
+        changed = self.solved_path[rows] != paths
+
+        if changed.any():
+            stale = rows[changed]
+            self.impacts[stale, 0], self.impacts[stale, 1] = self.nextImpact(stale)
+            self.solved_path[stale] = paths[changed]
+
+        return self.impacts[rows, 0], self.impacts[rows, 1]
+
+    def _settle(self, rows):
+        """
+        Stops the given particles where their last path started, like Game.run does
+        """
+
+        self.batch.settle(rows)
+
+    def advance(self):
+        """
+        Jumps every projected particle to its next collision and bounces it
+
+        Returns
+        -------
+        The number of particles that collided
+        """
+
+        b = self.batch
+
+        self._settle(np.flatnonzero(b.projected & (b.bounces >= b.max_bounces)))
+
+        rows = np.flatnonzero(b.projected)
+        if not rows.size:
+            return 0
+
+        t_x, t_y = self.nextImpact(rows)
+        t_hit = np.minimum(t_x, t_y)
+        self.t_next[rows] = t_hit
+
+        never = np.isinf(t_hit)
+        self._settle(rows[never])
+        rows, t_x, t_y, t_hit = rows[~never], t_x[~never], t_y[~never], t_hit[~never]
+        if not rows.size:
+            return 0
+
+        # move to the exact contact point so the bounce uses the velocity at contact
+        b.findPath(b.initX[rows], b.initY[rows], t_hit, rows)
+        self.elapsed[rows] += t_hit
+
+        horizontal = rows[t_x <= t_hit]
+        if horizontal.size:
+            b.initX[horizontal], b.initY[horizontal] = b.bounce('horizontal', horizontal)
+            b.displayed_bounces[horizontal] += 1
+
+        vertical = rows[t_y <= t_hit]
+        if vertical.size:
+            b.initX[vertical], b.initY[vertical] = b.bounce('vertical', vertical)
+            b.displayed_bounces[vertical] += 1
+            b.bounces[vertical] += 1
+
+        b.t[rows] = 0
+        b.findPath(b.initX[rows], b.initY[rows], 0, rows)
+
+        self.events += rows.size
+        return rows.size
+
+    def step(self, dt, rows=None, obstacles=None, max_events=100, profiler=None):
+        """
+        Moves the given particles on by a time step, bouncing at the exact time of every collision on the way
+
+        This is the event-driven version of ParticleBatch.step, for running alongside a fixed timestep: a
+        particle stops once it has bounced vertically max_bounces times, and collisions are solved for
+        rather than checked for, so nothing is missed however long the step is.
+
+        Parameters
+        ----------
+        dt : float
+            the length of the time step
+        rows : ndarray
+            the particles to step (defaults to every projected particle)
+        obstacles : ndarray or ObstacleBroadPhase
+            an (n, 3) array of the left, right and top of each obstacle that moves, or a broad phase over
+            them, which are checked for at the start of the step like ParticleBatch.step does (optional)
+        max_events : int
+            the most collisions handled for one particle in a step
+        profiler : FrameProfiler
+            times the checks for the moving obstacles as the collision phase (optional)
+
+        Returns
+        -------
+        rows : ndarray
+            the rows of the particles that moved along their paths
+        """
+
+        b = self.batch
+        rows = np.flatnonzero(b.projected) if rows is None else rows[b.projected[rows]]
+
+        finished = b.bounces[rows] >= b.max_bounces[rows]
+        if finished.any():
+            self._settle(rows[finished])
+            rows = rows[~finished]
+            if not rows.size:
+                return rows
+
+        b.t[rows] += dt
+        self.elapsed[rows] += dt
+        if obstacles is not None and len(obstacles):
+            if profiler is not None:
+                profiler.push('collision')
+            b.hitObstacles(obstacles, rows)
+            if profiler is not None:
+                profiler.pop()
+        going, remaining = rows, b.t[rows]
+
+        for event in range(max_events):
+            t_x, t_y = self._keptImpacts(going)
+            t_hit = np.minimum(t_x, t_y)
+            self.t_next[going] = t_hit
+            hit = t_hit <= remaining
+            if not hit.any():
+                break
+
+            going, remaining, t_x, t_y, t_hit = going[hit], remaining[hit], t_x[hit], t_y[hit], t_hit[hit]
+
+            # move to the exact contact point so the bounce uses the velocity at contact
+            b.findPath(b.initX[going], b.initY[going], t_hit, going)
+
+            horizontal = going[t_x <= t_hit]
+            if horizontal.size:
+                b.initX[horizontal], b.initY[horizontal] = b.bounce('horizontal', horizontal)
+                b.displayed_bounces[horizontal] += 1
+
+            vertical = going[t_y <= t_hit]
+            if vertical.size:
+                b.initX[vertical], b.initY[vertical] = b.bounce('vertical', vertical)
+                b.displayed_bounces[vertical] += 1
+                b.bounces[vertical] += 1
+
+            # a particle that has made its last bounce waits at the bounce point to be stopped next step
+            remaining = np.where(b.bounces[going] >= b.max_bounces[going], 0.0, remaining - t_hit)
+            b.t[going] = remaining
+            self.events += going.size
+
+            going, remaining = going[remaining > 0], remaining[remaining > 0]
+            if not going.size:
+                break
+
+        b.move(b.initX[rows], b.initY[rows], b.t[rows], rows)
+        return rows
+
+    def run(self, max_events=100000):
+        """
+        Keeps jumping from collision to collision until every particle has stopped
+
+        Parameters
+        ----------
+        max_events : int
+            the most times advance() is called, in case a particle never stops
+
+        Returns
+        -------
+        The number of times advance() was called
+        """
+
+        calls = 0
+        while self.batch.projected.any() and calls < max_events:
+            self.advance()
+            calls += 1
+
+        self._settle(np.flatnonzero(self.batch.projected & (self.batch.bounces >= self.batch.max_bounces)))
+        return calls
+
+    def positions(self, t):
+        """
+        Returns where every particle is a time t into its current path, without changing anything
+
+        Parameters
+        ----------
+        t : float or ndarray
+            the time into the current path (clamped to the next collision once nextImpact has been worked out)
+
+        Returns
+        -------
+        x,y : ndarray
+            the coordinates of every particle (stopped particles stay where they are)
+        """
+
+        b = self.batch
+        t = np.minimum(t, self.t_next)
+        x = np.where(b.projected, b.initX + b.uX * t, b.x)
+        y = np.where(b.projected, b.initY - (b.uY * t + b.acc / 2 * t ** 2), b.y)
+        return x, y
+
+
+class AimPreview(object):
+    """
+    A class to represent the predicted path of a launch while the player is aiming.
+
+    ...
+
+    The path is worked out one segment (parabola) at a time between the exact bounce times, then each
+    segment is sampled. Paths are cached by the mouse position, rounded to a small grid, together with
+    everything else that changes the path, so a still mouse costs nothing after the first frame.
+
+    Attributes
+    ----------
+    quantum : int
+        the size in pixels of the grid the mouse position is rounded to
+    sample_dt : float
+        the time between the sampled points along each segment
+    max_segments : int
+        the most segments worked out for one path
+    max_size : int
+        the maximum number of paths kept in the cache
+    paths : OrderedDict
+        the cached paths, from least to most recently used
+    hits : int
+        the number of times a path was found in the cache
+    misses : int
+        the number of times a path had to be worked out
+
+
+    Methods
+    -------
+    key(x, y, mouse_pos, radius, coeff_rest, acc, obstacles):
+        returns the cache key for a launch
+    path(x, y, mouse_pos, radius, coeff_rest, acc, width, height, obstacles, aim_from):
+        returns the predicted path of a launch, working it out only if it isn't cached
+    findPath(x, y, uX, uY, radius, coeff_rest, acc, width, height, obstacles):
+        works out the predicted path of a launch segment by segment
+    """
+
+    def __init__(self, quantum=2, sample_dt=0.1, max_segments=50, max_size=64):
+        """
+        Initialises all the attributes of the AimPreview class
+
+        Parameters
+        ----------
+        quantum : int
+            the size in pixels of the grid the mouse position is rounded to
+        sample_dt : float
+            the time between the sampled points along each segment
+        max_segments : int
+            the most segments worked out for one path
+        max_size : int
+            the maximum number of paths kept in the cache
+        """
+
+        self.quantum = quantum
+        self.sample_dt = sample_dt
+        self.max_segments = max_segments
+        self.max_size = max_size
+        self.paths = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, x, y, mouse_pos, radius, coeff_rest, acc, obstacles=None):
+        """
+        Returns the cache key for a launch
+
+        Parameters
+        ----------
+        x,y : float
+            the coordinates the particle is launched from
+        mouse_pos : tuple
+            the coordinates of the cursor
+        radius, coeff_rest, acc : float
+            the particle's radius, coefficient of restitution and acceleration
+        obstacles : list
+            the left, right and top of each obstacle that doesn't move (optional)
+
+        Returns
+        -------
+        A hashable tuple
+        """
+
+        mouse = (round(mouse_pos[0] / self.quantum), round(mouse_pos[1] / self.quantum))
+        obstacles = None if obstacles is None else tuple(map(tuple, np.reshape(obstacles, (-1, 3)).tolist()))
+        return x, y, mouse, radius, coeff_rest, acc, obstacles
+
+    def path(self, x, y, mouse_pos, radius, coeff_rest, acc, width, height, obstacles=None, aim_from=None):
+        """
+        Returns the predicted path of a launch, working it out only if it isn't cached
+
+        Parameters
+        ----------
+        x,y : float
+            the coordinates the particle is launched from
+        mouse_pos : tuple
+            the coordinates of the cursor
+        radius, coeff_rest, acc : float
+            the particle's radius, coefficient of restitution and acceleration
+        width,height : int
+            the size of the area the particle bounces around in
+        obstacles : list
+            the left, right and top of each obstacle that doesn't move (optional)
+        aim_from : tuple
+            the coordinates the launch velocity is measured from, if they aren't x,y (like Particle.findInitVel,
+            which uses where the particle is drawn rather than where its path starts)
+
+        Returns
+        -------
+        points : ndarray
+            an (n, 2) array of coordinates along the path
+        """
+
+        aim_from = aim_from or (x, y)
+        key = self.key(x, y, mouse_pos, radius, coeff_rest, acc, obstacles) + (width, height, tuple(aim_from))
+        points = self.paths.get(key)
+
+        if points is not None:
+            self.hits += 1
+            self.paths.move_to_end(key)
+            return points
+
+        self.misses += 1
+        # aim at the grid point itself so every mouse position rounded to it gives the same path
+        aim = (key[2][0] * self.quantum, key[2][1] * self.quantum)
+        uX, uY = launchVelocity(aim_from[0], aim_from[1], aim)
+        points = self.findPath(x, y, uX, uY, radius, coeff_rest, acc, width, height, obstacles)
+
+        self.paths[key] = points
+        if len(self.paths) > self.max_size:
+            self.paths.popitem(last=False)
+
+        return points
+
+    def findPath(self, x, y, uX, uY, radius, coeff_rest, acc, width, height, obstacles=None):
+        """
+        Works out the predicted path of a launch segment by segment, without stepping a simulation
+
+        Parameters
+        ----------
+        x,y : float
+            the coordinates the particle is launched from
+        uX,uY : float
+            the initial x and y components of the velocity
+        radius, coeff_rest, acc : float
+            the particle's radius, coefficient of restitution and acceleration
+        width,height : int
+            the size of the area the particle bounces around in
+        obstacles : list
+            the left, right and top of each obstacle that doesn't move (optional)
+
+        Returns
+        -------
+        An (n, 2) array of coordinates along the path, ending where the particle stops bouncing
+        """
+
+        batch = ParticleBatch(1, radius, coeff_rest, acc)
+        batch.x[0], batch.y[0] = x, y
+        batch.launch(uX, uY)
+        stepper = EventStepper(batch, width, height, None if obstacles is None else np.asarray(obstacles, dtype=float))
+
+        segments = []
+        for segment in range(self.max_segments):
+            if batch.bounces[0] >= batch.max_bounces[0]:
+                break
+
+            t_x, t_y = stepper.nextImpact(np.array([0]))
+            t_end = min(t_x[0], t_y[0])
+            if np.isinf(t_end):
+                break
+
+            times = np.append(np.arange(0, t_end, self.sample_dt), t_end)
+            segments.append(np.column_stack((
+                batch.initX[0] + batch.uX[0] * times,
+                batch.initY[0] - (batch.uY[0] * times + batch.acc[0] / 2 * times ** 2),
+            )))
+
+            stepper.advance()
+            if not batch.projected[0]:
+                break
+
+        return np.concatenate(segments) if segments else np.array([[x, y]])
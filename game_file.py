@@ -1,11 +1,20 @@
 import user_inputs
 import game_objects
+import timing
+import rendering
+import engine
+import collisions
+import profiler
+import replay
+import solver
+import integrators
+import trajectory
+import scenes
 
 import pygame
 import sys
 import math
-pygame.init()
-pygame.display.set_caption('Projectile Simulation')
+import random
 
 
 class Game(object):
@@ -18,24 +27,24 @@ class Game(object):
     ----------
     running : Bool
         a boolean value for whether the simulation is running or not
+    scene_manager : SceneManager
+        runs the menu, projection and game over scenes (None until initialise is called)
     particle : Particle
         the particle that will be projected
     launch_angle : float
         the initial launch angle of the particle
-    time : float
-        the current time elapsed in the projection
-    max_bounces : int
-        the number of times the particle will bounce before its velocity approximates zero
-    bounces : int
-        the current number of times the particle has bounced vertically
     displayed_bounces : int
-        the particle's total number of bounces
+        the particle's total number of bounces (read from the particle)
     launches : int
         the number of times the particle has been launched
     score : int
         the current score based on how many points have been collected
-    points : list
-        a list of Point instances to represent the total collectable points on the window
+    points : PointField
+        the collectable points on the window
+    points_version : int
+        the number of times the points have changed, so the static layer is redrawn when they do
+    drawn_points_version : int
+        the points_version the static layer was last drawn with
     obstacles : list
         a list of Obstacle instances to represent the obstacles on the window
     trail_shown : Bool
@@ -44,149 +53,380 @@ class Game(object):
         a boolean value for whether the particle's velocity arrows are shown in the simulation
     obstacles_shown : Bool
         a boolean value for whether there are obstacles in the simulation
+    preview_shown : Bool
+        a boolean value for whether the predicted path is shown while aiming
     reset_button : MainButton
         an instance of the MainButton class to represent a button that resets the simulation
+    time_step : float
+        the amount of simulated time the projection moves on by in each physics tick
+    timestep : FixedTimestep
+        the scheduler that decides how many physics ticks to run each frame
+    fps : int
+        the maximum number of frames drawn per second
+    clock : Clock
+        the pygame clock used to cap the frame rate
+    path_start : tuple
+        the coordinates the particle's current path started from (read from the particle)
+    previous_pos : tuple
+        the particle's coordinates before the last physics tick, used to interpolate its drawn position (read from the balls)
+    dirty_rects : Bool
+        a boolean value for whether only the changed parts of the window are updated each frame
+    renderer : DirtyRectRenderer
+        keeps track of the parts of the window that changed each frame
+    static_layer : StaticLayer
+        a pre-rendered layer with the background, the points and the obstacles that don't move
+    event_driven : Bool
+        a boolean value for whether collisions are solved for exactly instead of checked every tick
+    event_stepper : EventStepper
+        moves the particle and balls from collision to collision in event-driven mode (None otherwise)
+    integrator : Integrator
+        moves the particle along its path every tick
+    obstacle_bounds : list
+        the left, right and top of each obstacle that doesn't move, used to solve for collisions (None if there aren't any)
+    broad_phase : ObstacleBroadPhase
+        sorts the obstacles checked for every tick so only the ones near each ball are tested (None if they aren't shown)
+    aim_preview : AimPreview
+        works out and caches the predicted path of the launch being aimed
+    launch_solver : LaunchSolver
+        finds and caches the launch that collects the most points
+    profiler : FrameProfiler
+        times the input, physics, collision, draw and display update phases of every frame
+    profile_shown : Bool
+        a boolean value for whether the profiler's rolling percentiles are shown on the window
+    trace_path : str
+        the file the profiler's Chrome trace is written to
+    seed : int
+        the seed for the random placement of points and obstacles
+    ticks : int
+        the number of physics ticks run so far
+    recorder : Recorder
+        logs the session so it can be replayed (None if it isn't being recorded)
+    balls : Balls
+        the extra balls launched alongside the particle (the particle is the first row of their batch, and is stepped with them)
+    burst : int
+        the number of balls launched each time, including the particle
+    spread : float
+        the angle (in radians) the extra balls are fanned out over
+    launch_number : int
+        the number of launches made so far in the session
+    trajectory : TrajectorySink or TrajectoryStore
+        streams the particle's state every tick to a file (None if it isn't being exported)
+    idle_timeout : int
+        the longest time (in milliseconds) to sleep waiting for input while nothing is moving (None never sleeps)
+    threaded : Bool
+        a boolean value for whether the physics runs on its own thread
+    worker : PhysicsWorker
+        runs the physics on its own thread while the projection is running (None otherwise)
 
 
     Methods
     -------
     initialise():
-        sets up the initial menu window where the user can input initial projection values
-    redrawWindow():
+        runs the game, starting from the menu where the user can input initial projection values
+    newLevel():
+        puts the particle back in the middle and places a new set of points and obstacles
+    applySettings(trail, velocity, obstacles, preview, restitution, size, gravity):
+        applies the settings chosen on the menu
+    bestLaunch():
+        returns the cursor position for the launch that collects the most points
+    searchBestLaunch():
+        returns a search for the best launch that can be spread over several frames
+    launch(pos):
+        launches the particle towards the given position if it isn't already projected
+    quit():
+        finishes the recording, trajectory and trace, if there are any, and closes the simulation
+    redrawWindow(snapshot):
         creates and displays the current projection frame on the window
+    drawStatic(surface, points):
+        draws the points and the obstacles that don't move onto the static layer
     findLaunchAngle(start_x, start_y, mouse_pos):
         static method that finds the particle's initial launch angle
-    run():
-        runs the projection
+    physicsStep():
+        moves the projection on by one physics tick
+    drawPos(state, alpha):
+        finds where the particle should be drawn between the last two physics ticks
+    startRun():
+        gets ready to run the projection after the menu, as a new game
+    isIdle():
+        returns whether nothing is moving, so the window only changes when there is input
     """
 
-    def __init__(self):
+    def __init__(self, tick_rate=60, fps=60, dirty_rects=True, event_driven=False, profile=False, trace_path='frame_trace.json',
+                 seed=None, record_path=None, drag=0.0, integrator=None, burst=1, spread=0.5, max_balls=1024,
+                 trajectory_path=None, idle_timeout=500, threaded=False):
         """
         Initialises all the attributes of the Game class
+
+        Parameters
+        ----------
+        tick_rate : float
+            the number of physics ticks per second of real time
+        fps : int
+            the maximum number of frames drawn per second
+        dirty_rects : Bool
+            whether only the changed parts of the window are updated each frame
+        event_driven : Bool
+            whether collisions are solved for exactly instead of checked every tick
+        profile : Bool
+            whether every frame is profiled (F3 shows the timings, F4 writes the Chrome trace)
+        trace_path : str
+            the file the profiler's Chrome trace is written to
+        seed : int
+            the seed for the random placement of points and obstacles (a random one is picked if not given)
+        record_path : str
+            the file the session is recorded to so it can be replayed (not recorded if not given)
+        drag : float
+            the quadratic air resistance coefficient of the particle
+        integrator : Integrator
+            moves the particle along its path (defaults to the SUVAT equations, or RK45 if there is air resistance)
+        burst : int
+            the number of balls launched each time, including the particle
+        spread : float
+            the angle (in radians) the extra balls are fanned out over
+        max_balls : int
+            the most balls that can be in the air at once, including the particle
+        trajectory_path : str
+            the file the particle's state is streamed to every tick, as .csv, .jsonl, binary or a .traj store (not exported if not given)
+        idle_timeout : int
+            the longest time (in milliseconds) to sleep waiting for input while nothing is moving (None never sleeps)
+        threaded : Bool
+            whether the physics runs on its own thread, with the window drawn from snapshots of it
         """
 
+        # the profiler's stack of sections belongs to one thread, so it can't time both at once
+        if threaded and profile:
+            raise ValueError('profiling times the physics and drawing on the same thread, so it can\'t be used with threaded physics')
+
         self.running = None
-        self.particle = game_objects.Particle(user_inputs.wScreen / 2, user_inputs.hScreen / 2, 10)
+        self.scene_manager = None
+        # the particle is the first row of the balls' batch, so every ball shares its integrator
+        self.balls = game_objects.Balls(max(max_balls, burst), reserved=1)
+        self.burst = burst
+        self.spread = spread
+        self.particle = game_objects.Particle(user_inputs.wScreen / 2, user_inputs.hScreen / 2, 10, batch=self.balls.batch)
 
         self.launch_angle = 0
-        self.time = 0
-        self.max_bounces = None
-        self.bounces = 0
-        self.displayed_bounces = 0
         self.launches = None
         self.score = 0
-        self.points = []
+        self.points = game_objects.PointField(0)
+        self.points_version = 0
+        self.drawn_points_version = 0
         self.obstacles = []
 
         self.trail_shown = False
         self.velocity_shown = False
         self.obstacles_shown = False
+        self.preview_shown = False
 
         self.reset_button = user_inputs.MainButton(1300, 30, user_inputs.BLACK, 'RESET')
 
+        self.time_step = 0.05
+        self.timestep = timing.FixedTimestep(tick_rate)
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.particle.initX, self.particle.initY = self.particle.x, self.particle.y
+        self.balls.previous[self.particle.index] = self.path_start
+        self.dirty_rects = dirty_rects
+        self.renderer = rendering.DirtyRectRenderer((user_inputs.wScreen, user_inputs.hScreen), update=user_inputs.display.update)
+        self.static_layer = rendering.StaticLayer(user_inputs.SKYBLUE)
+        self.event_driven = event_driven
+        self.event_stepper = None
+
+        if integrator is None:
+            integrator = integrators.ClosedForm() if not drag else integrators.RK45(bounds=(user_inputs.wScreen, user_inputs.hScreen))
+        if event_driven and not integrator.closed_form:
+            raise ValueError('event-driven stepping solves the SUVAT equations, so it needs the closed form integrator')
+        self.integrator = integrator
+        self.particle.batch.integrator = integrator
+        self.particle.drag = drag
+        self.obstacle_bounds = None
+        self.broad_phase = None
+        self.aim_preview = engine.AimPreview()
+        self.launch_solver = solver.LaunchSolver()
+        self.profiler = profiler.FrameProfiler(profile)
+        self.profile_shown = False
+        self.trace_path = trace_path
+
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        game_objects.rng.seed(self.seed)
+        self.ticks = 0
+        self.recorder = replay.Recorder(record_path, self.seed, burst, spread, drag, event_driven, tick_rate, integrator) if record_path else None
+        self.launch_number = 0
+        self.trajectory = trajectory.openTrajectory(trajectory_path) if trajectory_path else None
+        self.idle_timeout = idle_timeout
+        self.threaded = threaded
+        self.worker = None
+
     def initialise(self):
         """
-        Sets up the initial menu window where the user can input initial projection values
-        """
+        Runs the game, starting from the menu where the user can input initial projection values
 
-        self.launches = 10
-        self.particle.x, self.particle.y = user_inputs.wScreen / 2 , user_inputs.hScreen / 2
-        self.points = [game_objects.Point() for i in range(10)]
-        self.obstacles = [game_objects.Obstacle(self.particle.radius), game_objects.Obstacle(self.particle.radius), game_objects.MovingObstacle(self.particle.radius)]
+        The menu, the projection and the game over screen are scenes run one after another by a
+        SceneManager in a single loop, so going back to the menu doesn't nest another call.
+        """
 
-        run_button = user_inputs.MainButton(600, 200, user_inputs.BLACK, 'Play!')
-        trail_button = user_inputs.Button(200, 100, None, 'Show Ball Trail')
-        velocity_button = user_inputs.Button(200, 200, None, 'Show Velocities')
-        obstacle_button = user_inputs.Button(200, 300, None, 'Show Obstacles ')
+        self.scene_manager = scenes.SceneManager(self)
+        self.scene_manager.run(scenes.MENU)
 
-        input_buttons = [run_button, trail_button,velocity_button,obstacle_button]
+    def newLevel(self):
+        """
+        Puts the particle back in the middle and places a new set of points and obstacles
+        """
 
-        restitution_slider = user_inputs.Slider(0.0, 0.9, 1000, 100, 'Restitution')
-        size_slider = user_inputs.Slider(10, 50, 1000, 200, 'Ball Size')
-        grav_slider = user_inputs.Slider(0.0, 30, 1000, 300, 'Gravity')
+        self.particle.x, self.particle.y = user_inputs.wScreen / 2 , user_inputs.hScreen / 2
+        self.particle.projected = False
+        self.points = game_objects.PointField(10)
+        self.points_version += 1
+        self.balls.clear()
+        self.obstacles = [game_objects.Obstacle(self.particle.radius), game_objects.Obstacle(self.particle.radius), game_objects.MovingObstacle(self.particle.radius)]
 
-        input_sliders = [restitution_slider, size_slider, grav_slider]
+    def applySettings(self, trail, velocity, obstacles, preview, restitution, size, gravity):
+        """
+        Applies the settings chosen on the menu
 
-        while not run_button.pressed:
-            user_inputs.window.fill(user_inputs.GREY)
-            for button in input_buttons:
-                button.draw()
-            for slider in input_sliders:
-                slider.draw()
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    for button in input_buttons:
-                        button.isPressed(event.pos)
-                elif event.type == pygame.MOUSEMOTION:
-                    for slider in input_sliders:
-                        slider.isUsed(event.buttons[0], event.pos)
+        Parameters
+        ----------
+        trail, velocity, obstacles, preview : Bool
+            whether the trail, velocity arrows, obstacles and aim preview are shown
+        restitution : float
+            the coefficient of restitution of the particle
+        size : float
+            the radius of the particle
+        gravity : float
+            the strength of gravity
+        """
 
-            pygame.display.update()
+        self.trail_shown = trail
+        self.velocity_shown = velocity
+        self.obstacles_shown = obstacles
+        self.preview_shown = preview
 
-        self.trail_shown = trail_button.pressed
-        self.velocity_shown = velocity_button.pressed
-        self.obstacles_shown = obstacle_button.pressed
+        static_obstacles = [obstacle for obstacle in self.obstacles if type(obstacle) != game_objects.MovingObstacle]
+        self.obstacle_bounds = [(obstacle.shape.left, obstacle.shape.right, obstacle.shape.top) for obstacle in static_obstacles] if self.obstacles_shown and static_obstacles else None
+        if self.event_driven:
+            self.event_stepper = engine.EventStepper(self.balls.batch, user_inputs.wScreen, user_inputs.hScreen, self.obstacle_bounds)
+        # in event-driven mode the static obstacles are solved for exactly, so only the moving ones are checked for
+        self.broad_phase = collisions.ObstacleBroadPhase(obstacle for obstacle in self.obstacles if not self.event_driven or
+                                                         type(obstacle) == game_objects.MovingObstacle) if self.obstacles_shown else None
+        self.static_layer.invalidate()
 
-        self.particle.radius = size_slider.slider_val
-        self.particle.coeff_rest = restitution_slider.slider_val
-        self.particle.acc = -grav_slider.slider_val
+        self.particle.radius = size
+        self.particle.coeff_rest = restitution
+        self.particle.acc = -gravity
 
-        self.run()
+        if self.recorder:
+            self.recorder.settings(self.ticks, trail, velocity, obstacles, preview, restitution, size, gravity)
 
-    def redrawWindow(self):
+    def redrawWindow(self, snapshot=None):
         """
         Creates and displays the current projection frame on the window
+
+        Parameters
+        ----------
+        snapshot : Snapshot
+            the state of the physics to draw, when it runs on its own thread (defaults to the game itself)
         """
 
-        user_inputs.window.fill(user_inputs.SKYBLUE)
+        self.profiler.push('draw')
+        mark = self.renderer.mark
+        state = snapshot or self
+        particle = state.particle
+        alpha = snapshot.alpha() if snapshot is not None else self.timestep.alpha()
 
-        self.reset_button.draw()
+        if state.points_version != self.drawn_points_version:
+            self.static_layer.invalidate()
+            self.drawn_points_version = state.points_version
 
-        if self.launches < 0:
-            self.initialise()
+        static_rect = self.static_layer.blit(user_inputs.display.window, lambda surface: self.drawStatic(surface, state.points))
+        mark(('static', self.static_layer.version), static_rect)
 
-        self.particle.create()
-        self.particle.launch_arrow.start, self.particle.launch_arrow.end = (self.particle.x, self.particle.y), pygame.mouse.get_pos()
-        self.particle.launch_arrow.draw()
+        mark(self.reset_button, self.reset_button.draw())
 
-        for point in self.points:
-            if not point.collected:
-                point.create()
-            else:
-                self.points.remove(point)
-                self.points.append(game_objects.Point())
+        draw_x, draw_y = self.drawPos(state, alpha)
+
+        mark(self.particle, self.particle.create((draw_x, draw_y)))
+        self.particle.launch_arrow.start, self.particle.launch_arrow.end = (draw_x, draw_y), user_inputs.display.mousePos()
+        mark(self.particle.launch_arrow, self.particle.launch_arrow.draw())
+
+        # the preview is worked out with the SUVAT equations, so it can't be shown with air resistance
+        # the keys of things that can change without their Rect changing include what they were drawn from
+        if self.preview_shown and not particle.projected and self.integrator.closed_form:
+            mouse_pos = user_inputs.display.mousePos()
+            preview = self.aim_preview.path(*state.path_start, mouse_pos, particle.radius,
+                                            particle.coeff_rest, particle.acc, user_inputs.wScreen,
+                                            user_inputs.hScreen, self.obstacle_bounds, (particle.x, particle.y))
+            if len(preview) > 1:
+                key = (self.aim_preview, state.path_start, mouse_pos, particle.radius, particle.coeff_rest, particle.acc,
+                       particle.x, particle.y)
+                mark(key, pygame.draw.lines(user_inputs.display.window, user_inputs.GREY, False, preview.tolist()))
 
         if self.trail_shown:
-            self.particle.trail.plot()
+            # the worker drops the oldest coordinate of the game's trail every tick, so a snapshot's copy is only drawn
+            trail = particle.trail
+            mark((self.particle.trail, trail.version), trail.draw() if snapshot is not None else trail.plot())
+
+        tick = snapshot.tick if snapshot is not None else self.ticks
+        mark((self.balls, tick, alpha), state.balls.draw(user_inputs.display.window, alpha, self.trail_shown))
 
         if self.velocity_shown:
-            self.particle.velx_arrow.start, self.particle.velx_arrow.end = ((self.particle.x, self.particle.y), (self.particle.x+self.particle.vX, self.particle.y))
-            self.particle.vely_arrow.start, self.particle.vely_arrow.end = ((self.particle.x, self.particle.y), (self.particle.x, self.particle.y-self.particle.vY))
-            self.particle.velx_arrow.draw()
-            self.particle.vely_arrow.draw()
+            self.particle.velx_arrow.start, self.particle.velx_arrow.end = ((draw_x, draw_y), (draw_x+particle.vX, draw_y))
+            self.particle.vely_arrow.start, self.particle.vely_arrow.end = ((draw_x, draw_y), (draw_x, draw_y-particle.vY))
+            mark(self.particle.velx_arrow, self.particle.velx_arrow.draw())
+            mark(self.particle.vely_arrow, self.particle.vely_arrow.draw())
 
         if self.obstacles_shown:
-            for obstacle in self.obstacles:
-                obstacle.draw()
+            # the snapshot's obstacles line up with the game's, which stay the same objects from frame to frame
+            for obstacle, drawn in zip(self.obstacles, state.obstacles):
                 if type(obstacle) == game_objects.MovingObstacle:
-                    obstacle.update()
+                    mark(obstacle, drawn.draw())
+
+        hud = [
+            (f'Current Velocity = {particle.vel:.3f}', (100, 100)),
+            (f'Launch Angle = {self.launch_angle:.2f}', (100, 120)),
+            (f'Num of Bounces = {state.displayed_bounces}', (100, 140)),
+            (f'Launches remaining = {state.launches}', (100, 160)),
+            (f'Score = {state.score}', (100, 180)),
+        ]
+        if self.burst > 1:
+            hud.append((f'Balls in the air = {len(state.balls)}', (100, 200)))
+
+        for text, pos in hud:
+            text_surface = user_inputs.text_cache.render(user_inputs.display.font, text, False, user_inputs.WHITE)
+            mark(('hud', text, pos), user_inputs.display.window.blit(text_surface, pos))
+
+        if self.profile_shown:
+            for i, text in enumerate(self.profiler.summary):
+                text_surface = user_inputs.text_cache.render(user_inputs.display.font, text, False, user_inputs.BLACK)
+                mark(('profile', text, i), user_inputs.display.window.blit(text_surface, (1000, 100 + 20 * i)))
+
+        self.profiler.pop()
+        self.profiler.push('display.update')
+
+        if self.dirty_rects:
+            self.renderer.present()
+        else:
+            user_inputs.display.update()
+
+        self.profiler.pop()
 
-        score_surface = user_inputs.font.render(f'Score = {self.score}', False, user_inputs.WHITE)
-        velocity_surface = user_inputs.font.render(f'Current Velocity = {self.particle.vel:.3f}', False, user_inputs.WHITE)
-        angle_surface = user_inputs.font.render(f'Launch Angle = {self.launch_angle:.2f}', False, user_inputs.WHITE)
-        bounce_surface = user_inputs.font.render(f'Num of Bounces = {self.displayed_bounces}', False, user_inputs.WHITE)
-        launch_surface = user_inputs.font.render(f'Launches remaining = {self.launches}', False, user_inputs.WHITE)
+    def drawStatic(self, surface, points=None):
+        """
+        Draws the points and the obstacles that don't move onto the static layer
+
+        Parameters
+        ----------
+        surface : Surface
+            the static layer's surface
+        points : PointField
+            the points to draw (defaults to the game's points)
+        """
 
-        user_inputs.window.blit(velocity_surface, (100, 100))
-        user_inputs.window.blit(angle_surface, (100, 120))
-        user_inputs.window.blit(bounce_surface, (100, 140))
-        user_inputs.window.blit(score_surface, (100, 180))
-        user_inputs.window.blit(launch_surface, (100, 160))
+        (points if points is not None else self.points).draw(surface)
 
-        pygame.display.update()
+        if self.obstacles_shown:
+            for obstacle in self.obstacles:
+                if type(obstacle) != game_objects.MovingObstacle:
+                    obstacle.draw(surface)
 
     @staticmethod
     def findLaunchAngle(start_x, start_y, mouse_pos):
@@ -243,81 +483,212 @@ class Game(object):
 
         return abs(angle * (180 / math.pi))
 
-    def run(self):
+    def physicsStep(self):
+        """
+        Moves the projection on by one physics tick
+
+        The particle is the first row of the balls' batch, so it is moved, bounced and checked against the
+        points in the same step as every ball in the air.
+        """
+
+        self.ticks += 1
+        particle = self.particle
+        projected, bounces = particle.projected, particle.displayed_bounces
+        moving = projected and particle.bounces < particle.max_bounces
+
+        if self.obstacles_shown:
+            for obstacle in self.obstacles:
+                if type(obstacle) == game_objects.MovingObstacle:
+                    obstacle.update()
+            self.profiler.push('collision')
+            self.broad_phase.update()
+            self.profiler.pop()
+
+        # the trail gets the particle's position before and after every tick, so it grows faster than plot() drops it
+        if moving:
+            particle.trail.update((particle.x, particle.y))
+
+        self.balls.step(self.time_step, user_inputs.wScreen, user_inputs.hScreen, self.broad_phase, self.event_stepper,
+                        self.profiler)
+
+        if moving:
+            particle.trail.update((particle.x, particle.y))
+
+        self.profiler.push('collision')
+        collected = self.balls.collect(self.points)
+        self.profiler.pop()
+
+        if collected.size:
+            self.score += collected.size
+            self.points.respawn(collected)
+            self.points_version += 1
+
+        if self.trajectory is not None and projected:
+            self.trajectory.record(self.ticks, self.launch_number, particle.x, particle.y, particle.vX, particle.vY, particle.vel,
+                                   particle.displayed_bounces - bounces, self.score)
+
+    @property
+    def path_start(self):
         """
-        Runs the projection
+        The coordinates the particle's current path started from
         """
 
-        running = True
-        x, y = self.particle.x,self.particle.y
+        return self.particle.initX, self.particle.initY
 
-        while running:
+    @property
+    def previous_pos(self):
+        """
+        The particle's coordinates before the last physics tick
+        """
 
-            self.launch_angle = self.findLaunchAngle(x, y, pygame.mouse.get_pos()) if not self.particle.projected else self.launch_angle
+        return tuple(self.balls.previous[self.particle.index].tolist())
 
-            if self.particle.projected:
+    @property
+    def displayed_bounces(self):
+        """
+        The particle's total number of bounces
+        """
 
-                for point in self.points:
-                    if point.collides((self.particle.x, self.particle.y), self.particle.radius):
-                        self.score += 1
+        return self.particle.displayed_bounces
 
-                if self.bounces < self.max_bounces:
-                    self.particle.trail.update((self.particle.x, self.particle.y))
-                    self.time += 0.05
+    def drawPos(self, state=None, alpha=None):
+        """
+        Finds where the particle should be drawn between the last two physics ticks
 
-                    if self.obstacles_shown:
-                        for obstacle in self.obstacles:
-                            if obstacle.checkCollision((self.particle.x, self.particle.y), self.particle.radius):
-                                x, y = self.particle.bounce('horizontal')
+        Parameters
+        ----------
+        state : Game or Snapshot
+            the state of the physics to draw (defaults to the game itself)
+        alpha : float
+            how far between the last two physics ticks to draw the particle (defaults to the game's timestep)
 
-                                self.time = 0
-                                self.displayed_bounces += 1
+        Returns
+        -------
+        x,y : float
+            the interpolated coordinates of the particle
+        """
 
-                    if self.particle.x <= self.particle.radius or self.particle.x >= user_inputs.wScreen - self.particle.radius:
+        state = state or self
+        particle = state.particle
 
-                        x, y = self.particle.bounce('horizontal')
+        if not particle.projected:
+            return particle.x, particle.y
 
-                        self.time = 0
-                        self.displayed_bounces += 1
+        alpha = alpha if alpha is not None else self.timestep.alpha()
+        prev_x, prev_y = state.previous_pos
 
-                    if self.particle.y <= self.particle.radius or self.particle.y >= user_inputs.hScreen - self.particle.radius:
-                        x, y = self.particle.bounce('vertical')
-                        self.time = 0
-                        self.displayed_bounces += 1
-                        self.bounces += 1
+        return prev_x + (particle.x - prev_x) * alpha, prev_y + (particle.y - prev_y) * alpha
 
-                    self.particle.findPath(x, y, self.time)
+    def bestLaunch(self):
+        """
+        Returns the cursor position for the launch that collects the most points
 
-                else:
-                    self.particle.projected = False
-                    self.particle.vel = 0.0
-                    self.particle.y = y + self.particle.radius - 1
-                    self.particle.x = x
+        Returns
+        -------
+        aim : tuple
+            the coordinates to launch the particle towards
+        score : int
+            the number of points the launch is predicted to collect
+        """
 
-            self.redrawWindow()
+        uX, uY, aim, score = self.launch_solver.solve(*self.path_start, self.points.coords(), self.particle.radius, self.particle.coeff_rest,
+                                                      self.particle.acc, user_inputs.wScreen, user_inputs.hScreen,
+                                                      self.obstacle_bounds, (self.particle.x, self.particle.y))
+        return aim, score
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    pygame.quit()
-                    sys.exit()
+    def searchBestLaunch(self):
+        """
+        Returns a search for the launch that collects the most points, to be run a slice at a time over several frames
 
-                if event.type == pygame.MOUSEBUTTONDOWN:
+        Returns
+        -------
+        search : LaunchSearch
+            the search (call step(budget) once a frame until it returns True, then read answer)
+        """
+
+        return self.launch_solver.search(*self.path_start, self.points.coords(), self.particle.radius, self.particle.coeff_rest,
+                                         self.particle.acc, user_inputs.wScreen, user_inputs.hScreen,
+                                         self.obstacle_bounds, (self.particle.x, self.particle.y))
+
+    def launch(self, pos):
+        """
+        Launches the particle towards the given position if it isn't already projected
+
+        Parameters
+        ----------
+        pos : tuple
+            the coordinates of the cursor
+        """
+
+        if not self.particle.projected:
+            particle = self.particle
+            particle.findInitVel(pos)
+            # the new path starts where the last one did, rather than where the resting particle is drawn
+            particle.x, particle.y = self.path_start
+            self.balls.batch.launch(particle.uX, particle.uY, particle.index)
+            self.balls.previous[particle.index] = self.path_start
+            self.launches -= 1
+            self.launch_number += 1
+
+            if self.trajectory is not None:
+                self.trajectory.beginLaunch(self.launch_number, {
+                    'seed': self.seed, 'aim_x': pos[0], 'aim_y': pos[1], 'restitution': self.particle.coeff_rest,
+                    'gravity': -self.particle.acc, 'size': self.particle.radius})
+
+            if self.burst > 1:
+                self.balls.spray(*self.path_start, self.particle.uX, self.particle.uY, self.burst - 1, self.spread,
+                                 template=self.particle.index)
+
+            if self.recorder:
+                self.recorder.launch(self.ticks, pos)
+
+    def quit(self):
+        """
+        Finishes the recording, trajectory and trace, if there are any, and closes the simulation
+        """
+
+        self.running = False
+        if self.worker is not None:
+            self.worker.stop()
+        if self.recorder:
+            self.recorder.close(self.ticks, self.score)
+        if self.trajectory is not None:
+            self.trajectory.close()
+        if self.profiler.enabled:
+            self.profiler.dumpTrace(self.trace_path)
+        pygame.quit()
+        sys.exit()
+
+    def startRun(self):
+        """
+        Gets ready to run the projection after the menu, as a new game with no score and every launch left
+        """
 
-                    if self.reset_button.isPressed(event.pos):
-                        self.running = False
+        self.score = 0
+        self.launches = 10
+        self.particle.initX, self.particle.initY = self.particle.x, self.particle.y
+        self.balls.previous[self.particle.index] = self.path_start
+        self.timestep.reset()
+        self.renderer.invalidate()
+        self.clock.tick()
 
-                        self.initialise()
+    def isIdle(self):
+        """
+        Returns whether nothing is moving, so the window only changes when there is input
+
+        Returns
+        -------
+        True if the particle and balls are at rest, the trail has faded, no moving obstacles are shown and the profiler
+        overlay is hidden
+        """
 
-                    else:
+        if self.idle_timeout is None or self.particle.projected or len(self.balls) or self.profile_shown:
+            return False
+        # the trail keeps shortening every frame after the particle stops, until it's gone
+        if self.trail_shown and self.particle.trail.count > 0:
+            return False
 
-                        if not self.particle.projected:
-                            self.particle.findInitVel()
-                            self.bounces = 0
-                            self.displayed_bounces = 0
-                            self.max_bounces = self.particle.findBounces()
-                            self.launches -= 1
-                            self.particle.projected = True
+        return not (self.obstacles_shown and any(type(obstacle) == game_objects.MovingObstacle for obstacle in self.obstacles))
 
 
 def startGame():
@@ -1,8 +1,78 @@
 import user_inputs
+import engine
+import collisions
 import pygame
 import math
-from random import randint
-pygame.init()
+import copy as copying
+import numpy as np
+import random
+
+# Point and obstacle placement all use this generator, so seeding it makes a session reproducible
+rng = random.Random()
+
+
+def batchField(name, kind=float, source='batch'):
+    """
+    Creates a property that reads and writes one value in a ParticleBatch (or PointField) array
+
+    Parameters
+    ----------
+    name : str
+        the name of the array
+    kind : type
+        the type the value is converted to when it is read
+    source : str
+        the name of the attribute that holds the batch
+
+    Returns
+    -------
+    A property for the value in the object's row of the array
+    """
+
+    def getter(self):
+        return kind(getattr(getattr(self, source), name)[self.index])
+
+    def setter(self, value):
+        getattr(getattr(self, source), name)[self.index] = value
+
+    return property(getter, setter)
+
+
+def sweptHit(start, end, rad, x, y):
+    """
+    Returns whether a particle's square hit box covers a point anywhere along the line it moved along
+
+    Parameters
+    ----------
+    start : tuple
+        the coordinates of the particle at the previous step
+    end : tuple
+        the current coordinates of the particle
+    rad : float
+        the radius of the particle
+    x,y : float
+        the coordinates of the point
+
+    Returns
+    -------
+    True if the point is hit
+    """
+
+    # find the fraction of the line (0 to 1) where the hit box covers the point, one axis at a time
+    low, high = 0.0, 1.0
+    for start_val, end_val, point_val in ((start[0], end[0], x), (start[1], end[1], y)):
+        change = end_val - start_val
+        if change == 0:
+            if abs(point_val - start_val) > rad:
+                return False
+        else:
+            enter = (point_val - rad - start_val) / change
+            leave = (point_val + rad - start_val) / change
+            low, high = max(low, min(enter, leave)), min(high, max(enter, leave))
+            if low > high:
+                return False
+
+    return True
 
 
 class Particle(object):
@@ -23,12 +93,24 @@ class Particle(object):
         final x and y components of the particle's velocity
     acc : float
         value for the acceleration of the particle
+    drag : float
+        the quadratic air resistance coefficient of the particle
     t : float
         the time elapsed in the current projection
     vel : float
         the overall velocity of the particle
     coeff_rest : float
         the value for the coefficient of restitution between the particle and walls
+    initX,initY : float
+        the coordinates the particle's current path started from
+    t : float
+        the time elapsed in the particle's current path
+    bounces : int
+        the number of times the particle has bounced vertically
+    displayed_bounces : int
+        the particle's total number of bounces
+    max_bounces : float
+        the number of times the particle will bounce before its velocity approximates zero
     trail : Trail
         an instance of the Trail class that stores the past coordinates of the particle
     launch_arrow : Arrow
@@ -37,13 +119,17 @@ class Particle(object):
         instances of Arrow class that create arrows for the x and y components of the particle's velocity
     projected : Bool
         a boolean value for whether the particle is mid-projection or not
+    batch : ParticleBatch
+        the batch of particles that stores this particle's state
+    index : int
+        the row of the batch that belongs to this particle
 
 
     Methods
     -------
-    create():
+    create(pos):
         draws the particle as a circle on the window
-    findInitVel():
+    findInitVel(mouse_pos):
         finds the initial x and y components of the velocity of the particle
     findBounces():
         calculates the number of times the particle will bounce before its velocity approximates zero
@@ -53,7 +139,21 @@ class Particle(object):
         finds the velocity and coordinates of the particle after it bounces
     """
 
-    def __init__(self, x, y, radius):
+    x, y = batchField('x'), batchField('y')
+    uX, uY = batchField('uX'), batchField('uY')
+    vX, vY = batchField('vX'), batchField('vY')
+    vel = batchField('vel')
+    radius = batchField('radius')
+    coeff_rest = batchField('coeff_rest')
+    acc = batchField('acc')
+    drag = batchField('drag')
+    projected = batchField('projected', bool)
+    initX, initY = batchField('initX'), batchField('initY')
+    t = batchField('t')
+    bounces, displayed_bounces = batchField('bounces', int), batchField('displayed_bounces', int)
+    max_bounces = batchField('max_bounces')
+
+    def __init__(self, x, y, radius, batch=None, index=0, trail_length=1000):
         """
         Initialises all the attributes of the Particle class
 
@@ -65,8 +165,17 @@ class Particle(object):
             y coordinate of the particle
         radius : int
             radius of the particle
+        batch : ParticleBatch
+            the batch that stores the particle's state (a batch of one is made if not given)
+        index : int
+            the row of the batch that belongs to the particle
+        trail_length : int
+            the maximum number of coordinates kept in the particle's trail
         """
 
+        self.batch = batch if batch is not None else engine.ParticleBatch(1)
+        self.index = index
+
         self.x = x
         self.y = y
         self.radius = radius
@@ -77,29 +186,39 @@ class Particle(object):
         self.acc = -9.81
         self.t = 0
         self.vel = 0.0
-        self.coeff_rest = None
-        self.trail = Trail()
+        self.coeff_rest = 0.0
+        self.trail = Trail(trail_length)
         self.launch_arrow = Arrow(1, user_inputs.WHITE)
         self.velx_arrow, self.vely_arrow = Arrow(3, user_inputs.RED), Arrow(3, user_inputs.RED)
         self.projected = False
 
-    def create(self):
+    def create(self, pos=None):
         """
         Draws the particle as a circle on the window
+
+        Parameters
+        ----------
+        pos : tuple
+            the coordinates to draw the particle at (defaults to its current coordinates)
+
+        Returns
+        -------
+        The Rect covered by the particle
         """
 
-        pygame.draw.circle(user_inputs.window, user_inputs.BLACK, (self.x, self.y), self.radius)
+        return user_inputs.sprite_cache.blitCircle(user_inputs.display.window, pos or (self.x, self.y), self.radius, user_inputs.BLACK)
 
-    def findInitVel(self):
+    def findInitVel(self, mouse_pos=None):
         """
         Finds the initial x and y components of the velocity of the particle
-        """
 
-        line_length = pygame.mouse.get_pos()[0] - self.x
-        line_height = self.y - pygame.mouse.get_pos()[1]
+        Parameters
+        ----------
+        mouse_pos : tuple
+            the coordinates the launch is aimed at (defaults to the current cursor position)
+        """
 
-        self.uX = line_length / 5
-        self.uY = line_height / 5
+        self.uX, self.uY = engine.launchVelocity(self.x, self.y, mouse_pos or user_inputs.display.mousePos())
 
     def findBounces(self):
         """
@@ -111,12 +230,12 @@ class Particle(object):
             the maximum number of times the particle will bounce
         """
 
-        bounce_num = math.log(1 / abs(self.uY), self.coeff_rest) if self.coeff_rest > 0 else 1
+        bounce_num = float(self.batch.findBounces(self.index))
         return bounce_num
 
     def findPath(self, initX, initY, t):
         """
-        Calculates the path of the particle by finding its new coordinates using SUVAT equations
+        Calculates the path of the particle by finding its new coordinates with the batch's integrator (SUVAT equations by default)
 
         Parameters
         ----------
@@ -129,19 +248,7 @@ class Particle(object):
         """
 
         self.trail.update((self.x, self.y))
-
-        if t == 0:
-            self.vX, self.vY = self.uX, self.vY
-            self.x, self.y = initX, initY
-
-        else:
-            sX = self.uX * t
-            sY = (self.uY * t) + (self.acc / 2 * (t ** 2))
-            self.vX = self.uX
-            self.vY = self.uY + self.acc * t
-            self.x, self.y = initX + sX, initY - sY
-
-        self.vel = math.sqrt(self.vX ** 2 + self.vY ** 2)
+        self.batch.move(initX, initY, t, self.index)
 
     def bounce(self, bounce_type):
         """
@@ -158,20 +265,8 @@ class Particle(object):
             new x and y coordinates of the particle
         """
 
-        x_sign = -1 if self.vX > 0 else 1
-        y_sign = -1 if self.vY > 0 else 1
-
-        if bounce_type == 'horizontal':
-            self.uY = self.coeff_rest * self.vY
-            self.uX = -self.coeff_rest * self.vX
-            x, y = self.x + x_sign * self.radius, self.y
-            return x, y
-
-        elif bounce_type == 'vertical':
-            self.uY = -self.coeff_rest * self.vY
-            self.uX = self.coeff_rest * self.vX
-            x, y = self.x, self.y - y_sign * self.radius
-            return x, y
+        x, y = self.batch.bounce(bounce_type, self.index)
+        return float(x), float(y)
 
 
 class Trail(object):
@@ -180,29 +275,67 @@ class Trail(object):
 
     ...
 
+    The coordinates are kept in a fixed-size ring buffer. Every coordinate is written twice, half a
+    buffer apart, so the stored trail can always be read as one slice without copying.
+
     Attributes
     ----------
-    contents : list
-        a list of (past) coordinates
+    length : int
+        the maximum number of coordinates kept in the trail
+    buffer : ndarray
+        the preallocated array the coordinates are stored in
+    start : int
+        the index of the oldest coordinate in the buffer
+    count : int
+        the number of coordinates currently in the trail
+    version : int
+        the number of times the contents of the trail have changed
 
     Methods
     -------
     update(coord):
-        adds the given coordinate to the contents of the trail and makes sure trail isn't too long
+        adds the given coordinate to the contents of the trail, overwriting the oldest one if the trail is full
+    coords():
+        returns the coordinates in the trail from oldest to newest
+    load(coords):
+        replaces the contents of the trail with the given coordinates, eg, a launch from a TrajectoryStore
+    copy(into):
+        returns a separate trail with the same coordinates
+    drop():
+        drops the oldest coordinate
+    draw():
+        draws the coordinates in the trail onto the window as a line
     plot():
-        draws the coordinates in the trail onto the window as dots
+        draws the coordinates in the trail onto the window as a line, then drops the oldest one
     """
 
-    def __init__(self):
+    def __init__(self, length=1000):
         """
         Initialises all the attributes of the Trail class
+
+        Parameters
+        ----------
+        length : int
+            the maximum number of coordinates kept in the trail
         """
 
-        self.contents = []
+        self.length = length
+        self.buffer = np.zeros((2 * length, 2))
+        self.start = 0
+        self.count = 0
+        self.version = 0
+
+    @property
+    def contents(self):
+        """
+        A list of the (past) coordinates in the trail, oldest first
+        """
+
+        return [tuple(coord) for coord in self.coords().tolist()]
 
     def update(self, coord):
         """
-        Adds the given coordinate to the contents of the trail and makes sure trail isn't too long
+        Adds the given coordinate to the contents of the trail, overwriting the oldest one if the trail is full
 
         Parameters
         ----------
@@ -210,21 +343,683 @@ class Trail(object):
             the coordinate to be added to the trail
         """
 
-        if len(self.contents) > 1000:
-            self.contents.pop(0)
-            self.update(coord)
+        end = (self.start + self.count) % self.length
+        self.buffer[end] = self.buffer[end + self.length] = coord
+
+        if self.count < self.length:
+            self.count += 1
         else:
-            self.contents.append(coord)
+            self.start = (self.start + 1) % self.length
+        self.version += 1
+
+    def coords(self):
+        """
+        Returns the coordinates in the trail from oldest to newest
+
+        Returns
+        -------
+        A (count, 2) view of the buffer
+        """
+
+        return self.buffer[self.start:self.start + self.count]
+
+    def load(self, coords):
+        """
+        Replaces the contents of the trail with the given coordinates, eg, a launch from a TrajectoryStore
+
+        Parameters
+        ----------
+        coords : ndarray
+            an (n, 2) array of coordinates, oldest first (only the newest length of them are kept)
+        """
+
+        coords = np.asarray(coords)[-self.length:]
+        self.start, self.count = 0, len(coords)
+        self.buffer[:self.count] = self.buffer[self.length:self.length + self.count] = coords
+        self.version += 1
+
+    def copy(self, into=None):
+        """
+        Returns a separate trail with the same coordinates (only as long as it needs to be)
+
+        Parameters
+        ----------
+        into : Trail
+            an existing trail, at least as long as this one, to copy the coordinates into instead of making a new one
+
+        Returns
+        -------
+        trail : Trail
+        """
+
+        trail = into if into is not None else Trail(max(1, self.count))
+        trail.load(self.coords())
+        trail.version = self.version
+        return trail
+
+    def drop(self):
+        """
+        Drops the oldest coordinate
+        """
+
+        if self.count:
+            self.start = (self.start + 1) % self.length
+            self.count -= 1
+            self.version += 1
+
+    def draw(self):
+        """
+        Draws the coordinates in the trail onto the window as a line
+
+        Returns
+        -------
+        rect : Rect
+            the Rect covered by the trail (None if the trail is empty)
+        """
+
+        if not self.count:
+            return None
+        if self.count > 1:
+            return pygame.draw.lines(user_inputs.display.window, user_inputs.WHITE, False, self.coords().tolist())
+        return user_inputs.sprite_cache.blitCircle(user_inputs.display.window, self.buffer[self.start].tolist(), 1, user_inputs.WHITE)
 
     def plot(self):
         """
-        Draws the coordinates in the trail onto the window as dots
+        Draws the coordinates in the trail onto the window as a line, then drops the oldest one
+
+        Returns
+        -------
+        rect : Rect
+            the Rect covered by the trail (None if the trail is empty)
+        """
+
+        rect = self.draw()
+        self.drop()
+        return rect
+
+
+class Balls(object):
+    """
+    A class to represent a collection of balls that are launched, moved and drawn together.
+
+    ...
+
+    Every ball is a row of one ParticleBatch, so the whole collection is moved with a single call to
+    ParticleBatch.step and each ball keeps its own time, bounce counts and trail. The first few rows can
+    be reserved for Particle objects (like the main particle): they are moved and collect points along
+    with the balls, but aren't drawn, counted, cleared or timed out with them. Balls are drawn by
+    blitting one cached sprite per ball with Surface.blits, and their trails are kept in one array of
+    short ring buffers.
+
+    Attributes
+    ----------
+    batch : ParticleBatch
+        the state of every ball
+    capacity : int
+        the most balls (including reserved rows) that can be in the collection
+    reserved : int
+        the number of rows at the start of the batch that aren't used for balls
+    trail_length : int
+        the number of past coordinates kept for each ball
+    trails : ndarray
+        a (capacity, trail_length, 2) array of each ball's past coordinates, oldest first
+    trail_count : ndarray
+        the number of past coordinates stored for each ball
+    previous : ndarray
+        a (capacity, 2) array of each ball's coordinates before the last step
+    moved : ndarray
+        the rows (reserved ones included) that moved along their paths in the last step
+    age : ndarray
+        the time each ball has been in the air for
+    lifetime : float
+        the longest time a ball stays in the air (so a ball stuck bouncing inside an obstacle goes away)
+    colour : tuple
+        RGB value for the colour of the balls
+
+
+    Methods
+    -------
+    active():
+        returns the rows of the balls in the air
+    spawn(x, y, uX, uY, template):
+        launches new balls from the given coordinates
+    spray(x, y, uX, uY, count, spread, jitter, template):
+        launches a spray of balls fanned out around a launch velocity
+    step(dt, width, height, obstacles, stepper):
+        moves every ball in the air, and the reserved rows that are projected, on by one time step
+    collect(points):
+        returns the points the balls hit during the last step
+    clear():
+        takes every ball out of the air
+    copy(into):
+        returns a separate collection of just the balls in the air
+    draw(surface, alpha, trails):
+        draws every ball in the air (and optionally their trails) in one batch of blits
+    """
+
+    def __init__(self, capacity, reserved=0, trail_length=20, lifetime=30.0, colour=(60, 60, 60)):
+        """
+        Initialises all the attributes of the Balls class
+
+        Parameters
+        ----------
+        capacity : int
+            the most balls (including reserved rows) that can be in the collection
+        reserved : int
+            the number of rows at the start of the batch that aren't used for balls
+        trail_length : int
+            the number of past coordinates kept for each ball
+        lifetime : float
+            the longest time a ball stays in the air
+        colour : tuple
+            RGB value for the colour of the balls
+        """
+
+        self.batch = engine.ParticleBatch(capacity)
+        self.capacity = capacity
+        self.reserved = reserved
+        self.trail_length = trail_length
+        self.trails = np.zeros((capacity, trail_length, 2))
+        self.trail_count = np.zeros(capacity, dtype=int)
+        self.previous = np.zeros((capacity, 2))
+        self.moved = np.zeros(0, dtype=int)
+        self.age = np.zeros(capacity)
+        self.lifetime = lifetime
+        self.colour = colour
+
+    def __len__(self):
+        return len(self.active())
+
+    def active(self):
+        """
+        Returns the rows of the balls in the air
+
+        Returns
+        -------
+        An array of row indices
+        """
+
+        return np.flatnonzero(self.batch.projected[self.reserved:]) + self.reserved
+
+    def spawn(self, x, y, uX, uY, template=None):
+        """
+        Launches new balls from the given coordinates, as many as there is room for
+
+        Parameters
+        ----------
+        x,y : float
+            the coordinates the balls are launched from
+        uX,uY : ndarray
+            the initial x and y components of each new ball's velocity
+        template : int
+            a row (eg, a reserved Particle's) to copy the radius, restitution, acceleration and drag from
+
+        Returns
+        -------
+        rows : ndarray
+            the rows of the new balls
+        """
+
+        b = self.batch
+        free = np.flatnonzero(~b.projected[self.reserved:]) + self.reserved
+        rows = free[:np.size(uX)]
+        count = rows.size
+
+        if template is not None:
+            for name in ('radius', 'coeff_rest', 'acc', 'drag'):
+                getattr(b, name)[rows] = getattr(b, name)[template]
+
+        b.x[rows], b.y[rows] = x, y
+        b.launch(np.asarray(uX, dtype=float)[:count], np.asarray(uY, dtype=float)[:count], rows)
+        b.findPath(b.x[rows], b.y[rows], 0, rows)
+
+        self.previous[rows] = (x, y)
+        self.trail_count[rows] = 0
+        self.age[rows] = 0
+        return rows
+
+    def spray(self, x, y, uX, uY, count, spread=0.5, jitter=0.1, template=None):
+        """
+        Launches a spray of balls fanned out around a launch velocity
+
+        Parameters
+        ----------
+        x,y : float
+            the coordinates the balls are launched from
+        uX,uY : float
+            the launch velocity the spray is centred on
+        count : int
+            the number of balls
+        spread : float
+            the angle (in radians) the spray is fanned out over
+        jitter : float
+            the most each ball's speed is randomly changed by, as a fraction
+        template : int
+            a row to copy the radius, restitution, acceleration and drag from
+
+        Returns
+        -------
+        rows : ndarray
+            the rows of the new balls
+        """
+
+        # the random angles and speeds come from rng so seeded sessions still replay exactly
+        turns = np.array([rng.uniform(-spread / 2, spread / 2) for i in range(count)])
+        scales = np.array([rng.uniform(1 - jitter, 1 + jitter) for i in range(count)])
+
+        cos, sin = np.cos(turns), np.sin(turns)
+        return self.spawn(x, y, (uX * cos - uY * sin) * scales, (uX * sin + uY * cos) * scales, template)
+
+    def step(self, dt, width, height, obstacles=None, stepper=None, profiler=None):
+        """
+        Moves every ball in the air, and the reserved rows that are projected, on by one time step
+
+        Parameters
+        ----------
+        dt : float
+            the length of the time step
+        width,height : int
+            the size of the area the balls bounce around in
+        obstacles : ObstacleBroadPhase
+            a broad phase over the obstacles to check for, or an (n, 3) array of their left, right and top (optional)
+        stepper : EventStepper
+            moves the balls from collision to collision instead, with only the given obstacles checked for
+            (the walls and the obstacles it was made with are solved for exactly)
+        profiler : FrameProfiler
+            times the obstacle checks as the collision phase (optional)
+
+        Returns
+        -------
+        rows : ndarray
+            the rows that were in the air
+        """
+
+        b = self.batch
+        rows = np.flatnonzero(b.projected)
+        if not rows.size:
+            self.moved = rows
+            return rows
+
+        # a single row (usually just the particle) is picked out with a slice, which is quicker than a list of rows
+        index = slice(rows[0], rows[0] + 1) if rows.size == 1 else rows
+        self.moved = rows[b.bounces[index] < b.max_bounces[index]]
+
+        self.previous[index, 0], self.previous[index, 1] = b.x[index], b.y[index]
+
+        # the trails are shifted along by one so each stays oldest first and can be drawn straight away
+        self.trails[index, :-1] = self.trails[index, 1:]
+        self.trails[index, -1] = self.previous[index]
+        self.trail_count[index] = np.minimum(self.trail_count[index] + 1, self.trail_length)
+
+        if stepper is None:
+            b.step(dt, width, height, obstacles, rows, profiler)
+        else:
+            stepper.step(dt, rows, obstacles, profiler=profiler)
+
+        balls = rows[rows >= self.reserved]
+        self.age[balls] += dt
+        expired = balls[self.age[balls] > self.lifetime]
+        b.projected[expired] = False
+
+        return rows
+
+    def collect(self, points):
+        """
+        Returns the points the balls (and reserved rows) hit during the last step and marks them as collected
+
+        Parameters
+        ----------
+        points : PointField
+            the points that can be collected
+
+        Returns
+        -------
+        An array with the indices of the points that were hit
+        """
+
+        rows = self.moved
+        if not rows.size or not len(points):
+            return np.zeros(0, dtype=int)
+
+        b = self.batch
+        if rows.size == 1:
+            # one row (usually just the particle) is tested on its own, without setting up arrays of pairs
+            row = rows[0]
+            return points.collidesSwept(self.previous[row].tolist(), (float(b.x[row]), float(b.y[row])), float(b.radius[row]))
+
+        return points.collidesSweptMany(self.previous[rows], np.column_stack((b.x[rows], b.y[rows])), b.radius[rows])
+
+    def clear(self):
+        """
+        Takes every ball out of the air
+        """
+
+        self.batch.projected[self.reserved:] = False
+        self.moved = self.moved[self.moved < self.reserved]
+
+    def copy(self, into=None):
+        """
+        Returns a separate collection of just the balls in the air, with everything needed to draw them
+
+        Parameters
+        ----------
+        into : Balls
+            an existing collection with no reserved rows, room for every ball and the same trail length, to copy the
+            balls into instead of making a new one
+
+        Returns
+        -------
+        balls : Balls
+        """
+
+        rows = self.active()
+        count = rows.size
+        balls = into if into is not None else Balls(max(1, count), 0, self.trail_length, self.lifetime, self.colour)
+
+        for name in ('x', 'y', 'radius', 'projected'):
+            getattr(balls.batch, name)[:count] = getattr(self.batch, name)[rows]
+        for name in ('trails', 'trail_count', 'previous', 'age'):
+            getattr(balls, name)[:count] = getattr(self, name)[rows]
+        balls.batch.projected[count:] = False
+
+        return balls
+
+    def draw(self, surface=None, alpha=1.0, trails=False):
+        """
+        Draws every ball in the air (and optionally their trails) in one batch of blits
+
+        Parameters
+        ----------
+        surface : Surface
+            the surface to draw on (defaults to the window)
+        alpha : float
+            how far between the last two steps to draw the balls (see FixedTimestep.alpha)
+        trails : Bool
+            whether each ball's trail is drawn too
+
+        Returns
+        -------
+        The Rect covered by the balls (None if none are in the air)
+        """
+
+        rows = self.active()
+        if not rows.size:
+            return None
+
+        surface = surface if surface is not None else user_inputs.display.window
+        b = self.batch
+
+        rects = []
+        if trails:
+            for row, trail in zip(rows.tolist(), self.trails[rows].tolist()):
+                count = self.trail_count[row]
+                if count > 1:
+                    rects.append(pygame.draw.lines(surface, user_inputs.WHITE, False, trail[-count:]))
+
+        previous = self.previous[rows]
+        positions = previous + (np.column_stack((b.x[rows], b.y[rows])) - previous) * alpha
+        radii = b.radius[rows]
+        for radius in np.unique(radii).tolist():
+            rects += user_inputs.sprite_cache.blitCircles(surface, positions[radii == radius], radius, self.colour)
+
+        return rects[0].unionall(rects[1:])
+
+
+class PointField(object):
+    """
+    A class to represent all the collectable points, with their state stored as NumPy arrays.
+
+    ...
+
+    Each point is one element of the arrays, so the particle can be tested against every point at once
+    and collected points can be respawned in place. Point objects for single points are only made when
+    they are asked for, and read and write the arrays directly. The rows are also filed in a PointGrid,
+    which collidesSwept uses to find the few points near the particle before testing them, so points
+    should only be moved with respawn, which keeps the grid up to date.
+
+    Attributes
+    ----------
+    size : int
+        the number of points
+    x,y : ndarray
+        the x and y coordinates of each point
+    collected : ndarray
+        boolean values for whether each point has been collected
+    radius : int
+        the radius each point is drawn with
+    grid : PointGrid
+        the row of each point, filed by its coordinates
+
+
+    Methods
+    -------
+    respawn(rows):
+        moves the given points to new random positions and makes them collectable again
+    copy():
+        returns a separate field with the same points
+    coords():
+        returns the coordinates of every point
+    collides(coords, rad):
+        returns the points the particle hits
+    collidesSwept(start, end, rad):
+        returns the points the particle hits anywhere along the line it moved along
+    collidesSweptMany(starts, ends, rad):
+        returns the points any of a number of particles hit along the lines they moved along
+    draw(surface):
+        draws every point on the window as a small yellow circle
+    """
+
+    # up to this many candidates are tested one at a time, which is quicker than setting up array operations
+    scalar_limit = 24
+
+    def __init__(self, size, radius=5, cell_size=50):
+        """
+        Initialises all the attributes of the PointField class
+
+        Parameters
+        ----------
+        size : int
+            the number of points
+        radius : int
+            the radius each point is drawn with
+        cell_size : float
+            the width and height of each cell of the grid the points are filed in
+        """
+
+        self.size = size
+        self.x = np.zeros(size, dtype=np.int32)
+        self.y = np.zeros(size, dtype=np.int32)
+        self.collected = np.zeros(size, dtype=bool)
+        self.radius = radius
+        self.grid = collisions.PointGrid(cell_size)
+        self._views = {}
+
+        self.respawn()
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not -self.size <= index < self.size:
+            raise IndexError('point index out of range')
+
+        index %= self.size
+        # views are kept so the same point always gives the same object (eg, as a dictionary key)
+        if index not in self._views:
+            self._views[index] = Point(self, index)
+        return self._views[index]
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield self[index]
+
+    def copy(self):
+        """
+        Returns a separate field with the same points (without placing any new ones)
+
+        Returns
+        -------
+        field : PointField
+        """
+
+        field = copying.copy(self)
+        field.x, field.y, field.collected = self.x.copy(), self.y.copy(), self.collected.copy()
+        field.grid = self.grid.copy()
+        field._views = {}
+        return field
+
+    def respawn(self, rows=None):
+        """
+        Moves the given points to new random positions and makes them collectable again
+
+        Parameters
+        ----------
+        rows : iterable
+            the indices of the points to respawn (defaults to every point)
+        """
+
+        for row in range(self.size) if rows is None else rows:
+            # drawn one point at a time, x then y, so a seed places the points the same way Point always has
+            x = rng.randint(10, user_inputs.wScreen - 10)
+            y = rng.randint(10, user_inputs.hScreen - 10)
+            self.x[row], self.y[row] = x, y
+            self.collected[row] = False
+            self.grid.move(int(row), (x, y))
+
+    def coords(self):
+        """
+        Returns the coordinates of every point
+
+        Returns
+        -------
+        An (n, 2) array of coordinates
+        """
+
+        return np.column_stack((self.x, self.y))
+
+    def collides(self, coords, rad):
+        """
+        Returns the points the particle hits and marks them as collected
+
+        Parameters
+        ----------
+        coords : tuple
+            the coordinates of the particle
+        rad : float
+            the radius of the particle
+
+        Returns
+        -------
+        An array with the indices of the points that were hit (points already collected are left out)
+        """
+
+        hit = ~self.collected & (np.abs(self.x - coords[0]) <= rad) & (np.abs(self.y - coords[1]) <= rad)
+        rows = np.flatnonzero(hit)
+        self.collected[rows] = True
+        return rows
+
+    def collidesSwept(self, start, end, rad):
+        """
+        Returns the points the particle hits anywhere along the line it moved along and marks them as collected
+
+        This is the same test as Point.collidesSwept. Only the points the grid finds near the line are
+        tested: one at a time if there are only a few of them, otherwise all at once.
+
+        Parameters
+        ----------
+        start : tuple
+            the coordinates of the particle at the previous step
+        end : tuple
+            the current coordinates of the particle
+        rad : float
+            the radius of the particle
+
+        Returns
+        -------
+        An array with the indices of the points that were hit, in order (points already collected are left out)
+        """
+
+        found = self.grid.locateSwept(start, end, rad)
+        collected = self.collected
+
+        if len(found) <= self.scalar_limit:
+            rows = sorted(row for row, (x, y) in found.items() if not collected[row] and sweptHit(start, end, rad, x, y))
+            rows = np.array(rows, dtype=int)
+            collected[rows] = True
+            return rows
+
+        candidates = np.sort(np.fromiter(found, dtype=int, count=len(found)))
+        hit = ~collected[candidates]
+        low, high = 0.0, 1.0
+
+        for start_val, end_val, values in ((start[0], end[0], self.x[candidates]), (start[1], end[1], self.y[candidates])):
+            change = end_val - start_val
+            if change == 0:
+                hit &= np.abs(values - start_val) <= rad
+            else:
+                enter = (values - rad - start_val) / change
+                leave = (values + rad - start_val) / change
+                low, high = np.maximum(low, np.minimum(enter, leave)), np.minimum(high, np.maximum(enter, leave))
+
+        hit &= low <= high
+        rows = candidates[hit]
+        collected[rows] = True
+        return rows
+
+    def collidesSweptMany(self, starts, ends, rad):
+        """
+        Returns the points any of a number of particles hit along the lines they moved along and marks them as collected
+
+        The grid is asked for the points in the cells around each particle's line, for every particle at once,
+        and then every (particle, point) pair it finds is tested at once.
+
+        Parameters
+        ----------
+        starts,ends : ndarray
+            (n, 2) arrays of the coordinates of each particle at the previous step and now
+        rad : float or ndarray
+            the radius of each particle
+
+        Returns
+        -------
+        An array with the indices of the points that were hit, in order (points already collected are left out)
+        """
+
+        rad = np.broadcast_to(np.asarray(rad, dtype=float), (len(starts),))
+        low, high = np.minimum(starts, ends) - rad[:, None], np.maximum(starts, ends) + rad[:, None]
+        bodies, candidates = self.grid.locateBoxes(low[:, 0], low[:, 1], high[:, 0], high[:, 1])
+
+        hit = ~self.collected[candidates]
+        rad = rad[bodies]
+        low, high = np.zeros(candidates.size), np.ones(candidates.size)
+
+        for axis, values in enumerate((self.x[candidates], self.y[candidates])):
+            start_val, change = starts[bodies, axis], ends[bodies, axis] - starts[bodies, axis]
+            still = change == 0
+            hit &= ~still | (np.abs(values - start_val) <= rad)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                enter = (values - rad - start_val) / change
+                leave = (values + rad - start_val) / change
+            low = np.where(still, low, np.maximum(low, np.minimum(enter, leave)))
+            high = np.where(still, high, np.minimum(high, np.maximum(enter, leave)))
+
+        rows = np.unique(candidates[hit & (low <= high)])
+        self.collected[rows] = True
+        return rows
+
+    def draw(self, surface=None):
+        """
+        Draws every point on the window as a small yellow circle, in one batch of blits
+
+        Parameters
+        ----------
+        surface : Surface
+            the surface to draw on (defaults to the window)
         """
 
-        if self.contents:
-            for coord in self.contents:
-                pygame.draw.circle(user_inputs.window, user_inputs.WHITE, coord, 1)
-            self.contents.pop(0)
+        surface = surface if surface is not None else user_inputs.display.window
+        user_inputs.sprite_cache.blitCircles(surface, self.coords(), self.radius, user_inputs.YELLOW, False)
 
 
 class Point(object):
@@ -239,28 +1034,61 @@ class Point(object):
             the x and y coordinates of the point
         collected : Bool
             a boolean value representing whether the point has been collected or not
+        field : PointField
+            the field that stores the point's state
+        index : int
+            the element of the field's arrays that belongs to the point
 
         Methods
         -------
-        create():
+        create(surface):
             draws the point on the window as a small yellow circle
         collides(coords, rad):
             returns whether the particle hits the point
+        collidesSwept(start, end, rad):
+            returns whether the particle hits the point anywhere along the line it moved along
+        respawn():
+            moves the point to a new random position and makes it collectable again
         """
 
-    def __init__(self):
+    x, y = batchField('x', int, 'field'), batchField('y', int, 'field')
+    collected = batchField('collected', bool, 'field')
+
+    def __init__(self, field=None, index=0):
         """
         Initialises all the attributes of the Point class
+
+        Parameters
+        ----------
+        field : PointField
+            the field that stores the point's state (a field of one randomly placed point is made if not given)
+        index : int
+            the element of the field's arrays that belongs to the point
+        """
+        self.field = field if field is not None else PointField(1)
+        self.index = index
+
+    def respawn(self):
         """
-        self.x = randint(10, user_inputs.wScreen - 10)
-        self.y = randint(10, user_inputs.hScreen - 10)
-        self.collected = False
+        Moves the point to a new random position and makes it collectable again
+        """
+        self.field.respawn((self.index,))
 
-    def create(self):
+    def create(self, surface=None):
         """
         Draws the point on the window as a small yellow circle
+
+        Parameters
+        ----------
+        surface : Surface
+            the surface to draw on (defaults to the window)
+
+        Returns
+        -------
+        The Rect covered by the point
         """
-        pygame.draw.circle(user_inputs.window, user_inputs.YELLOW, (self.x, self.y), 5)
+        return user_inputs.sprite_cache.blitCircle(surface if surface is not None else user_inputs.display.window, (self.x, self.y),
+                                                   self.field.radius, user_inputs.YELLOW)
 
     def collides(self, coords, rad):
         """
@@ -282,6 +1110,33 @@ class Point(object):
             self.collected = True
             return True
 
+    def collidesSwept(self, start, end, rad):
+        """
+        Returns whether the particle hits the point anywhere along the line it moved along
+
+        This uses the same square hit box as collides, so a fast particle can't skip over a point
+        between two steps.
+
+        Parameters
+        ----------
+        start : tuple
+            the coordinates of the particle at the previous step
+        end : tuple
+            the current coordinates of the particle
+        rad : float
+            the radius of the particle
+
+        Returns
+        -------
+        True if the point is hit
+        """
+
+        if not sweptHit(start, end, rad, self.x, self.y):
+            return False
+
+        self.collected = True
+        return True
+
 
 class Obstacle(object):
     """
@@ -302,7 +1157,7 @@ class Obstacle(object):
 
         Methods
         -------
-        draw():
+        draw(surface):
             draws the obstacle on the window
         checkCollision():
             checks whether the particle hits the obstacle
@@ -317,17 +1172,26 @@ class Obstacle(object):
         r : radius of the particle
         """
 
-        self.x = randint(0, user_inputs.wScreen/2 - r - 50) or randint(user_inputs.wScreen/2 + r, user_inputs.wScreen - 50)
-        self.y = randint(0, user_inputs.hScreen - 50)
+        self.x = rng.randint(0, user_inputs.wScreen/2 - r - 50) or rng.randint(user_inputs.wScreen/2 + r, user_inputs.wScreen - 50)
+        self.y = rng.randint(0, user_inputs.hScreen - 50)
         self.width = 50
         self.height = user_inputs.hScreen - self.y
         self.shape = pygame.Rect(self.x, self.y, self.width, self.height)
 
-    def draw(self):
+    def draw(self, surface=None):
         """
         Draws the obstacle on the window
+
+        Parameters
+        ----------
+        surface : Surface
+            the surface to draw on (defaults to the window)
+
+        Returns
+        -------
+        The Rect covered by the obstacle
         """
-        pygame.draw.rect(user_inputs.window, user_inputs.BLUE, self.shape)
+        return pygame.draw.rect(surface if surface is not None else user_inputs.display.window, user_inputs.BLUE, self.shape)
 
     def checkCollision(self, coords, rad):
         """
@@ -372,6 +1236,8 @@ class MovingObstacle(Obstacle):
     -------
     update():
         moves the obstacle to its new position
+    copy(into):
+        returns a separate obstacle where this one is now, which doesn't move with it
     """
 
     def __init__(self, r):
@@ -385,8 +1251,8 @@ class MovingObstacle(Obstacle):
 
         super().__init__(r)
         self.initial_x = self.x
-        self.speed = randint(1,5)/10
-        self.range = randint(100,400)
+        self.speed = rng.randint(1,5)/10
+        self.range = rng.randint(100,400)
         self.direction = 1
 
     def update(self):
@@ -400,6 +1266,29 @@ class MovingObstacle(Obstacle):
         if self.x >= self.initial_x+self.range or self.x <= self.initial_x-self.range:
             self.direction *= -1
 
+    def copy(self, into=None):
+        """
+        Returns a separate obstacle where this one is now, which doesn't move with it
+
+        Parameters
+        ----------
+        into : MovingObstacle
+            an earlier copy of this obstacle to move to where it is now instead of making a new one
+
+        Returns
+        -------
+        obstacle : MovingObstacle
+        """
+
+        if into is not None:
+            into.x, into.direction = self.x, self.direction
+            into.shape.x = self.shape.x
+            return into
+
+        obstacle = copying.copy(self)
+        obstacle.shape = self.shape.copy()
+        return obstacle
+
 
 class Arrow(object):
     """
@@ -443,23 +1332,22 @@ class Arrow(object):
     def draw(self):
         """
         Draws the arrow on the window
+
+        Returns
+        -------
+        rect : Rect
+            the Rect covered by the arrow
         """
 
-        pygame.draw.line(user_inputs.window, self.colour, self.start, self.end, self.thickness)
+        rect = pygame.draw.line(user_inputs.display.window, self.colour, self.start, self.end, self.thickness)
 
         horizontal = self.end[0] - self.start[0]
         vertical = self.end[1] - self.start[1]
         angle = math.atan2(vertical, horizontal)
 
-        arrowhead_points = [
-            self.end,
-            (self.end[0] + 15 * math.cos(angle + math.pi * 5 / 6),
-             self.end[1] + 15 * math.sin(angle + math.pi * 5 / 6)),
-
-            (self.end[0] + 15 * math.cos(angle - math.pi * 5 / 6),
-             self.end[1] + 15 * math.sin(angle - math.pi * 5 / 6))
-        ]
+        # the arrowhead is a cached sprite, rotated to the nearest of a fixed set of angles
+        arrowhead, (offset_x, offset_y) = user_inputs.sprite_cache.arrowhead(angle, 15, self.thickness, self.colour)
+        rect.union_ip(user_inputs.display.window.blit(arrowhead, (self.end[0] + offset_x, self.end[1] + offset_y)))
 
-        pygame.draw.line(user_inputs.window, self.colour, self.end, arrowhead_points[1], self.thickness)
-        pygame.draw.line(user_inputs.window, self.colour, self.end, arrowhead_points[2], self.thickness)
+        return rect
 
@@ -0,0 +1,522 @@
+import math
+import numpy as np
+
+import engine
+
+
+def derivatives(x, y, vX, vY, acc, drag):
+    """
+    Works out how fast the position and velocity of particles are changing
+
+    Velocities are measured upwards like in the SUVAT equations, while y is measured downwards like on
+    the window. Air resistance is quadratic: it acts against the velocity with a size of drag * speed^2.
+
+    Parameters
+    ----------
+    x,y : ndarray
+        the coordinates of the particles
+    vX,vY : ndarray
+        the x and y components of the particles' velocities
+    acc : ndarray
+        the acceleration due to gravity
+    drag : ndarray
+        the drag coefficient of each particle
+
+    Returns
+    -------
+    A tuple with the rates of change of x, y, vX and vY
+    """
+
+    speed = np.hypot(vX, vY)
+    return vX, -vY, -drag * speed * vX, acc - drag * speed * vY
+
+
+class Integrator(object):
+    """
+    A class to represent a way of moving particles along their paths.
+
+    ...
+
+    An integrator is given to a ParticleBatch, which hands every findPath-style move to advance(). The
+    numerical integrators here step the particles' positions and velocities on from where the last move
+    left them, so unlike the SUVAT equations they can include air resistance. Every integrator counts
+    the steps it takes and how many times it works out the derivatives, and keeps the largest error it
+    estimated for a single step, so they can be compared on cost and accuracy.
+
+    Attributes
+    ----------
+    name : str
+        the name the integrator is reported under
+    order : int
+        the order of accuracy of the method
+    closed_form : Bool
+        a boolean value for whether paths are worked out exactly (only possible without air resistance)
+    max_step : float
+        the longest single step taken
+    estimate_error : Bool
+        a boolean value for whether fixed step integrators estimate their error (by step doubling, which costs extra)
+    steps : int
+        the number of steps taken, added up over every particle
+    evaluations : int
+        the number of times the derivatives were worked out, added up over every particle
+    error : float
+        the largest error estimated for a single move
+
+
+    Methods
+    -------
+    reset():
+        sets the counters back to zero
+    report():
+        returns the counters
+    advance(batch, initX, initY, t, rows):
+        moves the given particles to a time t into their current paths
+    """
+
+    name = 'integrator'
+    order = 1
+    closed_form = False
+
+    def __init__(self, max_step=0.05, estimate_error=False):
+        """
+        Initialises all the attributes of the Integrator class
+
+        Parameters
+        ----------
+        max_step : float
+            the longest single step taken
+        estimate_error : Bool
+            whether fixed step integrators estimate their error by also taking every step as two half steps
+        """
+
+        self.max_step = max_step
+        self.estimate_error = estimate_error
+        self.reset()
+
+    def reset(self):
+        """
+        Sets the counters back to zero
+        """
+
+        self.steps = 0
+        self.evaluations = 0
+        self.error = 0.0
+
+    def report(self):
+        """
+        Returns the counters
+
+        Returns
+        -------
+        A dictionary with the integrator's name, steps, evaluations and largest estimated error
+        """
+
+        return {'name': self.name, 'steps': self.steps, 'evaluations': self.evaluations, 'error': self.error}
+
+    def advance(self, batch, initX, initY, t, rows=slice(None)):
+        """
+        Moves the given particles to a time t into their current paths
+
+        A particle's path restarts (from initX, initY with velocity uX, uY) whenever t is zero or goes back
+        in time, which is what happens at a launch or a bounce. At t = 0 the final y velocity is left as it
+        was, exactly like ParticleBatch.findPath.
+
+        Parameters
+        ----------
+        batch : ParticleBatch
+            the particles
+        initX,initY : float or ndarray
+            the coordinates the particles' current paths started from
+        t : float or ndarray
+            the time elapsed in the particles' current paths
+        rows : int, slice or ndarray
+            the particles to move (defaults to the whole batch)
+        """
+
+        rows = np.arange(batch.size)[rows] if isinstance(rows, slice) else np.atleast_1d(rows)
+        initX, initY, t = (np.asarray(value, dtype=float) for value in (initX, initY, t))
+
+        previous = batch.moved_to[rows]
+        restart = (previous <= 0) | (t <= previous)
+
+        x = np.where(restart, initX, batch.x[rows])
+        y = np.where(restart, initY, batch.y[rows])
+        vX = np.where(restart, batch.uX[rows], batch.vX[rows])
+        vY = np.where(restart, batch.uY[rows], batch.vY[rows])
+        dt = np.where(restart, t, t - previous)
+
+        x, y, vX, vY = self.integrate(x, y, vX, vY, batch.acc[rows], batch.drag[rows], batch.radius[rows], dt)
+
+        batch.x[rows] = x
+        batch.y[rows] = y
+        batch.vX[rows] = vX
+        batch.vY[rows] = np.where(t == 0, batch.vY[rows], vY)
+        batch.moved_to[rows] = t
+        batch.vel[rows] = np.hypot(batch.vX[rows], batch.vY[rows])
+
+    def integrate(self, x, y, vX, vY, acc, drag, radius, dt):
+        """
+        Steps the given states on by dt (each subclass does this its own way)
+        """
+
+        raise NotImplementedError
+
+    def step(self, x, y, vX, vY, acc, drag, h):
+        """
+        Takes one step of length h (fixed step subclasses do this their own way)
+        """
+
+        raise NotImplementedError
+
+    def _fixed(self, x, y, vX, vY, acc, drag, dt, count):
+        """
+        Steps the given states on by dt in count equal steps
+        """
+
+        h = dt / count
+        for i in range(count):
+            x, y, vX, vY = self.step(x, y, vX, vY, acc, drag, h)
+        return x, y, vX, vY
+
+    def _integrateFixed(self, x, y, vX, vY, acc, drag, dt):
+        """
+        Steps the given states on by dt in equal steps no longer than max_step, estimating the error if asked to
+        """
+
+        count = max(1, math.ceil(float(np.max(dt, initial=0)) / self.max_step - 1e-9))
+        result = self._fixed(x, y, vX, vY, acc, drag, dt, count)
+        self.steps += count * np.size(dt)
+
+        if self.estimate_error:
+            # Richardson's estimate: the half steps are more accurate by a factor of 2^order
+            halves = self._fixed(x, y, vX, vY, acc, drag, dt, 2 * count)
+            difference = np.hypot(result[0] - halves[0], result[1] - halves[1])
+            self.error = max(self.error, float(np.max(difference, initial=0)) / (2 ** self.order - 1))
+
+        return result
+
+
+class ClosedForm(Integrator):
+    """
+    A class to represent the SUVAT equations as an integrator.
+
+    ...
+
+    Every move is worked out exactly in one step with ParticleBatch.findPath, so the error is always zero,
+    but air resistance isn't possible.
+    """
+
+    name = 'closed form'
+    order = math.inf
+    closed_form = True
+
+    def advance(self, batch, initX, initY, t, rows=slice(None)):
+        if np.any(batch.drag[rows]):
+            raise ValueError('the SUVAT equations can\'t include air resistance, use a numerical integrator instead')
+
+        batch.findPath(initX, initY, t, rows)
+        batch.moved_to[rows] = t
+
+        count = np.size(batch.x[rows])
+        self.steps += count
+        self.evaluations += count
+
+
+class SemiImplicitEuler(Integrator):
+    """
+    A class to represent the semi-implicit (symplectic) Euler method.
+
+    ...
+
+    The velocity is updated first and the new velocity is used to move the particle, which keeps the
+    energy of a bouncing particle from drifting even though the method is only first order.
+    """
+
+    name = 'semi-implicit Euler'
+    order = 1
+
+    def step(self, x, y, vX, vY, acc, drag, h):
+        dx, dy, dvX, dvY = derivatives(x, y, vX, vY, acc, drag)
+        self.evaluations += np.size(x)
+
+        vX, vY = vX + dvX * h, vY + dvY * h
+        return x + vX * h, y - vY * h, vX, vY
+
+    def integrate(self, x, y, vX, vY, acc, drag, radius, dt):
+        return self._integrateFixed(x, y, vX, vY, acc, drag, dt)
+
+
+class RK4(Integrator):
+    """
+    A class to represent the classic fourth order Runge-Kutta method with a fixed step.
+    """
+
+    name = 'RK4'
+    order = 4
+
+    def step(self, x, y, vX, vY, acc, drag, h):
+        state = np.array((x, y, vX, vY))
+
+        k1 = np.array(derivatives(*state, acc, drag))
+        k2 = np.array(derivatives(*(state + h / 2 * k1), acc, drag))
+        k3 = np.array(derivatives(*(state + h / 2 * k2), acc, drag))
+        k4 = np.array(derivatives(*(state + h * k3), acc, drag))
+        self.evaluations += 4 * np.size(x)
+
+        return tuple(state + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4))
+
+    def integrate(self, x, y, vX, vY, acc, drag, radius, dt):
+        return self._integrateFixed(x, y, vX, vY, acc, drag, dt)
+
+
+class RK45(Integrator):
+    """
+    A class to represent the adaptive Dormand-Prince Runge-Kutta 5(4) method.
+
+    ...
+
+    Each step is taken with a fifth and an embedded fourth order formula, and the difference between
+    them is the error estimate: steps whose error is more than the tolerance are taken again with a
+    shorter step, and the next step is lengthened or shortened to aim for the tolerance. The step the
+    error controller settles on is kept from one call to the next, so a smooth arc is crossed in one
+    step per tick instead of being worked up to again every tick. If the size of the area is given, a
+    step also never goes past the time the particle would next reach a wall (or the floor or ceiling),
+    so the contact is landed on rather than stepped over. The last stage of each step is the first
+    stage of the next one, so an accepted step costs six evaluations of the derivatives.
+
+    Attributes
+    ----------
+    tolerance : float
+        the largest error (in pixels or pixels per unit time) allowed in one step
+    min_step : float
+        the shortest step taken, whatever the error
+    bounds : tuple
+        the width and height of the area the particles bounce around in (None doesn't look for contacts)
+    proposed : float or ndarray
+        the step the error controller chose for each particle at the end of the last call (None before the first)
+    rejected : int
+        the number of steps that were taken again with a shorter step
+    """
+
+    name = 'RK45'
+    order = 5
+
+    # the Dormand-Prince tableau
+    C = (0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1, 1)
+    A = (
+        (),
+        (1 / 5,),
+        (3 / 40, 9 / 40),
+        (44 / 45, -56 / 15, 32 / 9),
+        (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+        (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+        (35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+    )
+    B5 = (35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0)
+    B4 = (5179 / 57600, 0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40)
+    # the differences between the fifth and fourth order weights, which give the error estimate directly
+    E = tuple(b5 - b4 for b5, b4 in zip(B5, B4))
+    # the same weights as arrays, so each stage is combined from the ones before it in one matrix product
+    A_WEIGHTS = np.array([(weights + (0,) * 7)[:7] for weights in A])
+    E_WEIGHTS = np.array(E)
+
+    def __init__(self, tolerance=1e-3, max_step=1.0, min_step=1e-4, bounds=None):
+        """
+        Initialises all the attributes of the RK45 class
+
+        Parameters
+        ----------
+        tolerance : float
+            the largest error (in pixels or pixels per unit time) allowed in one step
+        max_step : float
+            the longest single step taken
+        min_step : float
+            the shortest step taken, whatever the error
+        bounds : tuple
+            the width and height of the area the particles bounce around in (optional)
+        """
+
+        self.tolerance = tolerance
+        self.min_step = min_step
+        self.bounds = bounds
+        super().__init__(max_step)
+
+    def reset(self):
+        super().reset()
+        self.rejected = 0
+        self.proposed = None
+
+    def report(self):
+        report = super().report()
+        report['rejected'] = self.rejected
+        return report
+
+    def _contactStep(self, x, y, vX, vY, acc, radius):
+        """
+        Returns the time until the particles would next reach a wall, the floor or the ceiling
+
+        The time is solved for on a SUVAT path (see engine.timeOfImpact), leaving out air resistance, so it
+        is only an estimate for particles with drag, but it is worked out again at the start of every step.
+        """
+
+        t_x, t_y = engine.timeOfImpact(x, y, vX, vY, acc, radius, *self.bounds)
+        return np.minimum(t_x, t_y)
+
+    def _nextStep(self, h, step, error, accepted):
+        """
+        Returns the step the error controller aims for next, from the step just taken and its error
+
+        A step that was cut short (by the end of the call or a contact) and accepted doesn't make the
+        next one any shorter than the one that was aimed for.
+        """
+
+        with np.errstate(divide='ignore'):
+            factor = np.clip(0.9 * (self.tolerance / error) ** (1 / 5), 0.2, 5.0)
+        aimed = step * factor
+        return np.minimum(np.where(accepted & (step < h), np.maximum(h, aimed), aimed), self.max_step)
+
+    def integrate(self, x, y, vX, vY, acc, drag, radius, dt):
+        state = np.array((x, y, vX, vY), dtype=float)
+        count = state.shape[1]
+        remaining = np.array(dt, dtype=float)
+        proposed = self.proposed
+        h = np.array(proposed if proposed is not None and np.shape(proposed) == remaining.shape
+                     else np.minimum(remaining, self.max_step), dtype=float)
+
+        # every stage of every particle, so a stage is combined from the ones before it in one matrix product
+        stages = np.empty((len(self.A), 4, count))
+        stages[0] = derivatives(*state, acc, drag)
+        self.evaluations += count
+
+        # the contact is solved for once, and only again for particles that have landed on it
+        contact = self._contactStep(*state, acc, radius) if self.bounds is not None else None
+
+        while True:
+            active = np.flatnonzero(remaining > 1e-12)
+            if not active.size:
+                break
+            # while every particle is still going, which is usually the case, they are picked out with a slice
+            index = slice(None) if active.size == count else active
+
+            s, a, d, k = state[:, index], acc[index], drag[index], stages[:, :, index]
+            step = np.minimum(h[index], remaining[index])
+            if contact is not None:
+                step = np.minimum(step, contact[index])
+            step = np.minimum(np.maximum(step, self.min_step), remaining[index])
+
+            flat = k.reshape(len(self.A), -1)
+            for i in range(1, len(self.A)):
+                stage = s + step * (self.A_WEIGHTS[i, :i] @ flat[:i]).reshape(s.shape)
+                k[i] = derivatives(*stage, a, d)
+            self.evaluations += (len(self.A) - 1) * active.size
+
+            # the last row of the tableau is the fifth order formula, so its stage was taken at the new state
+            fifth = stage
+            error = np.abs(step * (self.E_WEIGHTS @ flat).reshape(s.shape)).max(axis=0)
+
+            accepted = (error <= self.tolerance) | (step <= self.min_step)
+            self.steps += active.size
+            self.rejected += int(np.count_nonzero(~accepted))
+            if accepted.any():
+                self.error = max(self.error, float(error[accepted].max()))
+
+            done = active[accepted]
+            state[:, done] = fifth[:, accepted]
+            stages[0][:, done] = k[-1][:, accepted]
+            remaining[done] -= step[accepted]
+            h[index] = self._nextStep(h[index], step, error, accepted)
+
+            if contact is not None:
+                contact[done] -= step[accepted]
+                landed = done[contact[done] <= 1e-12]
+                if landed.size:
+                    contact[landed] = self._contactStep(*state[:, landed], acc[landed], radius[landed])
+
+        self.proposed = h
+        return tuple(state)
+
+
+def compareIntegrators(integrators, uX=60, uY=40, acc=-9.81, drag=0.0, duration=5.0, dt=0.05, reference=None):
+    """
+    Moves one particle along the same path with each integrator and measures how far each one goes wrong
+
+    The particle is moved on one tick of dt at a time, like in the game, with no walls in the way. The
+    true path is worked out with the SUVAT equations when there is no air resistance, and otherwise
+    with a very accurate RK45.
+
+    Parameters
+    ----------
+    integrators : list
+        the integrators to compare (their counters are reset first)
+    uX,uY : float
+        the initial x and y components of the velocity
+    acc : float
+        the acceleration due to gravity
+    drag : float
+        the drag coefficient
+    duration : float
+        how long the path is followed for
+    dt : float
+        the length of one tick
+    reference : Integrator
+        the integrator the others are compared against (defaults to the most accurate one available)
+
+    Returns
+    -------
+    results : list
+        one report per integrator, each with the largest distance (in pixels) from the true path added as 'actual_error'
+    """
+
+    if reference is None:
+        reference = ClosedForm() if drag == 0 else RK45(tolerance=1e-10, max_step=dt / 8)
+
+    ticks = np.arange(1, int(round(duration / dt)) + 1) * dt
+
+    def path(integrator):
+        batch = engine.ParticleBatch(1, acc=acc, integrator=integrator, drag=drag)
+        batch.launch(uX, uY)
+        points = []
+        for t in ticks:
+            batch.move(0.0, 0.0, t)
+            points.append((batch.x[0], batch.y[0]))
+        return np.array(points)
+
+    true_path = path(reference)
+
+    results = []
+    for integrator in integrators:
+        integrator.reset()
+        difference = np.hypot(*(path(integrator) - true_path).T)
+        report = integrator.report()
+        report['actual_error'] = float(difference.max())
+        results.append(report)
+
+    return results
+
+
+def cheapestIntegrator(tolerance, integrators=None, **path):
+    """
+    Returns the integrator that stays within a tolerance of the true path for the fewest evaluations
+
+    Parameters
+    ----------
+    tolerance : float
+        the largest distance (in pixels) allowed from the true path
+    integrators : list
+        the integrators to choose from (defaults to one of each kind with their default settings)
+    path :
+        any of the path options taken by compareIntegrators
+
+    Returns
+    -------
+    The cheapest accurate enough integrator (None if none of them are)
+    """
+
+    if integrators is None:
+        integrators = [SemiImplicitEuler(), RK4(), RK45()]
+        if not path.get('drag'):
+            integrators.insert(0, ClosedForm())
+
+    results = compareIntegrators(integrators, **path)
+    accurate = [(result['evaluations'], index) for index, result in enumerate(results) if result['actual_error'] <= tolerance]
+    return integrators[min(accurate)[1]] if accurate else None
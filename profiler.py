@@ -0,0 +1,222 @@
+import json
+import os
+import time
+from collections import deque
+
+
+class FrameProfiler(object):
+    """
+    A class to represent a profiler that times each phase of every frame.
+
+    ...
+
+    Phases are timed with push(name) and pop(), and can be nested: time spent in an inner phase isn't
+    counted in the phase around it. Each frame's time per phase is kept for the last few hundred frames
+    so rolling percentiles can be shown, and every phase is also recorded as a Chrome trace event that
+    can be opened in chrome://tracing or Perfetto. When the profiler is disabled every method returns
+    straight away.
+
+    Attributes
+    ----------
+    enabled : Bool
+        a boolean value for whether anything is timed
+    window : int
+        the number of frames the percentiles are worked out over
+    samples : dict
+        the time (in seconds) spent in each phase in each recent frame, keyed by the phase's name
+    trace : deque
+        the most recent Chrome trace events
+    frame_count : int
+        the number of frames profiled
+    summary_every : int
+        the number of frames between updates to the overlay text
+    summary : list
+        the lines of text shown in the overlay
+
+
+    Methods
+    -------
+    beginFrame():
+        starts timing a new frame
+    endFrame():
+        stops timing the current frame and stores its phase times
+    push(name):
+        starts timing a phase, pausing the one it is inside
+    pop():
+        stops timing the current phase and resumes the one it was inside
+    percentiles(name, percents):
+        returns the rolling percentiles of a phase's time in milliseconds
+    summaryLines():
+        returns a line of text with the p50/p95/p99 times for each phase
+    dumpTrace(path):
+        writes the recorded trace events to a Chrome trace JSON file
+    """
+
+    def __init__(self, enabled=False, window=300, max_events=200000, summary_every=30):
+        """
+        Initialises all the attributes of the FrameProfiler class
+
+        Parameters
+        ----------
+        enabled : Bool
+            whether anything is timed
+        window : int
+            the number of frames the percentiles are worked out over
+        max_events : int
+            the most trace events kept (the oldest are dropped first)
+        summary_every : int
+            the number of frames between updates to the overlay text
+        """
+
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.trace = deque(maxlen=max_events)
+        self.frame_count = 0
+        self.summary_every = summary_every
+        self.summary = []
+
+        self._origin = time.perf_counter()
+        self._stack = []
+        self._frame_times = {}
+        self._frame_start = None
+
+    def beginFrame(self):
+        """
+        Starts timing a new frame
+        """
+
+        if not self.enabled:
+            return
+
+        self._frame_times = {}
+        self._frame_start = time.perf_counter()
+
+    def endFrame(self):
+        """
+        Stops timing the current frame and stores its phase times
+        """
+
+        if not self.enabled or self._frame_start is None:
+            return
+
+        now = time.perf_counter()
+        self._frame_times['frame'] = now - self._frame_start
+        self._event('frame', self._frame_start, now)
+
+        for name, duration in self._frame_times.items():
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+            self.samples[name].append(duration)
+
+        # phases that didn't happen this frame count as zero so the percentiles stay per frame
+        for name, durations in self.samples.items():
+            if name not in self._frame_times:
+                durations.append(0.0)
+
+        self.frame_count += 1
+        self._frame_start = None
+
+        if self.frame_count % self.summary_every == 0:
+            self.summary = self.summaryLines()
+
+    def push(self, name):
+        """
+        Starts timing a phase, pausing the one it is inside
+
+        Parameters
+        ----------
+        name : str
+            the name of the phase
+        """
+
+        if not self.enabled:
+            return
+
+        now = time.perf_counter()
+        if self._stack:
+            outer = self._stack[-1]
+            self._frame_times[outer[0]] = self._frame_times.get(outer[0], 0.0) + now - outer[2]
+
+        self._stack.append([name, now, now])
+
+    def pop(self):
+        """
+        Stops timing the current phase and resumes the one it was inside
+        """
+
+        if not self.enabled or not self._stack:
+            return
+
+        now = time.perf_counter()
+        name, start, resumed = self._stack.pop()
+        self._frame_times[name] = self._frame_times.get(name, 0.0) + now - resumed
+        self._event(name, start, now)
+
+        if self._stack:
+            self._stack[-1][2] = now
+
+    def _event(self, name, start, end):
+        """
+        Records a Chrome trace 'complete' event (times are in microseconds)
+        """
+
+        self.trace.append({
+            'name': name,
+            'ph': 'X',
+            'ts': (start - self._origin) * 1e6,
+            'dur': (end - start) * 1e6,
+            'pid': os.getpid(),
+            'tid': 0,
+        })
+
+    def percentiles(self, name, percents=(50, 95, 99)):
+        """
+        Returns the rolling percentiles of a phase's time in milliseconds
+
+        Parameters
+        ----------
+        name : str
+            the name of the phase
+        percents : tuple
+            the percentiles to work out
+
+        Returns
+        -------
+        A list with one value (in milliseconds) for each percentile (empty if the phase hasn't been timed)
+        """
+
+        durations = sorted(self.samples.get(name, ()))
+        if not durations:
+            return []
+
+        return [durations[min(len(durations) - 1, int(len(durations) * percent / 100))] * 1000 for percent in percents]
+
+    def summaryLines(self):
+        """
+        Returns a line of text with the p50/p95/p99 times for each phase
+
+        Returns
+        -------
+        A list of strings
+        """
+
+        lines = []
+        for name in self.samples:
+            p50, p95, p99 = self.percentiles(name)
+            lines.append(f'{name}: {p50:.1f} / {p95:.1f} / {p99:.1f} ms')
+
+        return lines
+
+    def dumpTrace(self, path):
+        """
+        Writes the recorded trace events to a Chrome trace JSON file
+
+        Parameters
+        ----------
+        path : str
+            the file to write
+        """
+
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': list(self.trace), 'displayTimeUnit': 'ms'}, file)
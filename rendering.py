@@ -0,0 +1,767 @@
+import os
+import math
+import pygame
+import numpy as np
+from collections import OrderedDict
+
+
+class DirtyRectRenderer(object):
+    """
+    A class to represent a renderer that only pushes the changed parts of the window to the display.
+
+    ...
+
+    Everything drawn in a frame is marked with a key (usually the object that drew it) and the Rect it
+    covered. When the frame is presented, only keys whose Rect changed since the last frame, appeared or
+    disappeared are updated, so anything that didn't move or change isn't sent to the display again.
+    Keys for things whose look can change without moving (like text) should include what they show.
+
+    Attributes
+    ----------
+    size : tuple
+        the width and height of the window
+    full_threshold : float
+        the fraction of the window that can be dirty before the whole window is updated instead
+    update : function
+        the function that pushes the window (or a list of Rects in it) to the screen
+    previous : dict
+        the Rects marked in the last frame, keyed by what drew them
+    current : dict
+        the Rects marked so far in this frame, keyed by what drew them
+    full_update : Bool
+        a boolean value for whether the next frame has to update the whole window
+    full_frames : int
+        the number of frames that updated the whole window
+    partial_frames : int
+        the number of frames that only updated dirty rects
+
+
+    Methods
+    -------
+    mark(key, rect):
+        records the area drawn by something in this frame
+    invalidate():
+        makes the next frame update the whole window
+    dirtyRects():
+        returns the areas that changed since the last frame
+    present():
+        updates the changed areas of the display and starts a new frame
+    """
+
+    def __init__(self, size, full_threshold=0.5, update=None):
+        """
+        Initialises all the attributes of the DirtyRectRenderer class
+
+        Parameters
+        ----------
+        size : tuple
+            the width and height of the window
+        full_threshold : float
+            the fraction of the window that can be dirty before the whole window is updated instead
+        update : function
+            the function that pushes the window (or a list of Rects in it) to the screen (defaults to pygame.display.update)
+        """
+
+        self.size = size
+        self.full_threshold = full_threshold
+        self.update = update or pygame.display.update
+        self.previous = {}
+        self.current = {}
+        self.full_update = True
+        self.full_frames = 0
+        self.partial_frames = 0
+
+    def mark(self, key, rect):
+        """
+        Records the area drawn by something in this frame
+
+        Parameters
+        ----------
+        key : hashable
+            what drew the area, eg, the object itself or a tuple with the text it showed
+        rect : Rect
+            the area that was drawn (None is ignored)
+        """
+
+        if rect is None:
+            return
+
+        if key in self.current:
+            self.current[key] = self.current[key].union(rect)
+        else:
+            self.current[key] = pygame.Rect(rect)
+
+    def invalidate(self):
+        """
+        Makes the next frame update the whole window
+        """
+
+        self.full_update = True
+
+    def dirtyRects(self):
+        """
+        Returns the areas that changed since the last frame
+
+        Returns
+        -------
+        dirty : list
+            a list of Rects that need to be updated on the display
+        """
+
+        dirty = []
+
+        for key, rect in self.current.items():
+            old_rect = self.previous.get(key)
+            if old_rect != rect:
+                dirty.append(rect)
+                if old_rect is not None:
+                    dirty.append(old_rect)
+
+        for key, old_rect in self.previous.items():
+            if key not in self.current:
+                dirty.append(old_rect)
+
+        return dirty
+
+    def present(self):
+        """
+        Updates the changed areas of the display and starts a new frame
+
+        Returns
+        -------
+        dirty : list
+            the Rects that were updated (empty if the whole window was updated)
+        """
+
+        dirty = [] if self.full_update else self.dirtyRects()
+        dirty_area = sum(rect.width * rect.height for rect in dirty)
+
+        if self.full_update or dirty_area > self.full_threshold * self.size[0] * self.size[1]:
+            self.update()
+            self.full_frames += 1
+            dirty = []
+        else:
+            if dirty:
+                self.update(dirty)
+            self.partial_frames += 1
+
+        self.full_update = False
+        self.previous, self.current = self.current, {}
+        return dirty
+
+
+class TextCache(object):
+    """
+    A class to represent a cache of rendered text surfaces.
+
+    ...
+
+    Surfaces are keyed by (font, text, antialias, colour) and the least recently used one is thrown
+    away once the cache is full, so text that changes every frame can't make the cache grow forever.
+
+    Attributes
+    ----------
+    max_size : int
+        the maximum number of surfaces kept in the cache
+    surfaces : OrderedDict
+        the cached surfaces, from least to most recently used
+    hits : int
+        the number of times a surface was found in the cache
+    misses : int
+        the number of times a surface had to be rendered
+    evictions : int
+        the number of surfaces thrown away to make room
+
+
+    Methods
+    -------
+    render(font, text, antialias, colour):
+        returns the surface for the given text, rendering it only if it isn't cached
+    clear():
+        empties the cache and resets the counters
+    """
+
+    def __init__(self, max_size=256):
+        """
+        Initialises all the attributes of the TextCache class
+
+        Parameters
+        ----------
+        max_size : int
+            the maximum number of surfaces kept in the cache
+        """
+
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, antialias, colour):
+        """
+        Returns the surface for the given text, rendering it only if it isn't cached
+
+        Parameters
+        ----------
+        font : Font
+            the font to render the text with
+        text : str
+            the text to render
+        antialias : Bool
+            whether the text has smooth edges
+        colour : tuple
+            RGB value for the colour of the text
+
+        Returns
+        -------
+        surface : Surface
+            the rendered text (it is shared, so it shouldn't be drawn on)
+        """
+
+        key = (font, text, antialias, tuple(colour))
+        surface = self.surfaces.get(key)
+
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, colour)
+        self.surfaces[key] = surface
+
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+
+        return surface
+
+    def clear(self):
+        """
+        Empties the cache and resets the counters
+        """
+
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class SpriteCache(object):
+    """
+    A class to represent a cache of pre-rendered sprites for the shapes drawn every frame.
+
+    ...
+
+    Circles are keyed by ('circle', radius, colour) and arrowheads by ('arrowhead', length, thickness,
+    colour, angle step), with the arrowhead's angle rounded to one of a fixed number of steps so only a
+    small set of rotated sprites is ever rendered. Sprites use an RLE-accelerated colour key rather than
+    per-pixel alpha, which blits faster than pygame.draw.circle draws, and the least recently used one is
+    thrown away once the cache is full.
+
+    Attributes
+    ----------
+    max_size : int
+        the maximum number of sprites kept in the cache
+    angle_steps : int
+        the number of angles a full turn is split into for the arrowhead sprites
+    sprites : OrderedDict
+        the cached (sprite, offset) pairs, from least to most recently used
+    hits : int
+        the number of times a sprite was found in the cache
+    misses : int
+        the number of times a sprite had to be rendered
+    evictions : int
+        the number of sprites thrown away to make room
+
+
+    Methods
+    -------
+    circle(radius, colour):
+        returns the sprite for a filled circle and the offset from its centre to the sprite's corner
+    arrowhead(angle, length, thickness, colour):
+        returns the sprite for an arrowhead pointing at the given angle and the offset from its tip to the sprite's corner
+    blitCircle(surface, pos, radius, colour):
+        draws a cached circle centred on the given coordinates
+    blitCircles(surface, positions, radius, colour):
+        draws a cached circle centred on each of the given coordinates in one batch of blits
+    clear():
+        empties the cache and resets the counters
+    """
+
+    def __init__(self, max_size=256, angle_steps=72):
+        """
+        Initialises all the attributes of the SpriteCache class
+
+        Parameters
+        ----------
+        max_size : int
+            the maximum number of sprites kept in the cache
+        angle_steps : int
+            the number of angles a full turn is split into for the arrowhead sprites
+        """
+
+        self.max_size = max_size
+        self.angle_steps = angle_steps
+        self.sprites = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, key):
+        """
+        Returns the cached (sprite, offset) pair for the key (None if it isn't cached)
+        """
+
+        sprite = self.sprites.get(key)
+
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+
+        return sprite
+
+    def _store(self, key, sprite):
+        """
+        Caches a newly rendered (sprite, offset) pair, throwing away the least recently used one if the cache is full
+        """
+
+        self.misses += 1
+        self.sprites[key] = sprite
+
+        if len(self.sprites) > self.max_size:
+            self.sprites.popitem(last=False)
+            self.evictions += 1
+
+        return sprite
+
+    @staticmethod
+    def _blank(size, colour):
+        """
+        Returns a transparent surface of the given size to draw a sprite of the given colour on
+        """
+
+        key = (255, 0, 255) if tuple(colour) != (255, 0, 255) else (0, 255, 255)
+        sprite = pygame.Surface(size)
+        sprite.fill(key)
+        sprite.set_colorkey(key, pygame.RLEACCEL)
+        return sprite
+
+    def circle(self, radius, colour):
+        """
+        Returns the sprite for a filled circle and the offset from its centre to the sprite's corner
+
+        Parameters
+        ----------
+        radius : float
+            the radius of the circle (rounded to a whole number of pixels)
+        colour : tuple
+            RGB value for the colour of the circle
+
+        Returns
+        -------
+        sprite : Surface
+            the rendered circle (it is shared, so it shouldn't be drawn on)
+        offset : tuple
+            what to add to the circle's centre to get the coordinates to blit the sprite at
+        """
+
+        key = ('circle', radius, colour)
+        sprite = self._get(key)
+        if sprite is not None:
+            return sprite
+
+        size = max(1, int(round(radius)))
+        sprite = self._blank((2 * size, 2 * size), colour)
+        pygame.draw.circle(sprite, colour, (size, size), size)
+        return self._store(key, (sprite, (-size, -size)))
+
+    def arrowhead(self, angle, length, thickness, colour):
+        """
+        Returns the sprite for an arrowhead pointing at the given angle and the offset from its tip to the sprite's corner
+
+        Parameters
+        ----------
+        angle : float
+            the direction (in radians) the arrow points in
+        length : int
+            the length of each side of the arrowhead
+        thickness : int
+            the thickness of the sides
+        colour : tuple
+            RGB value for the colour of the arrowhead
+
+        Returns
+        -------
+        sprite : Surface
+            the rendered arrowhead (it is shared, so it shouldn't be drawn on)
+        offset : tuple
+            what to add to the arrow's tip to get the coordinates to blit the sprite at
+        """
+
+        step = round(angle / (2 * math.pi) * self.angle_steps) % self.angle_steps
+        key = ('arrowhead', length, thickness, colour, step)
+        sprite = self._get(key)
+        if sprite is not None:
+            return sprite
+
+        size = length + thickness
+        sprite = self._blank((2 * size + 1, 2 * size + 1), colour)
+        quantized = step * 2 * math.pi / self.angle_steps
+        for side in (math.pi * 5 / 6, -math.pi * 5 / 6):
+            end = (size + length * math.cos(quantized + side), size + length * math.sin(quantized + side))
+            pygame.draw.line(sprite, colour, (size, size), end, thickness)
+        return self._store(key, (sprite, (-size, -size)))
+
+    def blitCircle(self, surface, pos, radius, colour):
+        """
+        Draws a cached circle centred on the given coordinates
+
+        Parameters
+        ----------
+        surface : Surface
+            the surface to draw on
+        pos : tuple
+            the coordinates of the centre of the circle
+        radius : float
+            the radius of the circle
+        colour : tuple
+            RGB value for the colour of the circle
+
+        Returns
+        -------
+        The Rect covered by the circle
+        """
+
+        sprite, (offset_x, offset_y) = self.circle(radius, colour)
+        return surface.blit(sprite, (pos[0] + offset_x, pos[1] + offset_y))
+
+    def blitCircles(self, surface, positions, radius, colour, doreturn=True):
+        """
+        Draws a cached circle centred on each of the given coordinates in one batch of blits
+
+        Parameters
+        ----------
+        surface : Surface
+            the surface to draw on
+        positions : ndarray
+            an (n, 2) array of the coordinates of the centre of each circle
+        radius : float
+            the radius of the circles
+        colour : tuple
+            RGB value for the colour of the circles
+        doreturn : Bool
+            whether the Rects covered by the circles are returned
+
+        Returns
+        -------
+        A list with the Rect covered by each circle (None if doreturn is False)
+        """
+
+        sprite, offset = self.circle(radius, colour)
+        corners = (np.asarray(positions, dtype=float).reshape(-1, 2) + offset).tolist()
+        return surface.blits([(sprite, corner) for corner in corners], doreturn)
+
+    def clear(self):
+        """
+        Empties the cache and resets the counters
+        """
+
+        self.sprites.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class StaticLayer(object):
+    """
+    A class to represent a pre-rendered layer for the parts of the window that rarely change.
+
+    ...
+
+    The layer is only redrawn after it has been invalidated, otherwise it is blitted onto the window in
+    one call.
+
+    Attributes
+    ----------
+    colour : tuple
+        RGB value for the background colour of the layer
+    surface : Surface
+        the pre-rendered layer (created the first time it is drawn)
+    valid : Bool
+        a boolean value for whether the surface is up to date
+    version : int
+        the number of times the layer has been redrawn
+
+
+    Methods
+    -------
+    invalidate():
+        makes the layer redraw itself the next time it is blitted
+    blit(target, draw):
+        redraws the layer if it is out of date and blits it onto the target surface
+    """
+
+    def __init__(self, colour):
+        """
+        Initialises all the attributes of the StaticLayer class
+
+        Parameters
+        ----------
+        colour : tuple
+            RGB value for the background colour of the layer
+        """
+
+        self.colour = colour
+        self.surface = None
+        self.valid = False
+        self.version = 0
+
+    def invalidate(self):
+        """
+        Makes the layer redraw itself the next time it is blitted
+        """
+
+        self.valid = False
+
+    def blit(self, target, draw):
+        """
+        Redraws the layer if it is out of date and blits it onto the target surface
+
+        Parameters
+        ----------
+        target : Surface
+            the surface the layer is blitted onto
+        draw : function
+            a function that takes a surface and draws the static objects onto it
+
+        Returns
+        -------
+        The Rect covered by the layer
+        """
+
+        if self.surface is None or self.surface.get_size() != target.get_size():
+            self.surface = pygame.Surface(target.get_size(), 0, target)
+            self.valid = False
+
+        if not self.valid:
+            self.surface.fill(self.colour)
+            draw(self.surface)
+            self.valid = True
+            self.version += 1
+
+        return target.blit(self.surface, (0, 0))
+
+
+class Display(object):
+    """
+    A class to represent the window, font and input the simulation draws to and reads from.
+
+    ...
+
+    Nothing is created until it is first used, so the game objects can be imported without opening a
+    window. In headless mode the window is an ordinary offscreen Surface (no video driver is needed),
+    updating the display does nothing, and the mouse position and events come from whatever has been
+    queued with moveMouse() and postEvent().
+
+    Attributes
+    ----------
+    size : tuple
+        the width and height of the window
+    caption : str
+        the title of the window
+    headless : Bool
+        a boolean value for whether everything is drawn offscreen
+    mouse_pos : tuple
+        the cursor position reported in headless mode
+    pending : list
+        the events waiting to be returned by events() in headless mode
+
+
+    Methods
+    -------
+    window:
+        the Surface everything is drawn onto (created the first time it is used)
+    font:
+        the font used for all text (created the first time it is used)
+    update(rects):
+        pushes the window (or just the given parts of it) to the screen
+    mousePos():
+        returns the current cursor position
+    moveMouse(pos):
+        sets the cursor position reported in headless mode
+    events():
+        returns and clears the pending input events
+    waitEvents(timeout):
+        waits for input events (up to timeout milliseconds), then returns and clears them
+    postEvent(event):
+        queues an input event
+    """
+
+    def __init__(self, size, caption='Projectile Simulation', headless=None):
+        """
+        Initialises all the attributes of the Display class
+
+        Parameters
+        ----------
+        size : tuple
+            the width and height of the window
+        caption : str
+            the title of the window
+        headless : Bool
+            whether to draw offscreen (defaults to True if the PROJECTILES_HEADLESS environment variable is 1)
+        """
+
+        self.size = size
+        self.caption = caption
+        self.headless = os.environ.get('PROJECTILES_HEADLESS') == '1' if headless is None else headless
+        self.mouse_pos = (0, 0)
+        self.pending = []
+        self._window = None
+        self._font = None
+
+    @property
+    def window(self):
+        """
+        The Surface everything is drawn onto (created the first time it is used)
+        """
+
+        if self._window is None:
+            if self.headless:
+                self._window = pygame.Surface(self.size)
+            else:
+                pygame.init()
+                self._window = pygame.display.set_mode(self.size)
+                pygame.display.set_caption(self.caption)
+
+        return self._window
+
+    @property
+    def font(self):
+        """
+        The font used for all text (created the first time it is used)
+        """
+
+        if self._font is None:
+            pygame.font.init()
+            self._font = pygame.font.SysFont('Ariel', 30)
+
+        return self._font
+
+    def update(self, rects=None):
+        """
+        Pushes the window (or just the given parts of it) to the screen
+
+        Parameters
+        ----------
+        rects : list
+            the parts of the window to update (defaults to all of it)
+        """
+
+        if self.headless or self._window is None:
+            return
+
+        if rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+
+    def mousePos(self):
+        """
+        Returns the current cursor position
+
+        Returns
+        -------
+        A tuple with the coordinates of the cursor
+        """
+
+        return self.mouse_pos if self.headless else pygame.mouse.get_pos()
+
+    def moveMouse(self, pos):
+        """
+        Sets the cursor position reported in headless mode
+
+        Parameters
+        ----------
+        pos : tuple
+            the new coordinates of the cursor
+        """
+
+        self.mouse_pos = pos
+
+    def events(self):
+        """
+        Returns and clears the pending input events
+
+        Returns
+        -------
+        A list of pygame events
+        """
+
+        if not self.headless:
+            return pygame.event.get()
+
+        events, self.pending = self.pending, []
+        return events
+
+    def waitEvents(self, timeout):
+        """
+        Waits for input events (up to timeout milliseconds), then returns and clears them
+
+        The process sleeps while it waits instead of spinning, which is what lets an idle window drop
+        to almost no CPU. In headless mode nothing else can post events, so this never waits.
+
+        Parameters
+        ----------
+        timeout : int
+            the longest time to wait for in milliseconds
+
+        Returns
+        -------
+        A list of pygame events (empty if none came before the timeout)
+        """
+
+        if self.headless:
+            return self.events()
+
+        event = pygame.event.wait(timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def postEvent(self, event):
+        """
+        Queues an input event
+
+        Parameters
+        ----------
+        event : Event
+            the pygame event to queue
+        """
+
+        if self.headless:
+            self.pending.append(event)
+        else:
+            pygame.event.post(event)
+
+
+def coalesceMotion(events):
+    """
+    Drops every MOUSEMOTION event but the last, so a burst of movement is only handled once per frame
+
+    Parameters
+    ----------
+    events : list
+        pygame events in the order they happened
+
+    Returns
+    -------
+    A list of the events with the last MOUSEMOTION event kept where it was
+    """
+
+    last_motion = None
+    for i, event in enumerate(events):
+        if event.type == pygame.MOUSEMOTION:
+            last_motion = i
+
+    return [event for i, event in enumerate(events) if event.type != pygame.MOUSEMOTION or i == last_motion]
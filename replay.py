@@ -0,0 +1,348 @@
+import math
+import struct
+import sys
+
+import integrators
+
+HEADER = struct.Struct('<4sBQ')
+OPTIONS = struct.Struct('<HddBd')
+INTEGRATOR = struct.Struct('<16sddddd')
+RECORD = struct.Struct('<BI')
+SETTINGS = struct.Struct('<Bddd')
+LAUNCH = struct.Struct('<hh')
+END = struct.Struct('<i')
+
+MAGIC = b'PRJR'
+VERSION = 2
+
+SETTINGS_RECORD, LAUNCH_RECORD, END_RECORD = 1, 2, 3
+
+TRAIL_FLAG, VELOCITY_FLAG, OBSTACLES_FLAG, PREVIEW_FLAG = 1, 2, 4, 8
+
+# the Game options that change how a session plays out, so they are kept in the header
+GAME_OPTIONS = ('burst', 'spread', 'drag', 'event_driven', 'tick_rate', 'integrator')
+INTEGRATOR_KINDS = {kind.name: kind for kind in (integrators.ClosedForm, integrators.SemiImplicitEuler, integrators.RK4, integrators.RK45)}
+
+
+def packIntegrator(integrator):
+    """
+    Packs the kind and settings of an integrator for the header of a log
+
+    Parameters
+    ----------
+    integrator : Integrator
+        the integrator
+
+    Returns
+    -------
+    The packed bytes (settings the integrator doesn't have are stored as nan)
+    """
+
+    bounds = getattr(integrator, 'bounds', None) or (math.nan, math.nan)
+    return INTEGRATOR.pack(integrator.name.encode(), integrator.max_step, getattr(integrator, 'tolerance', math.nan),
+                           getattr(integrator, 'min_step', math.nan), *bounds)
+
+
+def unpackIntegrator(data, offset=0):
+    """
+    Makes a new integrator from the kind and settings packed by packIntegrator
+
+    Parameters
+    ----------
+    data : bytes
+        the log
+    offset : int
+        where the integrator starts in the log
+
+    Returns
+    -------
+    integrator : Integrator
+    """
+
+    name, max_step, tolerance, min_step, width, height = INTEGRATOR.unpack_from(data, offset)
+    kind = INTEGRATOR_KINDS[name.rstrip(b'\0').decode()]
+
+    if kind is integrators.RK45:
+        return kind(tolerance, max_step, min_step, None if math.isnan(width) else (width, height))
+    return kind(max_step)
+
+
+class Recorder(object):
+    """
+    A class to represent a recorder that logs everything needed to replay a session.
+
+    ...
+
+    The log is a small binary file: a header with the random seed and the Game options that change how
+    the session plays out (see GAME_OPTIONS), then one record for each time the menu is left (with the
+    button and slider settings) and each launch (with where it was aimed), each tagged with the physics
+    tick it happened on, and finally the score.
+
+    Attributes
+    ----------
+    path : str
+        the file the log is written to
+    seed : int
+        the seed the session's random number generator was started with
+    options : dict
+        the Game options the session was started with, keyed by their names in GAME_OPTIONS
+    data : bytearray
+        the log so far
+
+
+    Methods
+    -------
+    settings(tick, trail, velocity, obstacles, preview, restitution, size, gravity):
+        records the settings chosen on the menu
+    launch(tick, pos):
+        records a launch aimed at the given position
+    close(tick, score):
+        records the final score and writes the log to its file
+    """
+
+    def __init__(self, path, seed, burst=1, spread=0.5, drag=0.0, event_driven=False, tick_rate=60, integrator=None):
+        """
+        Initialises all the attributes of the Recorder class
+
+        Parameters
+        ----------
+        path : str
+            the file the log is written to
+        seed : int
+            the seed the session's random number generator was started with
+        burst : int
+            the number of balls launched each time, including the particle
+        spread : float
+            the angle (in radians) the extra balls are fanned out over
+        drag : float
+            the quadratic air resistance coefficient of the particle
+        event_driven : Bool
+            whether collisions are solved for exactly instead of checked every tick
+        tick_rate : float
+            the number of physics ticks per second of real time
+        integrator : Integrator
+            the integrator the Game moves the particle with (defaults to the closed form)
+        """
+
+        self.path = path
+        self.seed = seed
+        integrator = integrator if integrator is not None else integrators.ClosedForm()
+        self.options = {'burst': burst, 'spread': spread, 'drag': drag, 'event_driven': event_driven, 'tick_rate': tick_rate,
+                        'integrator': integrator}
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, seed) + OPTIONS.pack(burst, spread, drag, event_driven, tick_rate)
+                              + packIntegrator(integrator))
+
+    def settings(self, tick, trail, velocity, obstacles, preview, restitution, size, gravity):
+        """
+        Records the settings chosen on the menu
+
+        Parameters
+        ----------
+        tick : int
+            the physics tick the menu was left on
+        trail, velocity, obstacles, preview : Bool
+            whether each of the menu's buttons was pressed
+        restitution, size, gravity : float
+            the values of the menu's sliders
+        """
+
+        flags = (TRAIL_FLAG * trail) | (VELOCITY_FLAG * velocity) | (OBSTACLES_FLAG * obstacles) | (PREVIEW_FLAG * preview)
+        self.data += RECORD.pack(SETTINGS_RECORD, tick) + SETTINGS.pack(flags, restitution, size, gravity)
+
+    def launch(self, tick, pos):
+        """
+        Records a launch aimed at the given position
+
+        Parameters
+        ----------
+        tick : int
+            the physics tick the launch happened before
+        pos : tuple
+            the coordinates of the cursor when the particle was launched
+        """
+
+        self.data += RECORD.pack(LAUNCH_RECORD, tick) + LAUNCH.pack(int(pos[0]), int(pos[1]))
+
+    def close(self, tick, score):
+        """
+        Records the final score and writes the log to its file
+
+        Parameters
+        ----------
+        tick : int
+            the last physics tick of the session
+        score : int
+            the final score
+        """
+
+        self.data += RECORD.pack(END_RECORD, tick) + END.pack(score)
+
+        with open(self.path, 'wb') as file:
+            file.write(self.data)
+
+
+def readLog(path):
+    """
+    Reads a log written by a Recorder
+
+    Parameters
+    ----------
+    path : str
+        the file to read
+
+    Returns
+    -------
+    seed : int
+        the seed the session's random number generator was started with
+    options : dict
+        the Game options the session was started with, keyed by their names in GAME_OPTIONS
+    records : list
+        a list of (record type, tick, values) tuples in the order they were recorded
+    """
+
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, version, seed = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path} is not a version {VERSION} replay log')
+
+    burst, spread, drag, event_driven, tick_rate = OPTIONS.unpack_from(data, HEADER.size)
+    options = {'burst': burst, 'spread': spread, 'drag': drag, 'event_driven': bool(event_driven), 'tick_rate': tick_rate,
+               'integrator': unpackIntegrator(data, HEADER.size + OPTIONS.size)}
+
+    records = []
+    offset = HEADER.size + OPTIONS.size + INTEGRATOR.size
+    payloads = {SETTINGS_RECORD: SETTINGS, LAUNCH_RECORD: LAUNCH, END_RECORD: END}
+
+    while offset < len(data):
+        kind, tick = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        payload = payloads[kind]
+        records.append((kind, tick, payload.unpack_from(data, offset)))
+        offset += payload.size
+
+    return seed, options, records
+
+
+class Replayer(object):
+    """
+    A class to represent a replayer that drives a Game through a recorded session.
+
+    ...
+
+    The game is run headlessly, one physics tick after another with no frame limit, and every recorded
+    settings change and launch is applied before the tick it was recorded on, so the session plays out
+    exactly as it did live. The game is made with the options in the log's header, and a log can't be
+    replayed with different ones.
+
+    Attributes
+    ----------
+    seed : int
+        the seed the session's random number generator was started with
+    options : dict
+        the Game options the session was recorded with
+    records : list
+        the recorded (record type, tick, values) tuples
+    game : Game
+        the game being replayed
+    trajectory : list
+        the particle's (tick, x, y) after every tick it was projected, if it is being kept
+
+
+    Methods
+    -------
+    run(keep_trajectory, render_every):
+        replays the whole session and returns the result
+    """
+
+    def __init__(self, path, **game_options):
+        """
+        Initialises all the attributes of the Replayer class
+
+        Parameters
+        ----------
+        path : str
+            the log file to replay
+        game_options :
+            any other options to create the Game with (fps is always 0); the ones in GAME_OPTIONS are taken
+            from the log, so they can only be given if they match it
+
+        Raises
+        ------
+        ValueError
+            if one of the options in GAME_OPTIONS is given and doesn't match the log
+        """
+
+        import user_inputs
+        import game_file
+
+        user_inputs.display.headless = True
+
+        self.seed, self.options, self.records = readLog(path)
+
+        for name in GAME_OPTIONS:
+            if name not in game_options or game_options[name] is None:
+                continue
+            given, recorded = game_options[name], self.options[name]
+            if name == 'integrator':
+                # integrators are compared by their kind and settings
+                same = packIntegrator(given) == packIntegrator(recorded)
+                given, recorded = (f'{integrator.name} (max step {integrator.max_step})' for integrator in (given, recorded))
+            else:
+                same = given == recorded
+            if not same:
+                raise ValueError(f'{path} was recorded with {name}={recorded!r}, so it can\'t be replayed with {given!r}')
+
+        self.game = game_file.Game(seed=self.seed, **dict(game_options, **self.options, fps=0))
+        self.trajectory = []
+
+    def run(self, keep_trajectory=False, render_every=0):
+        """
+        Replays the whole session and returns the result
+
+        Parameters
+        ----------
+        keep_trajectory : Bool
+            whether to keep the particle's position after every tick
+        render_every : int
+            draw the window offscreen every this many ticks (0 never draws)
+
+        Returns
+        -------
+        A dictionary with the final score, the recorded score, whether they match and the number of ticks run
+        """
+
+        game = self.game
+        recorded_score = None
+
+        for kind, tick, values in self.records:
+            while game.ticks < tick:
+                game.physicsStep()
+                if keep_trajectory and game.particle.projected:
+                    self.trajectory.append((game.ticks, game.particle.x, game.particle.y))
+                if render_every and game.ticks % render_every == 0:
+                    game.redrawWindow()
+
+            if kind == SETTINGS_RECORD:
+                flags, restitution, size, gravity = values
+                game.newLevel()
+                game.applySettings(bool(flags & TRAIL_FLAG), bool(flags & VELOCITY_FLAG), bool(flags & OBSTACLES_FLAG),
+                                   bool(flags & PREVIEW_FLAG), restitution, size, gravity)
+                game.startRun()
+            elif kind == LAUNCH_RECORD:
+                game.launch(values)
+            elif kind == END_RECORD:
+                recorded_score = values[0]
+
+        return {
+            'score': game.score,
+            'recorded_score': recorded_score,
+            'matches': recorded_score is None or recorded_score == game.score,
+            'ticks': game.ticks,
+        }
+
+
+if __name__ == '__main__':
+    for log_path in sys.argv[1:]:
+        print(log_path, Replayer(log_path).run())
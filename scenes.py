@@ -0,0 +1,474 @@
+import user_inputs
+import rendering
+import simulation
+
+import pygame
+
+MENU, PLAYING, GAME_OVER = 'menu', 'playing', 'game over'
+
+
+def waitEvents(game):
+    """
+    Sleeps until there is input (or the game's idle timeout runs out) and returns the events
+
+    Parameters
+    ----------
+    game : Game
+        the game that is waiting
+
+    Returns
+    -------
+    A list of pygame events
+    """
+
+    if game.idle_timeout is None:
+        return user_inputs.display.events()
+    return user_inputs.display.waitEvents(game.idle_timeout)
+
+
+class Scene(object):
+    """
+    A class to represent one screen of the game, run a frame at a time by a SceneManager.
+
+    ...
+
+    A scene asks to move to another one by setting next to that scene's name. Everything a scene
+    creates belongs to the scene object, so it can all be freed once the manager moves on.
+
+    Attributes
+    ----------
+    game : Game
+        the game the scene belongs to
+    next : str
+        the name of the scene to move to after this frame (None to stay on this scene)
+
+
+    Methods
+    -------
+    enter():
+        gets the scene ready to run
+    frame():
+        runs one frame of the scene
+    exit():
+        lets go of everything the scene created
+    """
+
+    def __init__(self, game):
+        """
+        Initialises all the attributes of the Scene class
+
+        Parameters
+        ----------
+        game : Game
+            the game the scene belongs to
+        """
+
+        self.game = game
+        self.next = None
+
+    def enter(self):
+        """
+        Gets the scene ready to run
+        """
+
+    def frame(self):
+        """
+        Runs one frame of the scene
+        """
+
+    def exit(self):
+        """
+        Lets go of everything the scene created
+        """
+
+
+class MenuScene(Scene):
+    """
+    A class to represent the menu where the user can input initial projection values.
+
+    ...
+
+    Nothing on the menu moves by itself, so it sleeps until there is input and is only redrawn when a
+    button or slider changes.
+
+    Attributes
+    ----------
+    run_button : MainButton
+        the button that starts the projection
+    input_buttons : list
+        every button on the menu, starting with run_button
+    input_sliders : list
+        the restitution, size and gravity sliders
+    changed : Bool
+        a boolean value for whether the menu needs redrawing
+    """
+
+    def enter(self):
+        """
+        Places a new level and creates the menu's buttons and sliders
+        """
+
+        self.game.newLevel()
+
+        self.run_button = user_inputs.MainButton(600, 200, user_inputs.BLACK, 'Play!')
+        trail_button = user_inputs.Button(200, 100, None, 'Show Ball Trail')
+        velocity_button = user_inputs.Button(200, 200, None, 'Show Velocities')
+        obstacle_button = user_inputs.Button(200, 300, None, 'Show Obstacles ')
+        preview_button = user_inputs.Button(200, 400, None, 'Show Aim Preview')
+
+        self.input_buttons = [self.run_button, trail_button, velocity_button, obstacle_button, preview_button]
+
+        restitution_slider = user_inputs.Slider(0.0, 0.9, 1000, 100, 'Restitution')
+        size_slider = user_inputs.Slider(10, 50, 1000, 200, 'Ball Size')
+        grav_slider = user_inputs.Slider(0.0, 30, 1000, 300, 'Gravity')
+
+        self.input_sliders = [restitution_slider, size_slider, grav_slider]
+        self.changed = True
+
+    def frame(self):
+        """
+        Draws the menu if it changed and handles its events, moving on to the projection once Play! is pressed
+        """
+
+        if self.changed:
+            user_inputs.display.window.fill(user_inputs.GREY)
+            for button in self.input_buttons:
+                button.draw()
+            for slider in self.input_sliders:
+                slider.draw()
+            user_inputs.display.update()
+            self.changed = False
+
+        for event in rendering.coalesceMotion(waitEvents(self.game)):
+            if event.type == pygame.QUIT:
+                self.game.quit()
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                for button in self.input_buttons:
+                    button.isPressed(event.pos)
+                self.changed = True
+            elif event.type == pygame.MOUSEMOTION:
+                for slider in self.input_sliders:
+                    if slider.isUsed(event.buttons[0], event.pos):
+                        self.changed = True
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                self.changed = True
+
+        if self.run_button.pressed:
+            trail, velocity, obstacles, preview = (button.pressed for button in self.input_buttons[1:])
+            restitution, size, gravity = (slider.slider_val for slider in self.input_sliders)
+            self.game.applySettings(trail, velocity, obstacles, preview, restitution, size, gravity)
+            self.next = PLAYING
+
+    def exit(self):
+        """
+        Lets go of the menu's buttons and sliders
+        """
+
+        self.run_button = self.input_buttons = self.input_sliders = None
+
+
+class PlayingScene(Scene):
+    """
+    A class to represent the projection itself, where the particle is aimed and launched.
+
+    ...
+
+    While the game is idle (see Game.isIdle), ie, while the particle is being aimed and nothing else
+    moves, the scene sleeps until there is input instead of running at the frame rate, and only redraws
+    when some arrived. If the game is threaded, the physics runs on a PhysicsWorker while the scene is
+    entered, and the scene only draws its snapshots and sends it the launches.
+
+    Attributes
+    ----------
+    drawn : Bool
+        a boolean value for whether the window has been drawn since the scene was entered
+    woken : Bool
+        a boolean value for whether the last frame was idle, so the time spent asleep isn't run as physics
+    idle_frames : int
+        the number of frames run while the game was idle
+    """
+
+    def enter(self):
+        """
+        Gets ready to run the projection after the menu
+        """
+
+        self.game.startRun()
+        self.drawn = False
+        self.woken = False
+        self.idle_frames = 0
+
+        if self.game.threaded:
+            timeout = self.game.idle_timeout / 1000 if self.game.idle_timeout is not None else 0.5
+            self.game.worker = simulation.PhysicsWorker(self.game, timeout)
+            self.game.worker.start()
+
+    def frame(self):
+        """
+        Runs one frame of the projection: the physics ticks that are due, drawing and input
+        """
+
+        game = self.game
+
+        if game.worker is not None:
+            self.threadedFrame()
+            return
+
+        if game.isIdle() and self.drawn:
+            self.idleFrame()
+            return
+
+        game.profiler.beginFrame()
+        game.profiler.push('input')
+        game.launch_angle = game.findLaunchAngle(*game.path_start, user_inputs.display.mousePos()) if not game.particle.projected else game.launch_angle
+        game.profiler.pop()
+
+        game.profiler.push('physics')
+        elapsed = 0 if self.woken else game.clock.get_time() / 1000
+        self.woken = False
+        for tick in range(game.timestep.advance(elapsed)):
+            game.physicsStep()
+        game.profiler.pop()
+
+        game.redrawWindow()
+        self.drawn = True
+
+        game.profiler.push('wait')
+        game.clock.tick(game.fps)
+        game.profiler.pop()
+
+        game.profiler.push('input')
+        events = rendering.coalesceMotion(user_inputs.display.events())
+        game.profiler.pop()
+        game.profiler.endFrame()
+
+        self.handle(events)
+
+    def idleFrame(self):
+        """
+        Sleeps until there is input, handles it and redraws the window only if some arrived
+        """
+
+        game = self.game
+        self.idle_frames += 1
+
+        events = rendering.coalesceMotion(waitEvents(game))
+
+        # nothing moved while waiting, so the time spent asleep shouldn't be caught up on
+        game.clock.tick()
+        game.timestep.reset()
+        self.woken = True
+
+        if events:
+            game.launch_angle = game.findLaunchAngle(*game.path_start, user_inputs.display.mousePos())
+            game.redrawWindow()
+            self.handle(events)
+
+    def threadedFrame(self):
+        """
+        Draws the physics worker's latest snapshot and sends it the frame's input, sleeping until there is input while nothing moves
+        """
+
+        game = self.game
+        snapshot = game.worker.latest()
+
+        if snapshot.idle and not game.worker.pending() and self.drawn:
+            self.idle_frames += 1
+            events = rendering.coalesceMotion(waitEvents(game))
+            game.clock.tick()
+            if events:
+                game.launch_angle = game.findLaunchAngle(*snapshot.path_start, user_inputs.display.mousePos())
+                game.redrawWindow(snapshot)
+                self.handle(events, snapshot)
+            return
+
+        if not snapshot.particle.projected:
+            game.launch_angle = game.findLaunchAngle(*snapshot.path_start, user_inputs.display.mousePos())
+        game.redrawWindow(snapshot)
+        self.drawn = True
+
+        game.clock.tick(game.fps)
+        self.handle(rendering.coalesceMotion(user_inputs.display.events()), snapshot)
+
+    def handle(self, events, snapshot=None):
+        """
+        Handles the input events of one frame
+
+        Parameters
+        ----------
+        events : list
+            the pygame events to handle
+        snapshot : Snapshot
+            the physics worker's snapshot the frame was drawn from, if it is threaded (the game itself is only
+            changed by the worker, through the inputs posted to it)
+        """
+
+        game = self.game
+        state = snapshot or game
+
+        for event in events:
+            if event.type == pygame.QUIT:
+                game.quit()
+
+            if event.type == pygame.KEYDOWN and game.profiler.enabled:
+                if event.key == pygame.K_F3 and game.worker is not None:
+                    game.worker.post(simulation.PROFILE)
+                elif event.key == pygame.K_F3:
+                    game.profile_shown = not game.profile_shown
+                elif event.key == pygame.K_F4:
+                    game.profiler.dumpTrace(game.trace_path)
+
+            if event.type == pygame.MOUSEBUTTONDOWN:
+
+                if game.reset_button.isPressed(event.pos):
+                    self.next = MENU
+                    return
+
+                elif game.worker is not None:
+                    game.worker.post(simulation.LAUNCH, event.pos)
+
+                else:
+                    game.launch(event.pos)
+
+        if state.launches < 0:
+            self.next = GAME_OVER
+
+    def exit(self):
+        """
+        Stops the physics worker, if there is one
+        """
+
+        if self.game.worker is not None:
+            self.game.worker.stop()
+            self.game.worker = None
+
+
+class GameOverScene(Scene):
+    """
+    A class to represent the screen shown once every launch has been used, with the final score.
+
+    ...
+
+    The screen never changes once it is drawn, so it sleeps until there is input.
+
+    Attributes
+    ----------
+    changed : Bool
+        a boolean value for whether the screen needs redrawing
+    """
+
+    def enter(self):
+        """
+        Marks the screen to be drawn
+        """
+
+        self.changed = True
+
+    def frame(self):
+        """
+        Shows the final score, going back to the menu once the window is clicked
+        """
+
+        if self.changed:
+            window = user_inputs.display.window
+            window.fill(user_inputs.GREY)
+
+            lines = (f'Game over! Final score = {self.game.score}', 'Click anywhere to go back to the menu')
+            for i, text in enumerate(lines):
+                text_surface = user_inputs.text_cache.render(user_inputs.display.font, text, False, user_inputs.WHITE)
+                window.blit(text_surface, text_surface.get_rect(center=(user_inputs.wScreen / 2, user_inputs.hScreen / 2 + 30 * i)))
+
+            user_inputs.display.update()
+            self.changed = False
+
+        for event in waitEvents(self.game):
+            if event.type == pygame.QUIT:
+                self.game.quit()
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                self.next = MENU
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                self.changed = True
+
+
+class SceneManager(object):
+    """
+    A class to represent the loop that runs the game's scenes one after another.
+
+    ...
+
+    Only one scene exists at a time: when it asks to move on, it lets go of what it created and a new
+    instance of the next scene is made, so however long the game runs the call stack stays flat and old
+    buttons, sliders, points and obstacles don't pile up.
+
+    Attributes
+    ----------
+    game : Game
+        the game the scenes belong to
+    scenes : dict
+        the class for each scene, keyed by its name
+    scene : Scene
+        the scene that is running
+    transitions : int
+        the number of times the manager has moved to a new scene
+
+
+    Methods
+    -------
+    switch(name):
+        leaves the current scene and enters a new instance of the named one
+    run(start):
+        runs scenes until the game stops running
+    """
+
+    def __init__(self, game, scenes=None):
+        """
+        Initialises all the attributes of the SceneManager class
+
+        Parameters
+        ----------
+        game : Game
+            the game the scenes belong to
+        scenes : dict
+            the class for each scene, keyed by its name (defaults to the menu, projection and game over scenes)
+        """
+
+        self.game = game
+        self.scenes = scenes or {MENU: MenuScene, PLAYING: PlayingScene, GAME_OVER: GameOverScene}
+        self.scene = None
+        self.transitions = 0
+
+    def switch(self, name):
+        """
+        Leaves the current scene and enters a new instance of the named one
+
+        Parameters
+        ----------
+        name : str
+            the name of the scene to move to
+        """
+
+        if self.scene is not None:
+            self.scene.exit()
+            self.transitions += 1
+
+        self.scene = None
+        self.scene = self.scenes[name](self.game)
+        self.scene.enter()
+
+    def run(self, start=MENU):
+        """
+        Runs scenes until the game stops running
+
+        Parameters
+        ----------
+        start : str
+            the name of the first scene
+        """
+
+        self.game.running = True
+        self.switch(start)
+
+        while self.game.running:
+            self.scene.frame()
+            if self.scene.next is not None:
+                self.switch(self.scene.next)
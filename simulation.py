@@ -0,0 +1,372 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import game_objects
+import timing
+
+# the particle's state at the end of a physics tick (trail is a copy, or None if the trail isn't shown)
+ParticleState = namedtuple('ParticleState', 'x y vX vY vel radius coeff_rest acc projected trail')
+
+LAUNCH, PROFILE, STOP = 'launch', 'profile', 'stop'
+
+
+class Snapshot(object):
+    """
+    A class to represent the state of the simulation at the end of a physics tick, as needed to draw it.
+
+    ...
+
+    Everything that the physics changes is copied, so a snapshot can be drawn on one thread while the
+    physics carries on on another without either of them locking. The trail, balls and moving obstacles
+    are copied into ones made with the snapshot, so updating it for a new tick doesn't allocate them
+    again. The points are only copied again when they change.
+
+    Attributes
+    ----------
+    tick : int
+        the physics tick the snapshot was taken after
+    published : float
+        the time (from time.perf_counter) the snapshot was taken at
+    tick_length : float
+        the length of one physics tick in seconds of real time
+    particle : ParticleState
+        the particle's state
+    previous_pos : tuple
+        the particle's coordinates before the last physics tick
+    path_start : tuple
+        the coordinates the particle's current path started from
+    displayed_bounces : int
+        the particle's total number of bounces
+    launches : int
+        the number of launches remaining
+    score : int
+        the current score
+    points : PointField
+        a copy of the collectable points
+    points_version : int
+        the number of times the points had changed when the snapshot was taken
+    obstacles : list
+        the obstacles, with copies of the ones that move
+    balls : Balls
+        a copy of the balls in the air
+    idle : Bool
+        a boolean value for whether nothing was moving when the snapshot was taken
+    inputs_done : int
+        the number of inputs the physics had handled when the snapshot was taken
+
+
+    Methods
+    -------
+    update(game, points, inputs_done):
+        copies the game's state at the end of its latest tick into the snapshot
+    alpha():
+        returns how far the current time is between the snapshot's tick and the next one
+    """
+
+    def __init__(self, game, tick_length, points=None, inputs_done=0):
+        """
+        Initialises all the attributes of the Snapshot class by copying the game's state
+
+        Parameters
+        ----------
+        game : Game
+            the game to take the snapshot of
+        tick_length : float
+            the length of one physics tick in seconds of real time
+        points : PointField
+            a copy of the game's points to share, if they haven't changed since it was made
+        inputs_done : int
+            the number of inputs the physics has handled
+        """
+
+        self.tick_length = tick_length
+        self._trail = game_objects.Trail(game.particle.trail.length)
+        self._obstacle_sources = None
+        self.obstacles = []
+        self.balls = game_objects.Balls(game.balls.capacity, 0, game.balls.trail_length, game.balls.lifetime,
+                                        game.balls.colour)
+        self.update(game, points, inputs_done)
+
+    def update(self, game, points=None, inputs_done=0):
+        """
+        Copies the game's state at the end of its latest tick into the snapshot
+
+        Parameters
+        ----------
+        game : Game
+            the game to take the snapshot of
+        points : PointField
+            a copy of the game's points to share, if they haven't changed since it was made
+        inputs_done : int
+            the number of inputs the physics has handled
+        """
+
+        particle = game.particle
+
+        self.tick = game.ticks
+        self.published = time.perf_counter()
+        self.particle = ParticleState(particle.x, particle.y, particle.vX, particle.vY, particle.vel, particle.radius,
+                                      particle.coeff_rest, particle.acc, particle.projected,
+                                      particle.trail.copy(self._trail) if game.trail_shown else None)
+        self.previous_pos = game.previous_pos
+        self.path_start = game.path_start
+        self.displayed_bounces = game.displayed_bounces
+        self.launches = game.launches
+        self.score = game.score
+        self.points = points if points is not None else game.points.copy()
+        self.points_version = game.points_version
+
+        # the copies are only made again when the obstacles are replaced, eg, by a new level
+        if self._obstacle_sources != game.obstacles:
+            self._obstacle_sources = list(game.obstacles)
+            self.obstacles = [obstacle.copy() if type(obstacle) == game_objects.MovingObstacle else obstacle
+                              for obstacle in game.obstacles]
+        else:
+            for obstacle, drawn in zip(game.obstacles, self.obstacles):
+                if type(obstacle) == game_objects.MovingObstacle:
+                    obstacle.copy(drawn)
+
+        game.balls.copy(self.balls)
+        self.idle = game.isIdle()
+        self.inputs_done = inputs_done
+
+    def alpha(self):
+        """
+        Returns how far the current time is between the snapshot's tick and the next one
+
+        Returns
+        -------
+        A float between 0 and 1 used to interpolate between the previous and current positions
+        """
+
+        return min((time.perf_counter() - self.published) / self.tick_length, 1.0)
+
+
+class PhysicsWorker(object):
+    """
+    A class to represent a thread that runs the physics apart from the drawing.
+
+    ...
+
+    The worker runs the game's physics ticks on its own fixed timestep and publishes a Snapshot after
+    every tick. Snapshots are double-buffered: the worker updates the back one and then swaps it in with
+    a single assignment, so the drawing thread always gets a complete snapshot with no lock, and a slow
+    frame never holds up the physics (or the other way round). The back snapshot is only updated once
+    the drawing thread has moved on to the front one; until then publishing waits for the next tick.
+    Input, like launches, is sent to the worker through a queue and handled between ticks. While
+    nothing is moving the worker sleeps until there is input.
+
+    Attributes
+    ----------
+    game : Game
+        the game whose physics the worker runs
+    timestep : FixedTimestep
+        decides how many physics ticks are due
+    inputs : Queue
+        the inputs waiting to be handled
+    inputs_posted : int
+        the number of inputs posted to the worker
+    inputs_done : int
+        the number of inputs the worker has handled
+    idle_timeout : float
+        the longest time (in seconds) to sleep waiting for input while nothing is moving
+    error : Exception
+        the error that stopped the worker, if there was one
+
+
+    Methods
+    -------
+    start():
+        publishes the first snapshot and starts the worker thread
+    latest():
+        returns the most recently published snapshot
+    post(kind, value):
+        sends an input to the worker (a LAUNCH, or PROFILE to show or hide the profiler overlay)
+    pending():
+        returns whether there are inputs the worker hasn't handled yet
+    stop():
+        stops the worker thread and waits for it to finish
+    """
+
+    def __init__(self, game, idle_timeout=0.5):
+        """
+        Initialises all the attributes of the PhysicsWorker class
+
+        Parameters
+        ----------
+        game : Game
+            the game whose physics the worker runs
+        idle_timeout : float
+            the longest time (in seconds) to sleep waiting for input while nothing is moving
+        """
+
+        self.game = game
+        self.timestep = timing.FixedTimestep(game.timestep.tick_rate, game.timestep.max_ticks)
+        self.inputs = queue.Queue()
+        self.inputs_posted = 0
+        self.inputs_done = 0
+        self.idle_timeout = idle_timeout
+        self.error = None
+
+        self._points = game.points.copy()
+        self._points_version = game.points_version
+        self._front = Snapshot(game, self.timestep.tick_length, self._points)
+        self._back = Snapshot(game, self.timestep.tick_length, self._points)
+        self._reading = None
+        self._stale = False
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='physics', daemon=True)
+
+    def start(self):
+        """
+        Publishes the first snapshot and starts the worker thread
+        """
+
+        self._publish()
+        self._thread.start()
+
+    def latest(self):
+        """
+        Returns the most recently published snapshot
+
+        Returns
+        -------
+        snapshot : Snapshot
+            the snapshot (it is shared, so it shouldn't be changed)
+        """
+
+        if self.error is not None:
+            raise self.error
+
+        # the snapshot is marked as being read before the worker can start updating it, or it is picked again
+        while True:
+            front = self._front
+            self._reading = front
+            if self._front is front:
+                return front
+
+    def post(self, kind, value=None):
+        """
+        Sends an input to the worker
+
+        Parameters
+        ----------
+        kind : str
+            the kind of input (LAUNCH or PROFILE)
+        value :
+            the input's value, eg, the coordinates of the cursor for a launch
+        """
+
+        self.inputs_posted += 1
+        self.inputs.put((kind, value))
+
+    def pending(self):
+        """
+        Returns whether there are inputs the worker hasn't handled yet
+
+        Returns
+        -------
+        True if the latest snapshot doesn't include every input posted
+        """
+
+        return self._front.inputs_done != self.inputs_posted
+
+    def stop(self):
+        """
+        Stops the worker thread and waits for it to finish
+        """
+
+        self._stopping = True
+        self.inputs.put((STOP, None))
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _publish(self):
+        """
+        Updates the back snapshot from the game and swaps it in as the latest one, unless it is still being drawn
+        """
+
+        back = self._back
+        if back is self._reading:
+            self._stale = True
+            return
+
+        game = self.game
+        if self._points_version != game.points_version:
+            self._points, self._points_version = game.points.copy(), game.points_version
+
+        # the snapshot is finished before it is swapped in, so readers never see one half built
+        back.update(game, self._points, self.inputs_done)
+        self._front, self._back = back, self._front
+        self._stale = False
+
+    def _handle(self, kind, value):
+        """
+        Handles one input between physics ticks
+        """
+
+        if kind == LAUNCH:
+            self.game.launch(value)
+        elif kind == PROFILE:
+            self.game.profile_shown = not self.game.profile_shown
+        if kind != STOP:
+            self.inputs_done += 1
+
+    def _handleInputs(self):
+        """
+        Handles every input waiting in the queue
+
+        Returns
+        -------
+        True if there were any
+        """
+
+        handled = False
+        while True:
+            try:
+                kind, value = self.inputs.get_nowait()
+            except queue.Empty:
+                return handled
+            self._handle(kind, value)
+            handled = True
+
+    def _run(self):
+        """
+        Runs physics ticks and publishes snapshots until the worker is stopped (runs on the worker thread)
+        """
+
+        game = self.game
+        try:
+            last = time.perf_counter()
+            while not self._stopping:
+                if self._handleInputs():
+                    self._publish()
+
+                now = time.perf_counter()
+                ticks = self.timestep.advance(now - last)
+                last = now
+
+                for tick in range(ticks):
+                    game.physicsStep()
+                    # Trail.plot drops the oldest coordinate every frame; the drawing only has a copy, so it's done here
+                    if game.trail_shown:
+                        game.particle.trail.drop()
+                if ticks or self._stale:
+                    self._publish()
+
+                if game.isIdle() and not self._stale:
+                    try:
+                        kind, value = self.inputs.get(timeout=self.idle_timeout)
+                    except queue.Empty:
+                        continue
+                    self._handle(kind, value)
+                    self._publish()
+                    # nothing moved while waiting, so the time spent asleep shouldn't be caught up on
+                    self.timestep.reset()
+                    last = time.perf_counter()
+                else:
+                    time.sleep(max(0.0, self.timestep.tick_length - self.timestep.accumulator - (time.perf_counter() - last)))
+        except Exception as error:
+            self.error = error
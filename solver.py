@@ -0,0 +1,533 @@
+import math
+import time
+import numpy as np
+from collections import OrderedDict
+
+import engine
+
+
+def segmentHits(initX, initY, uX, uY, acc, t_end, points, rad):
+    """
+    Finds which points are hit by particles moving along parabolas, for whole arrays of parabolas at once
+
+    The particle's square hit box (the one Point.collides uses) covers a point while the point is within
+    rad of its centre on both axes. x changes linearly, so the times it is close enough horizontally form
+    one interval, and since y changes smoothly the heights covered in that interval form another interval
+    that just has to overlap the point's.
+
+    Parameters
+    ----------
+    initX,initY : ndarray
+        the coordinates each parabola starts from
+    uX,uY : ndarray
+        the initial x and y components of the velocity along each parabola
+    acc : float
+        the acceleration of the particle
+    t_end : ndarray
+        the time each parabola ends at (it starts at zero)
+    points : ndarray
+        a (p, 2) array of the coordinates of the points
+    rad : float
+        the radius of the particle
+
+    Returns
+    -------
+    A boolean (n, p) array for whether each parabola hits each point
+    """
+
+    initX, initY, uX, uY, t_end = (np.asarray(value, dtype=float)[:, None] for value in (initX, initY, uX, uY, t_end))
+    point_x, point_y = points[:, 0], points[:, 1]
+
+    # the times the hit box is level with the point horizontally, clipped to the parabola
+    with np.errstate(divide='ignore', invalid='ignore'):
+        enter = (point_x - rad - initX) / uX
+        leave = (point_x + rad - initX) / uX
+    still = uX == 0
+    level = np.abs(point_x - initX) <= rad
+    low = np.where(still, np.where(level, 0.0, np.inf), np.maximum(np.minimum(enter, leave), 0.0))
+    high = np.where(still, np.where(level, t_end, -np.inf), np.minimum(np.maximum(enter, leave), t_end))
+    overlap = low <= high
+
+    low, high = np.where(overlap, low, 0.0), np.where(overlap, high, 0.0)
+
+    def height(t):
+        return initY - (uY * t + acc / 2 * t ** 2)
+
+    # the highest or lowest point of the parabola, if it is reached in that time
+    top = np.full(uY.shape, np.nan) if acc == 0 else -uY / acc
+    turning = (low < top) & (top < high)
+    y_low, y_high = height(low), height(high)
+    y_top = np.where(turning, height(np.where(turning, top, 0.0)), y_low)
+
+    y_min = np.minimum(np.minimum(y_low, y_high), y_top)
+    y_max = np.maximum(np.maximum(y_low, y_high), y_top)
+    return overlap & (y_min <= point_y + rad) & (y_max >= point_y - rad)
+
+
+class LaunchSolver(object):
+    """
+    A class to represent a solver that finds the launch which collects the most points.
+
+    ...
+
+    Candidate launches are given by an angle and a speed. A coarse grid of them is simulated all at
+    once, jumping from bounce to bounce with an EventStepper, and the parabola between each pair of
+    bounces is tested against every point exactly with segmentHits. The best few candidates are then
+    refined by searching a finer grid around them. Every batch is simulated in one go, so the
+    neighbourhood searched around the best candidates is made wide rather than searching it again
+    round after round. Moving obstacles and points that respawn after being collected aren't predicted,
+    so each point counts once.
+
+    A search can also be run a slice at a time with search(), eg, a few milliseconds each frame, and
+    gives the same answer however it is sliced.
+
+    Two caches make repeated queries fast. The paths of the coarse grid only depend on the particle and
+    the obstacles, so when only the points change (eg, after one is collected) the grid is re-scored
+    without simulating it again. Whole answers are cached by the full level state.
+
+    Attributes
+    ----------
+    angles : int
+        the number of launch angles in the coarse grid
+    speeds : int
+        the number of launch speeds in the coarse grid
+    refine_rounds : int
+        the number of times the search is narrowed around the best candidates
+    refine_top : int
+        the number of candidates searched around in each round
+    refine_span : int
+        the number of finer grid steps searched on each side of a candidate (the step shrinks by refine_span + 1 each round)
+    max_events : int
+        the most bounces simulated for one launch
+    max_time : float
+        the longest a parabola is followed between two bounces
+    max_size : int
+        the maximum number of paths and answers kept in each cache
+    paths : OrderedDict
+        the cached paths of the coarse grid and the refinements, from least to most recently used
+    answers : OrderedDict
+        the cached answers, from least to most recently used
+    hits : int
+        the number of times an answer was found in the cache
+    misses : int
+        the number of times an answer had to be worked out
+    path_hits : int
+        the number of times a batch of paths was found in the cache
+
+
+    Methods
+    -------
+    candidates(x, y, width, height, aim_from):
+        returns the angles and speeds of the coarse grid
+    simulate(x, y, angle, speed, radius, coeff_rest, acc, width, height, obstacles):
+        works out the parabolas between the bounces of a batch of launches
+    score(paths, points, radius):
+        returns the number of points each path collects
+    search(x, y, points, radius, coeff_rest, acc, width, height, obstacles, aim_from):
+        returns a LaunchSearch that finds the launch that collects the most points a slice at a time
+    solve(x, y, points, radius, coeff_rest, acc, width, height, obstacles, aim_from):
+        returns the launch that collects the most points
+    """
+
+    def __init__(self, angles=36, speeds=10, refine_rounds=1, refine_top=2, refine_span=3, max_events=40, max_time=20.0,
+                 max_size=64):
+        """
+        Initialises all the attributes of the LaunchSolver class
+
+        Parameters
+        ----------
+        angles : int
+            the number of launch angles in the coarse grid
+        speeds : int
+            the number of launch speeds in the coarse grid
+        refine_rounds : int
+            the number of times the search is narrowed around the best candidates
+        refine_top : int
+            the number of candidates searched around in each round
+        refine_span : int
+            the number of finer grid steps searched on each side of a candidate
+        max_events : int
+            the most bounces simulated for one launch
+        max_time : float
+            the longest a parabola is followed between two bounces (paths with no gravity might never bounce again)
+        max_size : int
+            the maximum number of paths and answers kept in each cache
+        """
+
+        self.angles = angles
+        self.speeds = speeds
+        self.refine_rounds = refine_rounds
+        self.refine_top = refine_top
+        self.refine_span = refine_span
+        self.max_events = max_events
+        self.max_time = max_time
+        self.max_size = max_size
+        self.paths = OrderedDict()
+        self.answers = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.path_hits = 0
+
+    @staticmethod
+    def _remember(cache, key, value, max_size):
+        """
+        Adds a value to an LRU cache, throwing away the least recently used one if it is full
+        """
+
+        cache[key] = value
+        if len(cache) > max_size:
+            cache.popitem(last=False)
+
+    @staticmethod
+    def _aim(aim_from, angle, speed):
+        """
+        Returns the cursor positions that give launches with the given angles and speeds
+        """
+
+        # the inverse of engine.launchVelocity
+        return aim_from[0] + 5 * speed * np.cos(angle), aim_from[1] - 5 * speed * np.sin(angle)
+
+    def candidates(self, x, y, width, height, aim_from=None):
+        """
+        Returns the angles and speeds of the coarse grid
+
+        Launches that would need the cursor to be outside the window are left out.
+
+        Parameters
+        ----------
+        x,y : float
+            the coordinates the particle is launched from
+        width,height : int
+            the size of the window
+        aim_from : tuple
+            the coordinates the launch velocity is measured from, if they aren't x,y
+
+        Returns
+        -------
+        angle,speed : ndarray
+            the angle (in radians, anticlockwise from the right) and speed of each candidate
+        """
+
+        aim_from = aim_from or (x, y)
+        max_speed = max(math.dist(aim_from, corner) for corner in ((0, 0), (width, 0), (0, height), (width, height))) / 5
+
+        angle, speed = np.meshgrid(np.linspace(0, 2 * math.pi, self.angles, endpoint=False),
+                                   np.linspace(max_speed / self.speeds, max_speed, self.speeds))
+        angle, speed = angle.ravel(), speed.ravel()
+
+        aim_x, aim_y = self._aim(aim_from, angle, speed)
+        inside = (0 <= aim_x) & (aim_x < width) & (0 <= aim_y) & (aim_y < height)
+        return angle[inside], speed[inside]
+
+    def simulate(self, x, y, angle, speed, radius, coeff_rest, acc, width, height, obstacles=None):
+        """
+        Works out the parabolas between the bounces of a batch of launches
+
+        Parameters
+        ----------
+        x,y : float
+            the coordinates the particle is launched from
+        angle,speed : ndarray
+            the angle and speed of each launch
+        radius, coeff_rest, acc : float
+            the particle's radius, coefficient of restitution and acceleration
+        width,height : int
+            the size of the area the particle bounces around in
+        obstacles : list
+            the left, right and top of each obstacle that doesn't move (optional)
+
+        Returns
+        -------
+        paths : tuple
+            the acceleration and (bounces, n) arrays of the initX, initY, uX, uY and end time of each
+            parabola (the end time is zero once a launch has stopped)
+        """
+
+        return _finish(self._simulateSteps(x, y, angle, speed, radius, coeff_rest, acc, width, height, obstacles))
+
+    def _simulateSteps(self, x, y, angle, speed, radius, coeff_rest, acc, width, height, obstacles=None):
+        """
+        Works out the parabolas between the bounces of a batch of launches, yielding after every bounce (see simulate)
+        """
+
+        batch = engine.ParticleBatch(len(angle), radius, coeff_rest, acc)
+        batch.x[:], batch.y[:] = x, y
+        batch.launch(speed * np.cos(angle), speed * np.sin(angle))
+        stepper = engine.EventStepper(batch, width, height, None if obstacles is None else np.asarray(obstacles, dtype=float))
+
+        segments = []
+        for event in range(self.max_events):
+            active = batch.projected & (batch.bounces < batch.max_bounces)
+            if not active.any():
+                break
+
+            segment = (batch.initX.copy(), batch.initY.copy(), batch.uX.copy(), batch.uY.copy())
+            stepper.advance()
+            segments.append(segment + (np.where(active, np.minimum(stepper.t_next, self.max_time), 0.0),))
+            yield
+
+        columns = np.array(segments).reshape(-1, 5, len(angle))
+        return (acc,) + tuple(columns[:, column] for column in range(5))
+
+    def score(self, paths, points, radius):
+        """
+        Returns the number of points each path collects
+
+        Parameters
+        ----------
+        paths : tuple
+            the paths returned by simulate
+        points : ndarray
+            a (p, 2) array of the coordinates of the points
+        radius : float
+            the radius of the particle
+
+        Returns
+        -------
+        An int array with the number of different points each path collects
+        """
+
+        acc, initX, initY, uX, uY, t_end = paths
+        bounces, count = initX.shape
+
+        if not len(points) or not bounces:
+            return np.zeros(count, dtype=int)
+
+        # only the parabolas of launches that were still moving are tested (stopped ones have an end time of zero)
+        live = t_end > 0
+        launches = np.nonzero(live)[1]
+        hits = segmentHits(initX[live], initY[live], uX[live], uY[live], acc, t_end[live], points, radius)
+
+        collected = np.zeros((count, len(points)), dtype=bool)
+        segments, hit_points = np.nonzero(hits)
+        collected[launches[segments], hit_points] = True
+
+        return collected.sum(axis=1)
+
+    def _paths(self, key, angle, speed, physics):
+        """
+        Returns the paths of a batch of launches, simulating them (a bounce per yield) only if they aren't cached
+        """
+
+        paths = self.paths.get(key)
+
+        if paths is not None:
+            self.path_hits += 1
+            self.paths.move_to_end(key)
+            return paths
+
+        paths = yield from self._simulateSteps(physics[0], physics[1], angle, speed, *physics[2:])
+        self._remember(self.paths, key, paths, self.max_size)
+        return paths
+
+    def _best(self, speed, scores, count):
+        """
+        Returns the indices of the best candidates (most points, then slowest)
+        """
+
+        return np.lexsort((speed, -scores))[:count]
+
+    def search(self, x, y, points, radius, coeff_rest, acc, width, height, obstacles=None, aim_from=None):
+        """
+        Returns a LaunchSearch that finds the launch that collects the most points a slice at a time
+
+        Parameters
+        ----------
+        x,y : float
+            the coordinates the particle is launched from
+        points : array_like
+            the coordinates of the points that can be collected
+        radius, coeff_rest, acc : float
+            the particle's radius, coefficient of restitution and acceleration
+        width,height : int
+            the size of the area the particle bounces around in
+        obstacles : list
+            the left, right and top of each obstacle that doesn't move (optional)
+        aim_from : tuple
+            the coordinates the launch velocity is measured from, if they aren't x,y (like Particle.findInitVel)
+
+        Returns
+        -------
+        search : LaunchSearch
+            the search, which hasn't been started yet
+        """
+
+        return LaunchSearch(self._search(x, y, points, radius, coeff_rest, acc, width, height, obstacles, aim_from))
+
+    def solve(self, x, y, points, radius, coeff_rest, acc, width, height, obstacles=None, aim_from=None):
+        """
+        Returns the launch that collects the most points
+
+        Parameters
+        ----------
+        x,y : float
+            the coordinates the particle is launched from
+        points : array_like
+            the coordinates of the points that can be collected
+        radius, coeff_rest, acc : float
+            the particle's radius, coefficient of restitution and acceleration
+        width,height : int
+            the size of the area the particle bounces around in
+        obstacles : list
+            the left, right and top of each obstacle that doesn't move (optional)
+        aim_from : tuple
+            the coordinates the launch velocity is measured from, if they aren't x,y (like Particle.findInitVel)
+
+        Returns
+        -------
+        uX,uY : float
+            the initial x and y components of the best launch's velocity
+        aim : tuple
+            the cursor position that gives the best launch
+        score : int
+            the number of points the best launch is predicted to collect
+        """
+
+        return _finish(self._search(x, y, points, radius, coeff_rest, acc, width, height, obstacles, aim_from))
+
+    def _search(self, x, y, points, radius, coeff_rest, acc, width, height, obstacles=None, aim_from=None):
+        """
+        Finds the launch that collects the most points, yielding after every bounce simulated (see solve)
+        """
+
+        aim_from = tuple(aim_from or (x, y))
+        points = np.reshape(np.asarray(points, dtype=float), (-1, 2))
+        obstacles_key = None if obstacles is None else tuple(map(tuple, np.reshape(obstacles, (-1, 3)).tolist()))
+
+        path_key = (x, y, aim_from, radius, coeff_rest, acc, width, height, obstacles_key)
+        key = path_key + (tuple(map(tuple, points.tolist())),)
+
+        answer = self.answers.get(key)
+        if answer is not None:
+            self.hits += 1
+            self.answers.move_to_end(key)
+            return answer
+
+        self.misses += 1
+        physics = (x, y, radius, coeff_rest, acc, width, height, obstacles)
+
+        angle, speed = self.candidates(x, y, width, height, aim_from)
+        scores = self.score((yield from self._paths(path_key, angle, speed, physics)), points, radius)
+
+        step_angle = 2 * math.pi / self.angles
+        step_speed = (speed.max() if speed.size else 0) / self.speeds
+        span = np.arange(-self.refine_span, self.refine_span + 1)
+        offset_angle, offset_speed = (offsets.ravel() for offsets in np.meshgrid(span, span))
+        moved = (offset_angle != 0) | (offset_speed != 0)
+        offset_angle, offset_speed = offset_angle[moved], offset_speed[moved]
+
+        for refinement in range(self.refine_rounds):
+            if not scores.size:
+                break
+
+            best = self._best(speed, scores, self.refine_top)
+            angle, speed, scores = angle[best], speed[best], scores[best]
+            step_angle, step_speed = step_angle / (self.refine_span + 1), step_speed / (self.refine_span + 1)
+
+            new_angle = (angle[:, None] + offset_angle * step_angle).ravel()
+            new_speed = (speed[:, None] + offset_speed * step_speed).ravel()
+
+            aim_x, aim_y = self._aim(aim_from, new_angle, new_speed)
+            keep = (new_speed > 0) & (0 <= aim_x) & (aim_x < width) & (0 <= aim_y) & (aim_y < height)
+            new_angle, new_speed = new_angle[keep], new_speed[keep]
+
+            # the best candidates often stay the same when only the points change, so these paths are cached too
+            new_paths = yield from self._paths(path_key + (new_angle.tobytes(), new_speed.tobytes()), new_angle, new_speed, physics)
+            new_scores = self.score(new_paths, points, radius)
+
+            angle = np.concatenate((angle, new_angle))
+            speed = np.concatenate((speed, new_speed))
+            scores = np.concatenate((scores, new_scores))
+
+        if not scores.size:
+            answer = (0.0, 0.0, aim_from, 0)
+        else:
+            index = self._best(speed, scores, 1)[0]
+            aim = self._aim(aim_from, angle[index], speed[index])
+            answer = (speed[index] * math.cos(angle[index]), speed[index] * math.sin(angle[index]),
+                      (float(aim[0]), float(aim[1])), int(scores[index]))
+
+        self._remember(self.answers, key, answer, self.max_size)
+        return answer
+
+
+def _finish(steps):
+    """
+    Runs a generator to the end and returns the value it returns
+    """
+
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+class LaunchSearch(object):
+    """
+    A class to represent one LaunchSolver search that can be run a slice at a time.
+
+    ...
+
+    The search stops between bounces, so a frame loop can give it a few milliseconds each frame until
+    it is done instead of waiting for the whole search. The answer is the same however it is sliced.
+
+    Attributes
+    ----------
+    done : Bool
+        a boolean value for whether the search has finished
+    answer : tuple
+        the same (uX, uY, aim, score) as LaunchSolver.solve returns (None until the search has finished)
+    slices : int
+        the number of times step() has been called
+
+
+    Methods
+    -------
+    step(budget):
+        runs the search on for up to budget seconds
+    """
+
+    def __init__(self, steps):
+        """
+        Initialises all the attributes of the LaunchSearch class
+
+        Parameters
+        ----------
+        steps : generator
+            the search, yielding after every bounce simulated and returning the answer
+        """
+
+        self._steps = steps
+        self.done = False
+        self.answer = None
+        self.slices = 0
+
+    def step(self, budget=None):
+        """
+        Runs the search on for up to budget seconds
+
+        Parameters
+        ----------
+        budget : float
+            the longest (in seconds) to run for before stopping at the next bounce (None runs to the end)
+
+        Returns
+        -------
+        True once the search has finished
+        """
+
+        if self.done:
+            return True
+
+        self.slices += 1
+        deadline = None if budget is None else time.perf_counter() + budget
+
+        while deadline is None or time.perf_counter() < deadline:
+            try:
+                next(self._steps)
+            except StopIteration as stop:
+                self.done, self.answer = True, stop.value
+                break
+
+        return self.done
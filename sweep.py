@@ -0,0 +1,405 @@
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import itertools
+import math
+import multiprocessing
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import user_inputs
+import game_file
+import trajectory
+
+
+PARAMETERS = ('seed', 'aim_x', 'aim_y', 'restitution', 'gravity', 'size')
+RESULTS = ('score', 'bounces', 'displayed_bounces', 'ticks')
+
+# the same ranges as the sliders on the menu
+SLIDER_RANGES = {'restitution': (0.0, 0.9), 'gravity': (0.0, 30), 'size': (10, 50)}
+
+
+def gridConfigs(seeds, aim_xs, aim_ys, restitutions, gravities, sizes):
+    """
+    Returns every combination of the given parameter values
+
+    Parameters
+    ----------
+    seeds : iterable
+        the seeds for the level layout
+    aim_xs, aim_ys : iterable
+        the coordinates the particle is aimed at
+    restitutions, gravities, sizes : iterable
+        the slider values
+
+    Returns
+    -------
+    A float array with one row per configuration and one column per entry in PARAMETERS
+    """
+
+    return np.array(list(itertools.product(seeds, aim_xs, aim_ys, restitutions, gravities, sizes)), dtype=float).reshape(-1, len(PARAMETERS))
+
+
+def randomConfigs(count, seed=0, levels=1):
+    """
+    Returns random configurations, with the aim anywhere in the window and the sliders anywhere in their range
+
+    Parameters
+    ----------
+    count : int
+        the number of configurations
+    seed : int
+        the seed for picking the configurations
+    levels : int
+        the number of different level layouts the configurations are spread over
+
+    Returns
+    -------
+    A float array with one row per configuration and one column per entry in PARAMETERS
+    """
+
+    generator = np.random.default_rng(seed)
+    configs = np.empty((count, len(PARAMETERS)))
+
+    configs[:, 0] = generator.integers(0, levels, count)
+    configs[:, 1] = generator.integers(0, user_inputs.wScreen, count)
+    configs[:, 2] = generator.integers(0, user_inputs.hScreen, count)
+    for column, name in enumerate(('restitution', 'gravity', 'size'), 3):
+        low, high = SLIDER_RANGES[name]
+        configs[:, column] = generator.uniform(low, high, count)
+
+    return configs
+
+
+def simulate(config, obstacles=True, event_driven=False, max_ticks=5000, store=None):
+    """
+    Simulates a single launch headlessly
+
+    Parameters
+    ----------
+    config : sequence
+        the configuration, with one value for each entry in PARAMETERS
+    obstacles : Bool
+        whether the level has obstacles
+    event_driven : Bool
+        whether the game steps from impact to impact
+    max_ticks : int
+        the most physics ticks simulated (for launches that never come to rest, like with no gravity)
+    store : TrajectoryStore
+        keeps the launch's trajectory, indexed by the configuration (not kept if not given)
+
+    Returns
+    -------
+    A tuple with one value for each entry in RESULTS
+    """
+
+    seed, aim_x, aim_y, restitution, gravity, size = config
+
+    game = game_file.Game(fps=0, event_driven=event_driven, seed=int(seed))
+    game.newLevel()
+    game.applySettings(False, False, obstacles, False, restitution, size, gravity)
+    game.startRun()
+    game.trajectory = store
+    game.launch((aim_x, aim_y))
+
+    while game.particle.projected and game.ticks < max_ticks:
+        game.physicsStep()
+
+    return game.score, game.particle.bounces, game.displayed_bounces, game.ticks
+
+
+# each worker process attaches to the shared results once, when it starts
+_worker = {}
+
+
+def shardPaths(store_path):
+    """
+    Returns the trajectory stores written for each chunk of a sweep, in the order of their configurations
+
+    Parameters
+    ----------
+    store_path : str
+        the sweep's main TrajectoryStore
+
+    Returns
+    -------
+    A list of the paths of the chunk stores, sorted by the index of the first configuration in each
+    """
+
+    directory, name = os.path.split(os.path.abspath(store_path))
+    starts = sorted(int(entry[len(name) + 1:]) for entry in os.listdir(directory)
+                    if entry.startswith(name + '.') and entry[len(name) + 1:].isdigit())
+    return [os.path.join(directory, f'{name}.{start}') for start in starts]
+
+
+def _initWorker(shm_name, shape, options, store_path):
+    """
+    Attaches a worker process to the shared results array
+    """
+
+    user_inputs.display.headless = True
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker['shm'] = shm
+    _worker['results'] = np.ndarray(shape, dtype=np.int64, buffer=shm.buf)
+    _worker['options'] = options
+    _worker['store_path'] = store_path
+
+
+def _runChunk(task):
+    """
+    Simulates one chunk of configurations in a worker process and writes the results into the shared array
+    """
+
+    start, configs = task
+    results, options, store_path = _worker['results'], _worker['options'], _worker['store_path']
+
+    # every chunk gets a store of its own, named after its first configuration, so however the chunks are
+    # shared out between the workers they can be joined back up in the order of the configurations
+    store = trajectory.TrajectoryStore(f'{store_path}.{start}', 'w') if store_path else None
+
+    for offset, config in enumerate(configs):
+        results[start + offset] = simulate(config, store=store, **options)
+
+    if store is not None:
+        store.close()
+
+    return len(configs)
+
+
+def printProgress(done, total, elapsed):
+    """
+    Prints how far through a sweep is (the default progress report)
+    """
+
+    rate = done / elapsed if elapsed else 0.0
+    remaining = (total - done) / rate if rate else float('inf')
+    print(f'\r{done}/{total} configurations ({rate:.0f}/s, {remaining:.0f}s left)', end='', file=sys.stderr)
+    if done == total:
+        print(file=sys.stderr)
+
+
+class Sweep(object):
+    """
+    A class to represent a sweep of headless launches over many configurations.
+
+    ...
+
+    Every configuration is one launch on a freshly placed level, simulated headlessly until the particle
+    stops (or a tick limit is hit). Configurations are split into chunks that are handed out to a pool of
+    worker processes, which write their results straight into a shared memory array, so a configuration
+    always gives the same result however the sweep is split up or however many workers run it.
+
+    Attributes
+    ----------
+    configs : ndarray
+        the configurations, one row per launch with one column for each entry in PARAMETERS
+    options : dict
+        the options passed to simulate for every configuration
+    workers : int
+        the number of worker processes (1 runs everything in this process)
+    chunk_size : int
+        the number of configurations handed to a worker at a time
+    progress : function
+        called with (done, total, elapsed seconds) after every chunk (None reports nothing)
+    results : ndarray
+        the results of the last run, one row per configuration with one column for each entry in RESULTS
+    store_path : str
+        the TrajectoryStore every launch's trajectory is appended to (None if they aren't kept)
+
+
+    Methods
+    -------
+    chunks():
+        returns the (start, configurations) work units
+    run():
+        runs every configuration and returns the results
+    runSerial():
+        runs every configuration in this process, one after another
+    clearShards():
+        deletes any chunk stores left behind by an earlier sweep that didn't finish
+    joinStores():
+        appends the trajectory stores written for each chunk onto the main one, in the order of the configurations
+    """
+
+    def __init__(self, configs, workers=None, chunk_size=None, progress=printProgress, obstacles=True, event_driven=False,
+                 max_ticks=5000, store_path=None):
+        """
+        Initialises all the attributes of the Sweep class
+
+        Parameters
+        ----------
+        configs : array_like
+            the configurations, one row per launch with one column for each entry in PARAMETERS
+        workers : int
+            the number of worker processes (defaults to the number of cores)
+        chunk_size : int
+            the number of configurations handed to a worker at a time (defaults to about 8 chunks per worker)
+        progress : function
+            called with (done, total, elapsed seconds) after every chunk
+        obstacles : Bool
+            whether the levels have obstacles
+        event_driven : Bool
+            whether the game steps from impact to impact
+        max_ticks : int
+            the most physics ticks simulated for one launch
+        store_path : str
+            the TrajectoryStore every launch's trajectory is appended to (not kept if not given)
+        """
+
+        self.configs = np.asarray(configs, dtype=float).reshape(-1, len(PARAMETERS))
+        self.options = {'obstacles': obstacles, 'event_driven': event_driven, 'max_ticks': max_ticks}
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_size = chunk_size or max(1, math.ceil(len(self.configs) / (self.workers * 8)))
+        self.progress = progress
+        self.results = None
+        self.store_path = store_path
+
+    def chunks(self):
+        """
+        Returns the (start, configurations) work units
+
+        Returns
+        -------
+        A list of tuples with the index of the first configuration in the chunk and the chunk's configurations
+        """
+
+        return [(start, self.configs[start:start + self.chunk_size]) for start in range(0, len(self.configs), self.chunk_size)]
+
+    def runSerial(self):
+        """
+        Runs every configuration in this process, one after another
+
+        Returns
+        -------
+        results : ndarray
+            one row per configuration with one column for each entry in RESULTS
+        """
+
+        user_inputs.display.headless = True
+
+        total = len(self.configs)
+        self.results = np.zeros((total, len(RESULTS)), dtype=np.int64)
+        start_time = time.perf_counter()
+        store = trajectory.TrajectoryStore(self.store_path, 'a') if self.store_path else None
+
+        for start, configs in self.chunks():
+            for offset, config in enumerate(configs):
+                self.results[start + offset] = simulate(config, store=store, **self.options)
+            if self.progress:
+                self.progress(start + len(configs), total, time.perf_counter() - start_time)
+
+        if store is not None:
+            store.close()
+
+        return self.results
+
+    def run(self):
+        """
+        Runs every configuration and returns the results
+
+        Returns
+        -------
+        results : ndarray
+            one row per configuration with one column for each entry in RESULTS
+        """
+
+        if self.workers == 1 or len(self.configs) <= self.chunk_size:
+            return self.runSerial()
+
+        if self.store_path:
+            self.clearShards()
+
+        total = len(self.configs)
+        shape = (total, len(RESULTS))
+        shm = shared_memory.SharedMemory(create=True, size=max(1, total * len(RESULTS) * 8))
+
+        try:
+            shared = np.ndarray(shape, dtype=np.int64, buffer=shm.buf)
+            shared[:] = 0
+
+            done = 0
+            start_time = time.perf_counter()
+            with multiprocessing.Pool(self.workers, _initWorker, (shm.name, shape, self.options, self.store_path)) as pool:
+                for count in pool.imap_unordered(_runChunk, self.chunks()):
+                    done += count
+                    if self.progress:
+                        self.progress(done, total, time.perf_counter() - start_time)
+
+            self.results = shared.copy()
+            del shared
+        finally:
+            shm.close()
+            shm.unlink()
+
+        if self.store_path:
+            self.joinStores()
+
+        return self.results
+
+    def clearShards(self):
+        """
+        Deletes any chunk stores left behind by an earlier sweep that didn't finish, so they aren't joined onto this one
+        """
+
+        for path in shardPaths(self.store_path):
+            for file_path in (path, path + '.idx'):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+    def joinStores(self):
+        """
+        Appends the trajectory stores written for each chunk onto the main one and deletes them
+
+        The chunks are joined in the order of their first configuration, so the launches end up in the same
+        order as a serial run would append them, however many workers ran the sweep.
+        """
+
+        with trajectory.TrajectoryStore(self.store_path, 'a') as store:
+            for path in shardPaths(self.store_path):
+                with trajectory.TrajectoryStore(path, 'r') as chunk_store:
+                    store.extend(chunk_store)
+                os.remove(path)
+                os.remove(path + '.idx')
+
+
+def main(argv=None):
+    """
+    Runs a random sweep from the command line
+
+    `python sweep.py --samples 10000` sweeps random configurations on every core and writes the results
+    to sweep_results.csv. With `--store sweep.traj` every launch's trajectory is also kept in a
+    memory-mapped TrajectoryStore, indexed by its configuration.
+    """
+
+    parser = argparse.ArgumentParser(description='Sweep headless launches over random launch and physics parameters.')
+    parser.add_argument('--samples', type=int, default=1000, help='the number of random configurations')
+    parser.add_argument('--seed', type=int, default=0, help='the seed for picking the configurations')
+    parser.add_argument('--levels', type=int, default=1, help='the number of different level layouts')
+    parser.add_argument('--workers', type=int, default=None, help='the number of worker processes (defaults to every core)')
+    parser.add_argument('--chunk-size', type=int, default=None, help='the number of configurations per work unit')
+    parser.add_argument('--no-obstacles', action='store_true', help='sweep levels without obstacles')
+    parser.add_argument('--output', default='sweep_results.csv', help='where to write the configurations and results')
+    parser.add_argument('--store', default=None, help='a .traj trajectory store to append every launch to')
+    args = parser.parse_args(argv)
+
+    sweep = Sweep(randomConfigs(args.samples, args.seed, args.levels), args.workers, args.chunk_size,
+                  obstacles=not args.no_obstacles, store_path=args.store)
+    results = sweep.run()
+
+    np.savetxt(args.output, np.hstack((sweep.configs, results)), delimiter=',', fmt='%g',
+               header=','.join(PARAMETERS + RESULTS), comments='')
+
+    for column, name in enumerate(RESULTS):
+        values = results[:, column]
+        print(f'{name:20} mean {values.mean():8.2f}   min {values.min():6d}   max {values.max():6d}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
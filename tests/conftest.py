@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the modules live at the top of the repository, and nothing opens a real window under test
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('PROJECTILES_HEADLESS', '1')
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+import collisions
+import engine
+import game_objects
+import profiler
+
+
+def obstacles(seed):
+    game_objects.rng.seed(seed)
+    return [game_objects.Obstacle(10), game_objects.Obstacle(10), game_objects.Obstacle(10),
+            game_objects.MovingObstacle(10), game_objects.MovingObstacle(10)]
+
+
+def scattered(count, seed):
+    batch = engine.ParticleBatch(count, radius=10)
+    generator = np.random.default_rng(seed)
+    batch.x[:] = generator.uniform(0, 1400, count)
+    batch.y[:] = generator.uniform(0, 800, count)
+    return batch
+
+
+def test_broad_phase_hits_the_same_particles_as_checking_every_obstacle():
+    shapes = obstacles(3)
+    broad_phase = collisions.ObstacleBroadPhase(shapes)
+    rows = np.arange(300)
+
+    for tick in range(200):
+        for obstacle in shapes[3:]:
+            obstacle.update()
+        broad_phase.update()
+        bounds = np.array([(obstacle.shape.left, obstacle.shape.right, obstacle.shape.top) for obstacle in shapes])
+
+        dense, pruned = scattered(rows.size, tick), scattered(rows.size, tick)
+        assert np.array_equal(dense.hitObstacles(bounds, rows), pruned.hitObstacles(broad_phase, rows))
+
+    assert broad_phase.pairs_tested + broad_phase.pairs_culled == 200 * rows.size * len(shapes)
+    assert broad_phase.pairs_culled > broad_phase.pairs_tested
+
+
+def test_query_finds_the_obstacles_under_a_particle():
+    shapes = obstacles(5)
+    broad_phase = collisions.ObstacleBroadPhase(shapes)
+
+    for obstacle in shapes:
+        coords = (obstacle.shape.centerx, obstacle.shape.top + 1)
+        found = broad_phase.query(coords, 10)
+        assert found == sorted(found, key=shapes.index)
+        assert all(other in found for other in shapes if other.checkCollision(coords, 10))
+
+
+@pytest.mark.parametrize('event_driven', [False, True])
+def test_obstacle_checks_are_timed_as_collisions(event_driven):
+    balls = game_objects.Balls(41, reserved=1)
+    balls.spray(700, 400, 30, 40, 40, spread=2.0)
+    broad_phase = collisions.ObstacleBroadPhase(obstacles(7))
+    stepper = engine.EventStepper(balls.batch, 1400, 800) if event_driven else None
+    timer = profiler.FrameProfiler(enabled=True)
+
+    timer.push('physics')
+    balls.step(0.05, 1400, 800, broad_phase, stepper, timer)
+    timer.pop()
+
+    assert [event['name'] for event in timer.trace] == ['collision', 'physics']
+    assert broad_phase.pairs_tested + broad_phase.pairs_culled == 40 * len(broad_phase)
+
+
+def test_many_balls_collect_the_same_points_as_one_at_a_time():
+    game_objects.rng.seed(11)
+    field = game_objects.PointField(400)
+    generator = np.random.default_rng(11)
+    starts = generator.uniform(0, 1400, (60, 2))
+    ends = starts + generator.uniform(-80, 80, (60, 2))
+    ends[::7, 0] = starts[::7, 0]
+    field.collected[::5] = True
+
+    one_at_a_time = field.copy()
+    expected = np.unique(np.concatenate([one_at_a_time.collidesSwept(tuple(start), tuple(end), 10)
+                                         for start, end in zip(starts, ends)]).astype(int))
+
+    assert np.array_equal(field.collidesSweptMany(starts, ends, 10), expected)
+    assert np.array_equal(field.collected, one_at_a_time.collected)
+
+
+def test_points_stay_filed_by_row_as_they_respawn():
+    game_objects.rng.seed(2)
+    field = game_objects.PointField(50)
+    field[3].respawn()
+    field.respawn(np.array([7, 8]))
+
+    grid = field.grid
+    assert sorted(grid.locations) == list(range(50))
+    for row in range(50):
+        assert grid.cells[grid.locations[row]][row] == (field.x[row], field.y[row])
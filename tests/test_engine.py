@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import engine
+
+WIDTH, HEIGHT = 1400, 800
+OBSTACLES = np.array([(300.0, 400.0, 600.0), (900.0, 960.0, 500.0)])
+LAUNCHES = [(60.0, 40.0), (-45.0, 70.0), (20.0, -10.0), (90.0, 5.0)]
+
+
+def launched(launches):
+    batch = engine.ParticleBatch(len(launches), coeff_rest=0.7)
+    batch.x[:], batch.y[:] = 700.0, 400.0
+    uX, uY = np.array(launches).T
+    batch.launch(uX, uY)
+    return batch
+
+
+def state(batch):
+    return np.column_stack((batch.x, batch.y, batch.vX, batch.vY, batch.bounces, batch.displayed_bounces, batch.projected))
+
+
+def polling(batch, ticks=400):
+    for tick in range(ticks):
+        batch.step(0.05, WIDTH, HEIGHT, OBSTACLES, np.arange(batch.size))
+
+
+def eventDriven(batch, ticks=400):
+    stepper = engine.EventStepper(batch, WIDTH, HEIGHT, OBSTACLES)
+    for tick in range(ticks):
+        stepper.step(0.05)
+
+
+@pytest.mark.parametrize('run', [polling, eventDriven])
+def test_one_row_steps_the_same_as_in_a_batch(run):
+    together = launched(LAUNCHES)
+    run(together)
+
+    for row, launch in enumerate(LAUNCHES):
+        alone = launched([launch])
+        run(alone)
+        assert np.array_equal(state(alone)[0], state(together)[row])
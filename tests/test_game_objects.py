@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+import engine
+import game_objects
+
+LAUNCHES = [(900, 300), (200, 200), (1100, 600)]
+
+
+@pytest.mark.parametrize('row', range(len(LAUNCHES)))
+def test_a_particle_moves_and_bounces_like_its_row_of_a_batch(row):
+    batch = engine.ParticleBatch(len(LAUNCHES), radius=10, coeff_rest=0.7)
+    batch.x[:], batch.y[:] = 700.0, 400.0
+    uX, uY = np.array([engine.launchVelocity(700.0, 400.0, aim) for aim in LAUNCHES]).T
+    batch.launch(uX, uY)
+
+    particle = game_objects.Particle(700.0, 400.0, 10)
+    particle.coeff_rest = 0.7
+    particle.findInitVel(LAUNCHES[row])
+    particle.batch.launch(particle.uX, particle.uY)
+
+    for t in (0.5, 1.25, 3.0):
+        batch.move(batch.initX, batch.initY, t)
+        particle.findPath(particle.initX, particle.initY, t)
+        assert (particle.x, particle.y, particle.vX, particle.vY) == (batch.x[row], batch.y[row], batch.vX[row], batch.vY[row])
+
+    for bounce_type in ('horizontal', 'vertical'):
+        x, y = batch.bounce(bounce_type)
+        assert particle.bounce(bounce_type) == (x[row], y[row])
+        assert (particle.vX, particle.vY, particle.bounces) == (batch.vX[row], batch.vY[row], batch.bounces[row])
@@ -0,0 +1,35 @@
+import numpy as np
+
+import engine
+import integrators
+
+
+def arc(integrator, x=300.0, uX=60.0, ticks=60, dt=0.05, rows=1):
+    batch = engine.ParticleBatch(rows, drag=0.002, integrator=integrator)
+    batch.x[:], batch.y[:] = x, 700.0
+    batch.launch(np.full(rows, uX), np.full(rows, 40.0))
+    for tick in range(1, ticks + 1):
+        batch.move(x, 700.0, tick * dt)
+    return batch
+
+
+def test_rk45_takes_one_step_per_tick_on_a_smooth_arc():
+    integrator = integrators.RK45(bounds=(1400, 800))
+    # thrown straight up a pixel away from the wall, which it never reaches
+    arc(integrator, x=11.0, uX=0.0)
+
+    assert integrator.steps == 60
+    assert integrator.rejected == 0
+
+
+def test_rk45_single_row_matches_the_batch():
+    one = arc(integrators.RK45(bounds=(1400, 800)))
+    many = arc(integrators.RK45(bounds=(1400, 800)), rows=3)
+
+    assert np.allclose(many.x, one.x[0]) and np.allclose(many.y, one.y[0])
+
+
+def test_rk45_stays_close_to_the_reference_path():
+    results = integrators.compareIntegrators([integrators.RK45(), integrators.RK4()], drag=0.002)
+
+    assert all(result['actual_error'] < 1e-6 for result in results)
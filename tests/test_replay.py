@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+import game_file
+import integrators
+import replay
+
+OPTIONS = [
+    {'burst': 3, 'spread': 0.8, 'drag': 0.002},
+    {'burst': 2, 'event_driven': True, 'tick_rate': 120},
+    {'drag': 0.001, 'integrator': integrators.RK4(max_step=0.02)},
+]
+AIMS = [(900, 300), (200, 200)]
+
+
+def state(game):
+    batch = game.balls.batch
+    return np.column_stack((batch.x, batch.y, batch.vX, batch.vY, batch.t, batch.bounces, batch.projected))
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_a_replayed_run_ends_exactly_like_the_recorded_one(tmp_path, options):
+    path = str(tmp_path / 'run.rec')
+    game = game_file.Game(seed=7, record_path=path, fps=0, **options)
+    game.newLevel()
+    game.applySettings(False, False, True, False, 0.5, 12, 12.0)
+    game.startRun()
+
+    for aim in AIMS:
+        game.launch(aim)
+        for tick in range(5000):
+            game.physicsStep()
+            if not game.particle.projected:
+                break
+    game.recorder.close(game.ticks, game.score)
+
+    replayer = replay.Replayer(path)
+    result = replayer.run()
+
+    assert result['matches'] and result['ticks'] == game.ticks
+    assert replayer.game.score == game.score
+    assert replayer.game.launches == game.launches == 10 - len(AIMS)
+    assert np.array_equal(state(replayer.game), state(game))
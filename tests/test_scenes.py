@@ -0,0 +1,55 @@
+import pygame
+
+import game_file
+import scenes
+import user_inputs
+
+
+def click(pos):
+    user_inputs.display.postEvent(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+
+
+def test_a_game_goes_from_the_menu_to_game_over_and_back():
+    game = game_file.Game(seed=1, fps=0)
+    manager = scenes.SceneManager(game)
+    manager.switch(scenes.MENU)
+
+    obstacle_button = manager.scene.input_buttons[3]
+    click(obstacle_button.shape.center)
+    click(manager.scene.run_button.shape.center)
+    manager.scene.frame()
+    assert manager.scene.next == scenes.PLAYING and game.obstacles_shown
+
+    manager.switch(manager.scene.next)
+    assert (game.score, game.launches) == (0, 10)
+
+    game.launches = -1
+    manager.scene.handle([])
+    assert manager.scene.next == scenes.GAME_OVER
+
+    manager.switch(manager.scene.next)
+    click((10, 10))
+    manager.scene.frame()
+    assert manager.scene.next == scenes.MENU
+
+    manager.switch(manager.scene.next)
+    assert isinstance(manager.scene, scenes.MenuScene) and manager.transitions == 3
+
+
+def test_switching_lets_go_of_the_scene_it_leaves():
+    left = []
+
+    class Counted(scenes.Scene):
+        def frame(self):
+            self.next = 'next'
+
+        def exit(self):
+            left.append(self)
+
+    manager = scenes.SceneManager(object(), {'first': Counted, 'next': Counted})
+    manager.switch('first')
+    first = manager.scene
+    first.frame()
+    manager.switch(first.next)
+
+    assert left == [first] and manager.scene is not first and manager.transitions == 1
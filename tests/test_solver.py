@@ -0,0 +1,22 @@
+import pytest
+
+import game_file
+
+
+@pytest.mark.parametrize('seed', [0, 3, 6])
+def test_the_best_launch_collects_the_points_it_was_predicted_to(seed):
+    # collisions are solved for exactly, like the solver does, so nothing is missed between ticks
+    game = game_file.Game(seed=seed, fps=0, event_driven=True)
+    game.newLevel()
+    game.applySettings(False, False, False, False, 0.7, 10, 9.81)
+    game.startRun()
+
+    aim, predicted = game.bestLaunch()
+    game.launch(aim)
+    for tick in range(5000):
+        game.physicsStep()
+        if not game.particle.projected:
+            break
+
+    assert predicted > 0
+    assert game.score == predicted
@@ -0,0 +1,22 @@
+import numpy as np
+
+import sweep
+import trajectory
+
+
+def test_workers_give_the_same_results_and_store_as_a_serial_sweep(tmp_path):
+    configs = sweep.randomConfigs(12, seed=3, levels=3)
+    serial = sweep.Sweep(configs, workers=1, progress=None, max_ticks=600, store_path=str(tmp_path / 'serial.traj'))
+    parallel = sweep.Sweep(configs, workers=3, chunk_size=2, progress=None, max_ticks=600,
+                           store_path=str(tmp_path / 'parallel.traj'))
+
+    assert np.array_equal(serial.run(), parallel.run())
+    assert serial.results[:, sweep.RESULTS.index('ticks')].all()
+
+    with trajectory.TrajectoryStore(serial.store_path, 'r') as expected, \
+            trajectory.TrajectoryStore(parallel.store_path, 'r') as joined:
+        assert (joined.samples, joined.launches) == (expected.samples, expected.launches) and expected.launches == len(configs)
+        assert np.array_equal(joined.records[:joined.samples], expected.records[:expected.samples])
+        assert np.array_equal(joined.index[:joined.launches], expected.index[:expected.launches])
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['parallel.traj', 'parallel.traj.idx', 'serial.traj', 'serial.traj.idx']
@@ -0,0 +1,25 @@
+import pytest
+
+import timing
+
+
+def test_ticks_are_run_for_the_time_that_has_passed():
+    timestep = timing.FixedTimestep(tick_rate=60, max_ticks=5)
+
+    assert timestep.advance(2.5 / 60) == 2
+    assert timestep.alpha() == pytest.approx(0.5)
+    assert timestep.advance(0.6 / 60) == 1
+    assert timestep.alpha() == pytest.approx(0.1)
+    assert timestep.dropped == 0
+
+
+def test_a_slow_frame_drops_the_time_it_cant_catch_up_on():
+    timestep = timing.FixedTimestep(tick_rate=60, max_ticks=5)
+    timestep.advance(0.5 / 60)
+
+    assert timestep.advance(1.0) == 5
+    assert timestep.dropped == pytest.approx(55 / 60)
+    assert timestep.alpha() == pytest.approx(0.5)
+
+    timestep.reset()
+    assert timestep.advance(0.0) == 0 and timestep.alpha() == 0
@@ -0,0 +1,95 @@
+class FixedTimestep(object):
+    """
+    A class to represent a fixed-timestep scheduler for the physics.
+
+    ...
+
+    Real time that has passed is stored in an accumulator and used up in fixed-length physics ticks,
+    so the simulation runs at the same speed however quickly the frames are drawn.
+
+    Attributes
+    ----------
+    tick_rate : float
+        the number of physics ticks per second of real time
+    tick_length : float
+        the length of one physics tick in seconds of real time
+    max_ticks : int
+        the most physics ticks that can be run in one frame when catching up after a slow frame
+    accumulator : float
+        the real time (in seconds) that hasn't been simulated yet
+    dropped : float
+        the total real time (in seconds) thrown away because it would have needed too many ticks to catch up
+
+
+    Methods
+    -------
+    advance(elapsed):
+        adds the elapsed real time to the accumulator and returns how many physics ticks are due
+    alpha():
+        returns how far the current frame is between the last two physics ticks
+    reset():
+        empties the accumulator
+    """
+
+    def __init__(self, tick_rate=60, max_ticks=5):
+        """
+        Initialises all the attributes of the FixedTimestep class
+
+        Parameters
+        ----------
+        tick_rate : float
+            the number of physics ticks per second of real time
+        max_ticks : int
+            the most physics ticks that can be run in one frame
+        """
+
+        self.tick_rate = tick_rate
+        self.tick_length = 1 / tick_rate
+        self.max_ticks = max_ticks
+        self.accumulator = 0.0
+        self.dropped = 0.0
+
+    def advance(self, elapsed):
+        """
+        Adds the elapsed real time to the accumulator and returns how many physics ticks are due
+
+        Parameters
+        ----------
+        elapsed : float
+            the real time (in seconds) since the last frame
+
+        Returns
+        -------
+        ticks : int
+            the number of physics ticks to run this frame (never more than max_ticks)
+        """
+
+        self.accumulator += elapsed
+
+        ticks = int(self.accumulator // self.tick_length)
+        if ticks > self.max_ticks:
+            # too far behind to catch up, so the extra time is dropped instead of spiralling
+            self.dropped += (ticks - self.max_ticks) * self.tick_length
+            ticks = self.max_ticks
+            self.accumulator = self.tick_length * (self.max_ticks + self.accumulator / self.tick_length % 1)
+
+        self.accumulator -= ticks * self.tick_length
+        return ticks
+
+    def alpha(self):
+        """
+        Returns how far the current frame is between the last two physics ticks
+
+        Returns
+        -------
+        A float between 0 and 1 used to interpolate between the previous and current physics states
+        """
+
+        return min(self.accumulator / self.tick_length, 1.0)
+
+    def reset(self):
+        """
+        Empties the accumulator
+        """
+
+        self.accumulator = 0.0
@@ -0,0 +1,709 @@
+import atexit
+import json
+import os
+import queue
+import struct
+import threading
+
+import numpy as np
+
+# one record per physics tick the particle is projected for
+RECORD = np.dtype([
+    ('tick', '<i8'),
+    ('launch', '<i4'),
+    ('x', '<f8'),
+    ('y', '<f8'),
+    ('vX', '<f8'),
+    ('vY', '<f8'),
+    ('vel', '<f8'),
+    ('bounces', '<i4'),
+    ('score', '<i4'),
+])
+
+BINARY_HEADER = struct.Struct('<4sB')
+BINARY_CHUNK = struct.Struct('<I')
+BINARY_MAGIC = b'PRJT'
+BINARY_VERSION = 1
+
+FORMATS = ('csv', 'jsonl', 'bin')
+
+# the launch and physics parameters each launch in a TrajectoryStore is indexed by
+PARAMETERS = ('seed', 'aim_x', 'aim_y', 'restitution', 'gravity', 'size')
+
+# one entry per launch in a TrajectoryStore: where its records are and what it was launched with
+INDEX = np.dtype([('start', '<i8'), ('count', '<i8'), ('launch', '<i8')] + [(name, '<f8') for name in PARAMETERS])
+
+STORE_HEADER = struct.Struct('<4sBQQ')
+STORE_MAGIC = b'PRJS'
+STORE_VERSION = 1
+# the index starts after the header, lined up with the size of an index entry
+STORE_INDEX_OFFSET = 64
+
+
+def formatFor(path):
+    """
+    Returns the format a trajectory file is written in, going by its extension
+
+    Parameters
+    ----------
+    path : str
+        the file the trajectory is written to
+
+    Returns
+    -------
+    One of FORMATS (binary if the extension isn't recognised)
+    """
+
+    extension = path.rsplit('.', 1)[-1].lower() if '.' in path else ''
+    return extension if extension in FORMATS else 'bin'
+
+
+def openTrajectory(path, **options):
+    """
+    Opens the right kind of trajectory output for a file, going by its extension
+
+    Parameters
+    ----------
+    path : str
+        the file the trajectory is written to (.traj files are a TrajectoryStore, anything else a TrajectorySink)
+    options :
+        any other options to create the store or sink with
+
+    Returns
+    -------
+    A TrajectoryStore or TrajectorySink
+    """
+
+    if path.lower().endswith('.traj'):
+        return TrajectoryStore(path, 'a', **options)
+    return TrajectorySink(path, **options)
+
+
+def readBinary(path):
+    """
+    Reads a trajectory written in the binary columnar format
+
+    Parameters
+    ----------
+    path : str
+        the file to read
+
+    Returns
+    -------
+    A structured array with one RECORD per row
+    """
+
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, version = BINARY_HEADER.unpack_from(data, 0)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError(f'{path} is not a version {BINARY_VERSION} binary trajectory')
+
+    chunks = []
+    offset = BINARY_HEADER.size
+    while offset < len(data):
+        count, = BINARY_CHUNK.unpack_from(data, offset)
+        offset += BINARY_CHUNK.size
+
+        chunk = np.empty(count, dtype=RECORD)
+        for name in RECORD.names:
+            size = count * RECORD[name].itemsize
+            chunk[name] = np.frombuffer(data, dtype=RECORD[name], count=count, offset=offset)
+            offset += size
+        chunks.append(chunk)
+
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=RECORD)
+
+
+class TrajectorySink(object):
+    """
+    A class to represent a sink that streams the particle's state to a file without stalling the frame loop.
+
+    ...
+
+    Records are written into preallocated chunks. Once a chunk is full it is handed to a background
+    writer thread, which formats it and writes it to the file while the game carries on filling the next
+    one. Only a fixed number of chunks exist, so if the writer falls behind the game either waits for a
+    chunk to be freed (the default) or drops records and counts them, instead of buffering without
+    limit. Everything still buffered is written when the sink is closed, which also happens when the
+    interpreter exits.
+
+    Files can be CSV, JSON Lines or a compact binary format where each chunk is stored column by column
+    (see readBinary).
+
+    Attributes
+    ----------
+    path : str
+        the file the trajectory is written to
+    format : str
+        the format the file is written in (one of FORMATS)
+    chunk_size : int
+        the number of records in each chunk
+    block : Bool
+        a boolean value for whether record waits for a free chunk when the writer falls behind (otherwise records are dropped)
+    written : int
+        the number of records written to the file
+    dropped : int
+        the number of records dropped because the writer fell behind
+    waits : int
+        the number of times record had to wait for the writer
+    closed : Bool
+        a boolean value for whether the sink has been closed
+
+
+    Methods
+    -------
+    beginLaunch(launch, params):
+        does nothing, as every record already has its launch number
+    record(tick, launch, x, y, vX, vY, vel, bounces, score):
+        adds one record to the current chunk
+    flush():
+        hands over the current chunk and waits until everything recorded so far has been written
+    close():
+        writes everything still buffered, stops the writer thread and closes the file
+    """
+
+    def __init__(self, path, format=None, chunk_size=4096, chunks=4, block=True):
+        """
+        Initialises all the attributes of the TrajectorySink class and starts the writer thread
+
+        Parameters
+        ----------
+        path : str
+            the file the trajectory is written to
+        format : str
+            the format the file is written in (defaults to going by the extension)
+        chunk_size : int
+            the number of records in each chunk
+        chunks : int
+            the number of preallocated chunks (how far the writer can fall behind before backpressure kicks in)
+        block : Bool
+            whether record waits for a free chunk when the writer falls behind (otherwise records are dropped)
+        """
+
+        self.path = path
+        self.format = format or formatFor(path)
+        if self.format not in FORMATS:
+            raise ValueError(f'unknown trajectory format {self.format!r}, expected one of {FORMATS}')
+
+        self.chunk_size = chunk_size
+        self.block = block
+        self.written = 0
+        self.dropped = 0
+        self.waits = 0
+        self.closed = False
+
+        self._free = queue.Queue()
+        for chunk in range(max(2, chunks)):
+            self._free.put(np.empty(chunk_size, dtype=RECORD))
+        self._full = queue.Queue()
+        self._chunk = self._free.get()
+        self._count = 0
+        self._error = None
+
+        self._file = open(path, 'wb' if self.format == 'bin' else 'w', newline='' if self.format == 'csv' else None)
+        if self.format == 'csv':
+            self._file.write(','.join(RECORD.names) + '\n')
+        elif self.format == 'bin':
+            self._file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION))
+
+        self._thread = threading.Thread(target=self._write, name='trajectory-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def beginLaunch(self, launch, params=None):
+        """
+        Does nothing, as every record already has its launch number (this keeps the same interface as TrajectoryStore)
+        """
+
+    def record(self, tick, launch, x, y, vX, vY, vel, bounces, score):
+        """
+        Adds one record to the current chunk, handing the chunk to the writer once it is full
+
+        Parameters
+        ----------
+        tick : int
+            the physics tick
+        launch : int
+            the number of the launch the particle is on
+        x,y : float
+            the coordinates of the particle
+        vX,vY : float
+            the x and y components of the particle's velocity
+        vel : float
+            the overall velocity of the particle
+        bounces : int
+            the number of times the particle bounced during the tick
+        score : int
+            the current score
+        """
+
+        if self._chunk is None and not self._take():
+            self.dropped += 1
+            return
+
+        self._chunk[self._count] = (tick, launch, x, y, vX, vY, vel, bounces, score)
+        self._count += 1
+
+        if self._count == self.chunk_size:
+            self._handOver()
+
+    def flush(self):
+        """
+        Hands over the current chunk and waits until everything recorded so far has been written
+        """
+
+        if self.closed:
+            return
+
+        self._handOver()
+        self._full.join()
+        self._file.flush()
+        self._raiseError()
+
+    def close(self):
+        """
+        Writes everything still buffered, stops the writer thread and closes the file
+        """
+
+        if self.closed:
+            return
+
+        self._handOver()
+        self._full.put(None)
+        self._thread.join()
+        self._file.close()
+        self.closed = True
+        atexit.unregister(self.close)
+        self._raiseError()
+
+    def _take(self):
+        """
+        Gets an empty chunk to record into, waiting for the writer if there isn't one and the sink blocks
+
+        Returns
+        -------
+        True if there is a chunk to record into
+        """
+
+        self._raiseError()
+        try:
+            self._chunk = self._free.get_nowait()
+        except queue.Empty:
+            if not self.block:
+                return False
+            self.waits += 1
+            self._chunk = self._free.get()
+
+        self._count = 0
+        return True
+
+    def _handOver(self):
+        """
+        Hands the current chunk to the writer thread if anything has been recorded in it
+        """
+
+        if self._chunk is not None and self._count:
+            self._full.put((self._chunk, self._count))
+            self._chunk = None
+            self._count = 0
+
+    def _raiseError(self):
+        """
+        Raises any error the writer thread hit in the thread that is recording
+        """
+
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _write(self):
+        """
+        Writes chunks to the file as they are handed over, until it is told to stop (runs on the writer thread)
+        """
+
+        while True:
+            item = self._full.get()
+            try:
+                if item is None:
+                    return
+
+                chunk, count = item
+                if self._error is None:
+                    try:
+                        self._writeChunk(chunk[:count])
+                        self.written += count
+                    except Exception as error:
+                        self._error = error
+                self._free.put(chunk)
+            finally:
+                self._full.task_done()
+
+    def _writeChunk(self, records):
+        """
+        Formats some records and writes them to the file (runs on the writer thread)
+        """
+
+        if self.format == 'csv':
+            np.savetxt(self._file, records, delimiter=',', fmt=['%d', '%d', '%.6f', '%.6f', '%.6f', '%.6f', '%.6f', '%d', '%d'])
+        elif self.format == 'jsonl':
+            self._file.writelines(json.dumps(dict(zip(RECORD.names, row))) + '\n' for row in records.tolist())
+        else:
+            self._file.write(BINARY_CHUNK.pack(len(records)))
+            for name in RECORD.names:
+                self._file.write(np.ascontiguousarray(records[name]).tobytes())
+
+
+class TrajectoryStore(object):
+    """
+    A class to represent an on-disk store of trajectories that is too big to keep in memory.
+
+    ...
+
+    Records are kept in a file of fixed-size RECORD entries, one after another, and each launch has an
+    entry in an index file with the offset and number of its records and the parameters it was launched
+    with. Both files are memory-mapped with numpy.memmap, so appending only touches the end of the files
+    and reading a launch returns a view of the mapped file rather than a copy. The files grow in large
+    steps as they fill up, and the number of records and launches in use is kept in the index file's
+    header, so a store can be reopened to read or to append more.
+
+    Attributes
+    ----------
+    path : str
+        the file the records are kept in (the index is kept in path + '.idx')
+    mode : str
+        'r' to only read, 'w' to start a new store or 'a' to append to an existing one
+    grow : int
+        the least number of records the records file grows by
+    samples : int
+        the number of records in the store
+    launches : int
+        the number of launches in the store
+    records : memmap
+        the mapped records file (only the first samples entries are used)
+    index : memmap
+        the mapped index (only the first launches entries are used)
+
+
+    Methods
+    -------
+    beginLaunch(launch, params):
+        starts a new launch that the following records are added to
+    record(tick, launch, x, y, vX, vY, vel, bounces, score):
+        appends one record to the current launch
+    append(records):
+        appends a block of records to the current launch
+    launch(number):
+        returns a view of the records of one launch
+    coords(number):
+        returns a view of the x and y coordinates of one launch as an (n, 2) array
+    find(**params):
+        returns the launches launched with the given parameters
+    select(**params):
+        returns views of the records of every launch launched with the given parameters
+    extend(other):
+        appends every launch in another store
+    flush():
+        writes the header and flushes the mapped files to disk
+    close():
+        flushes the store and unmaps its files
+    """
+
+    def __init__(self, path, mode='a', grow=1 << 16):
+        """
+        Initialises all the attributes of the TrajectoryStore class and maps its files
+
+        Parameters
+        ----------
+        path : str
+            the file the records are kept in (the index is kept in path + '.idx')
+        mode : str
+            'r' to only read, 'w' to start a new store or 'a' to append to an existing one (starting one if there isn't)
+        grow : int
+            the least number of records the records file grows by
+        """
+
+        if mode not in ('r', 'w', 'a'):
+            raise ValueError(f"mode must be 'r', 'w' or 'a', not {mode!r}")
+
+        self.path = path
+        self.index_path = path + '.idx'
+        self.mode = mode
+        self.grow = grow
+        self.samples = 0
+        self.launches = 0
+        self.records = None
+        self.index = None
+
+        if mode == 'w' or (mode == 'a' and not os.path.exists(self.index_path)):
+            for file_path in (self.path, self.index_path):
+                with open(file_path, 'wb'):
+                    pass
+            self._writeHeader()
+        else:
+            with open(self.index_path, 'rb') as file:
+                magic, version, self.samples, self.launches = STORE_HEADER.unpack(file.read(STORE_HEADER.size))
+            if magic != STORE_MAGIC or version != STORE_VERSION:
+                raise ValueError(f'{path} is not a version {STORE_VERSION} trajectory store')
+
+        self._map()
+
+    def __len__(self):
+        return self.launches
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _map(self):
+        """
+        Maps (or remaps, after they have grown) the records and index files
+        """
+
+        access = 'r' if self.mode == 'r' else 'r+'
+        record_count = os.path.getsize(self.path) // RECORD.itemsize
+        index_count = (os.path.getsize(self.index_path) - STORE_INDEX_OFFSET) // INDEX.itemsize
+
+        # an empty file can't be mapped, so an empty array stands in until the file first grows
+        self.records = np.memmap(self.path, RECORD, access, shape=(record_count,)) if record_count else np.empty(0, RECORD)
+        self.index = (np.memmap(self.index_path, INDEX, access, STORE_INDEX_OFFSET, (index_count,)) if index_count > 0
+                      else np.empty(0, INDEX))
+
+    def _reserve(self, samples, launches):
+        """
+        Grows the files, if needed, so they have room for the given number of records and launches
+        """
+
+        if self.mode == 'r':
+            raise ValueError(f'{self.path} was opened read-only')
+
+        grown = False
+        if samples > len(self.records):
+            self._extend(self.path, 0, RECORD.itemsize, max(samples, 2 * len(self.records), self.grow))
+            grown = True
+        if launches > len(self.index):
+            self._extend(self.index_path, STORE_INDEX_OFFSET, INDEX.itemsize, max(launches, 2 * len(self.index), 1024))
+            grown = True
+
+        if grown:
+            # views handed out before this keep the old mapping alive, so they stay valid
+            self._flushMaps()
+            self._map()
+
+    @staticmethod
+    def _extend(file_path, offset, itemsize, count):
+        """
+        Makes a file big enough to hold the given number of entries after its header
+        """
+
+        with open(file_path, 'r+b') as file:
+            file.truncate(offset + count * itemsize)
+
+    def _writeHeader(self):
+        """
+        Writes the number of records and launches in use to the start of the index file
+        """
+
+        with open(self.index_path, 'r+b') as file:
+            header = STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, self.samples, self.launches)
+            file.write(header.ljust(STORE_INDEX_OFFSET, b'\0'))
+
+    def _flushMaps(self):
+        """
+        Flushes the mapped files to disk
+        """
+
+        for mapped in (self.records, self.index):
+            if isinstance(mapped, np.memmap):
+                mapped.flush()
+
+    def beginLaunch(self, launch, params=None):
+        """
+        Starts a new launch that the following records are added to
+
+        Parameters
+        ----------
+        launch : int
+            the number of the launch
+        params : dict
+            the parameters the launch was launched with, keyed by the names in PARAMETERS (missing ones are NaN)
+        """
+
+        self._reserve(self.samples, self.launches + 1)
+
+        params = params or {}
+        self.index[self.launches] = (self.samples, 0, launch) + tuple(params.get(name, np.nan) for name in PARAMETERS)
+
+        self.launches += 1
+
+    def record(self, tick, launch, x, y, vX, vY, vel, bounces, score):
+        """
+        Appends one record to the current launch (starting a new launch if the launch number changed)
+
+        Parameters
+        ----------
+        tick : int
+            the physics tick
+        launch : int
+            the number of the launch the particle is on
+        x,y : float
+            the coordinates of the particle
+        vX,vY : float
+            the x and y components of the particle's velocity
+        vel : float
+            the overall velocity of the particle
+        bounces : int
+            the number of times the particle bounced during the tick
+        score : int
+            the current score
+        """
+
+        if not self.launches or self.index['launch'][self.launches - 1] != launch:
+            self.beginLaunch(launch)
+
+        self._reserve(self.samples + 1, self.launches)
+        self.records[self.samples] = (tick, launch, x, y, vX, vY, vel, bounces, score)
+        self.samples += 1
+        self.index['count'][self.launches - 1] += 1
+
+    def append(self, records):
+        """
+        Appends a block of records to the current launch
+
+        Parameters
+        ----------
+        records : ndarray
+            a structured array of RECORD entries
+        """
+
+        if not self.launches:
+            self.beginLaunch(0)
+
+        count = len(records)
+        self._reserve(self.samples + count, self.launches)
+        self.records[self.samples:self.samples + count] = records
+        self.samples += count
+        self.index['count'][self.launches - 1] += count
+
+    def launch(self, number):
+        """
+        Returns a view of the records of one launch
+
+        Parameters
+        ----------
+        number : int
+            the position of the launch in the store (not its launch number)
+
+        Returns
+        -------
+        A structured array of RECORD entries that shares memory with the mapped file
+        """
+
+        start, count = self.index['start'][number], self.index['count'][number]
+        return self.records[start:start + count]
+
+    def coords(self, number):
+        """
+        Returns a view of the x and y coordinates of one launch as an (n, 2) array, eg, to load into a Trail
+
+        Parameters
+        ----------
+        number : int
+            the position of the launch in the store
+
+        Returns
+        -------
+        An (n, 2) float array that shares memory with the mapped file
+        """
+
+        records = self.launch(number)
+        # x and y sit next to each other in every record, so they can be viewed as one strided array
+        return np.ndarray((len(records), 2), '<f8', records, RECORD.fields['x'][1], (RECORD.itemsize, RECORD['x'].itemsize))
+
+    def find(self, **params):
+        """
+        Returns the launches launched with the given parameters
+
+        Parameters
+        ----------
+        params :
+            the values to match, keyed by the names in PARAMETERS
+
+        Returns
+        -------
+        An array with the position in the store of every matching launch
+        """
+
+        index = self.index[:self.launches]
+        matches = np.ones(self.launches, dtype=bool)
+        for name, value in params.items():
+            if name not in PARAMETERS:
+                raise ValueError(f'unknown parameter {name!r}, expected one of {PARAMETERS}')
+            matches &= np.isclose(index[name], value)
+
+        return np.flatnonzero(matches)
+
+    def select(self, **params):
+        """
+        Returns views of the records of every launch launched with the given parameters
+
+        Parameters
+        ----------
+        params :
+            the values to match, keyed by the names in PARAMETERS
+
+        Returns
+        -------
+        A list of structured arrays that share memory with the mapped file
+        """
+
+        return [self.launch(number) for number in self.find(**params)]
+
+    def extend(self, other):
+        """
+        Appends every launch in another store, eg, to join up the stores written by the workers of a sweep
+
+        Parameters
+        ----------
+        other : TrajectoryStore
+            the store to copy the launches from
+        """
+
+        samples, launches = other.samples, other.launches
+        self._reserve(self.samples + samples, self.launches + launches)
+
+        self.records[self.samples:self.samples + samples] = other.records[:samples]
+        index = self.index[self.launches:self.launches + launches]
+        index[:] = other.index[:launches]
+        index['start'] += self.samples
+
+        self.samples += samples
+        self.launches += launches
+
+    def flush(self):
+        """
+        Writes the header and flushes the mapped files to disk
+        """
+
+        if self.mode == 'r' or self.records is None:
+            return
+
+        self._flushMaps()
+        self._writeHeader()
+
+    def close(self):
+        """
+        Flushes the store and unmaps its files
+        """
+
+        self.flush()
+        self.records = self.index = None
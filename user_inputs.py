@@ -1,5 +1,5 @@
+import rendering
 import pygame
-pygame.init()
 
 BLACK = 0, 0, 0
 WHITE = 255, 255, 255
@@ -12,8 +12,19 @@ YELLOW = 255, 255, 0
 
 wScreen = 1440
 hScreen = 800
-window = pygame.display.set_mode((wScreen, hScreen))
-font = pygame.font.SysFont('Ariel', 30)
+display = rendering.Display((wScreen, hScreen))
+text_cache = rendering.TextCache()
+sprite_cache = rendering.SpriteCache()
+
+
+def __getattr__(name):
+    """
+    Keeps user_inputs.window and user_inputs.font working now that they are created lazily by the display
+    """
+
+    if name in ('window', 'font'):
+        return getattr(display, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class Button(object):
@@ -69,7 +80,7 @@ class Button(object):
         self.pressed = False
         self.start_colour = colour if colour else RED
         self.colour = self.start_colour
-        self.text = font.render(f"{text.upper()}", True, (255, 255, 255))
+        self.text = text_cache.render(display.font, f"{text.upper()}", True, WHITE)
         self.length = len(text)
         self.shape = pygame.Rect(x, y, self.length*15, 50)
 
@@ -94,10 +105,14 @@ class Button(object):
     def draw(self):
         """
         Draws the button on the window
+
+        Returns
+        -------
+        The Rect covered by the button
         """
 
-        pygame.draw.rect(window, self.colour, self.shape)
-        window.blit(self.text, (self.x + self.length, self.y + 15))
+        rect = pygame.draw.rect(display.window, self.colour, self.shape)
+        return rect.union(display.window.blit(self.text, (self.x + self.length, self.y + 15)))
 
 
 class MainButton(Button):
@@ -195,6 +210,10 @@ class Slider(object):
             integer value showing which mouse button has been pressed (1 = primary button, ie, normal left click)
         pos : tuple
             current coordinates of the cursor
+
+        Returns
+        -------
+        True if the slider was dragged
         """
 
         if clicked == 1 and self.slider_shape.collidepoint(pos):
@@ -206,13 +225,21 @@ class Slider(object):
                 self.slider_shape.x = pos[0] - 10
 
             self.slider_val = round((self.min + (self.slider_shape.x - self.x) * self.increment), 1)
+            return True
 
     def draw(self):
         """
         Draws the slider and track on the window, as well as its current value
+
+        Returns
+        -------
+        rect : Rect
+            the Rect covered by the slider, its track and its text
         """
 
-        pygame.draw.rect(window, WHITE, self.track_shape)
-        pygame.draw.rect(window, RED, self.slider_shape)
-        window.blit((font.render(f"{self.name}", True, BLACK)), (self.x-125, self.y+15))
-        window.blit((font.render(f"{self.slider_val}", True, BLACK)), (self.slider_shape.x, self.y - 30))
+        window = display.window
+        rect = pygame.draw.rect(window, WHITE, self.track_shape)
+        rect.union_ip(pygame.draw.rect(window, RED, self.slider_shape))
+        rect.union_ip(window.blit(text_cache.render(display.font, f"{self.name}", True, BLACK), (self.x-125, self.y+15)))
+        rect.union_ip(window.blit(text_cache.render(display.font, f"{self.slider_val}", True, BLACK), (self.slider_shape.x, self.y - 30)))
+        return rect